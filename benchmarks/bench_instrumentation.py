@@ -0,0 +1,76 @@
+"""
+Benchmark the cost of the instrumentation layer.
+
+Measures a span on its own, with instrumentation off and on, then runs
+SELECT queries against a local stub SPARQL server and generates shapes,
+with instrumentation off and on. Finally prints the recorded metrics in
+the Prometheus text format.
+
+Usage:
+    python benchmarks/bench_instrumentation.py [--queries N] [--rows N]
+"""
+
+import argparse
+import time
+
+from pydantic import BaseModel
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.core import ShapeGenerator
+from langgraphsemantic.instrumentation import PrometheusExporter, metrics
+from langgraphsemantic.store import FusekiStore
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+    email: str
+
+
+def span_cost(iterations: int = 200000) -> float:
+    """Time an empty span, returning nanoseconds per span."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.span("bench.empty"):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def run(store: FusekiStore, generator: ShapeGenerator, queries: int) -> float:
+    """Run the queries and shape generations, returning queries per second."""
+    start = time.perf_counter()
+    for i in range(queries):
+        store.query.execute_select(f"SELECT ?s WHERE {{ ?s ?p {i} }}")
+        generator.generate_shape(Person)
+    return queries / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+
+    exporter = PrometheusExporter()
+    with serve_in_subprocess(rows=args.rows) as base_url:
+        store = FusekiStore(base_url, "ds", query_cache_size=256)
+        generator = ShapeGenerator()
+        run(store, generator, 100)
+
+        for name, enabled in [("disabled", False), ("enabled", True)]:
+            if enabled:
+                metrics.enable([exporter])
+            ns = span_cost()
+            metrics.reset()
+            rate = run(store, generator, args.queries)
+            print(f"{name:9s} {ns:8.0f} ns/span  {rate:10.1f} queries/s")
+        store.connection.close()
+
+    metrics.export()
+    print()
+    print("\n".join(line for line in exporter.text.splitlines()
+                    if not line.startswith("#") and "_bucket" not in line))
+
+
+if __name__ == "__main__":
+    main()
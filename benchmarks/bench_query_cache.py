@@ -0,0 +1,73 @@
+"""
+Benchmark the SPARQL query result cache.
+
+Simulates agent turns against a local stub SPARQL server. Each turn loads
+memory with the same SELECT, runs a few retriever queries drawn from a
+small set of keywords, and writes one update to the memory graph. The
+update invalidates the memory query but not the retriever queries.
+Reports turns per second and the number of queries that reached the
+server, with and without the cache.
+
+Usage:
+    python benchmarks/bench_query_cache.py [--turns N]
+"""
+
+import argparse
+import random
+import time
+
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.store import FusekiStore
+from langgraphsemantic.transport import SessionTransport
+
+
+class CountingTransport(SessionTransport):
+    """A SessionTransport that counts the queries it sends."""
+
+    queries = 0
+
+    def query(self, endpoint, query, accept, stream=False):
+        self.queries += 1
+        return super().query(endpoint, query, accept, stream=stream)
+
+
+def run(store: FusekiStore, turns: int) -> float:
+    """Run the simulated turns, returning turns per second."""
+    memory_graph = f"{store.data_graph_uri}/memory"
+    documents_graph = f"{store.data_graph_uri}/documents"
+    memory_query = f"SELECT ?s ?p ?o WHERE {{ GRAPH <{memory_graph}> {{ ?s ?p ?o }} }} LIMIT 10"
+    keywords = ["fuseki", "shacl", "pydantic", "sparql", "graph", "agent", "memory", "shape"]
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    for turn in range(turns):
+        store.query.execute_select(memory_query)
+        for keyword in rng.sample(keywords, 3):
+            store.query.execute_select(
+                f'SELECT ?doc ?text WHERE {{ GRAPH <{documents_graph}> {{ ?doc ?p ?text }} '
+                f'FILTER(CONTAINS(LCASE(STR(?text)), "{keyword}")) }} LIMIT 5')
+        store.update.insert_ntriples(
+            f'<http://example.org/turn/{turn}> <http://example.org/text> "turn {turn}" .\n',
+            memory_graph)
+    return turns / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    with serve_in_subprocess(rows=10) as base_url:
+        for name, cache_size in [("no cache", 0), ("query cache", 256)]:
+            transport = CountingTransport()
+            store = FusekiStore(base_url, "ds", transport=transport,
+                                query_cache_size=cache_size)
+            rate = run(store, args.turns)
+            store.connection.close()
+            print(f"{name:14s} {rate:10.1f} turns/s  {transport.queries:6d} queries sent "
+                  f"of {args.turns * 4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark query load balancing over read replicas.
+
+Starts a primary and three replica stub servers: two fast and one slow.
+In a second scenario one of the fast replicas answers every request with
+503. Several threads run queries through a FusekiStore using each
+balancing strategy. Reports queries per second and how the queries were
+spread over the servers.
+
+Usage:
+    python benchmarks/bench_replicas.py [--queries N] [--threads N]
+"""
+
+import argparse
+import contextlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.store import FusekiStore
+
+
+def run(store: FusekiStore, queries: int, threads: int) -> float:
+    """Run the queries from several threads, returning queries per second."""
+    def query(i: int) -> None:
+        store.query.execute_select(f"SELECT ?s WHERE {{ ?s ?p {i} }}", use_cache=False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(query, range(queries)))
+    return queries / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    for scenario, fail_rate in [("healthy", 0.0), ("replica down", 1.0)]:
+        with contextlib.ExitStack() as stack:
+            primary = stack.enter_context(serve_in_subprocess(latency=0.005))
+            replicas = [stack.enter_context(serve_in_subprocess(latency=latency, fail_rate=rate))
+                        for latency, rate in [(0.005, fail_rate), (0.005, 0.0), (0.05, 0.0)]]
+
+            for name, options in [("primary only", {}),
+                                  ("least_outstanding", {"balancing": "least_outstanding"}),
+                                  ("latency", {"balancing": "latency"})]:
+                if options:
+                    options["read_urls"] = replicas
+                store = FusekiStore(primary, "ds", **options)
+                rate = run(store, args.queries, args.threads)
+                spread = [endpoint["requests"] for endpoint in store.replica_stats() or []]
+                store.connection.close()
+                print(f"{scenario:12s} {name:18s} {rate:8.1f} queries/s  "
+                      f"fast/fast/slow replica requests: {'/'.join(map(str, spread)) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
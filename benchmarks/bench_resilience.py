@@ -0,0 +1,77 @@
+"""
+Benchmark retries and circuit breaking against a faulty store.
+
+Runs queries against a local stub SPARQL server that answers a share of
+requests with 503, then simulates an outage in which every request fails.
+Reports how many queries succeeded and how many requests reached the
+server, with the plain transport and with a ResilientTransport. During
+the outage the circuit breaker should keep most requests off the server.
+
+Usage:
+    python benchmarks/bench_resilience.py [--queries N] [--fail-rate P]
+"""
+
+import argparse
+import time
+
+from stub_server import StubSPARQLServer
+
+from langgraphsemantic.resilience import CircuitBreaker, RetryPolicy
+from langgraphsemantic.store import FusekiStore
+
+
+def run(store: FusekiStore, queries: int) -> int:
+    """Run the queries, returning the number that succeeded."""
+    succeeded = 0
+    for i in range(queries):
+        try:
+            store.query.execute_select(f"SELECT ?s WHERE {{ ?s ?p {i} }}", use_cache=False)
+            succeeded += 1
+        except Exception:
+            pass
+    return succeeded
+
+
+def report(store: FusekiStore) -> None:
+    """Print the store's retry and breaker stats, if it has any, and close it."""
+    if store.resilience_stats():
+        print(f"{'':10s} {store.resilience_stats()}")
+    store.connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with StubSPARQLServer(rows=10) as server:
+        httpd = server.httpd
+        for name, options in [
+            ("plain", {}),
+            ("resilient", {"retry_policy": RetryPolicy(base_delay=0.001, max_delay=0.01, seed=0),
+                           "circuit_breaker": CircuitBreaker(failure_threshold=5,
+                                                             reset_timeout=0.05)}),
+        ]:
+            # A store per phase, so the outage starts with closed breakers
+            store = FusekiStore(server.base_url, "ds", **options)
+            httpd.fail_rate = args.fail_rate
+            before = httpd.faults + httpd.queries
+            succeeded = run(store, args.queries)
+            sent = httpd.faults + httpd.queries - before
+            print(f"{name:10s} {args.fail_rate:4.0%} faults: {succeeded:6d}/{args.queries} "
+                  f"succeeded, {sent:6d} requests sent")
+            report(store)
+
+            store = FusekiStore(server.base_url, "ds", **options)
+            httpd.fail_rate = 1.0
+            before = httpd.faults
+            start = time.perf_counter()
+            run(store, args.queries)
+            elapsed = time.perf_counter() - start
+            print(f"{name:10s}       outage: {httpd.faults - before:6d} requests sent "
+                  f"for {args.queries} queries in {elapsed:.2f}s")
+            report(store)
+
+if __name__ == "__main__":
+    main()
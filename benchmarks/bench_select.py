@@ -0,0 +1,71 @@
+"""
+Benchmark the SELECT result modes of QueryExecutor.
+
+Runs one large SELECT against a local stub SPARQL server with each result
+mode and reports time to the first row (for select_columns, to the
+finished columns), total time and peak Python memory.
+
+Usage:
+    python benchmarks/bench_select.py [--rows N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.store import FusekiStore
+
+
+QUERY = "SELECT ?s ?name ?value WHERE { ?s ?name ?value }"
+
+
+def measure(consume) -> str:
+    """Run a result consumer, returning a formatted timing and memory line."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = consume()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (f"first row {first * 1000:8.1f} ms   total {elapsed:6.2f} s   "
+            f"peak {peak / 2 ** 20:7.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    with serve_in_subprocess(rows=args.rows) as base_url:
+        store = FusekiStore(base_url, "ds")
+
+        def materialized():
+            start = time.perf_counter()
+            rows = store.query.execute_select(QUERY)
+            return time.perf_counter() - start if rows else 0.0
+
+        def streamed(raw):
+            def consume():
+                start = time.perf_counter()
+                first = None
+                for row in store.query.iter_select(QUERY, raw=raw):
+                    if first is None:
+                        first = time.perf_counter() - start
+                return first or 0.0
+            return consume
+
+        def columnar():
+            start = time.perf_counter()
+            result = store.query.select_columns(QUERY)
+            return time.perf_counter() - start if len(result) else 0.0
+
+        print(f"execute_select            {measure(materialized)}")
+        print(f"iter_select               {measure(streamed(False))}")
+        print(f"iter_select(raw=True)     {measure(streamed(True))}")
+        print(f"select_columns            {measure(columnar)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark SPARQLWrapper against the pooled SessionTransport.
+
+Runs a fixed number of SELECT queries and updates against a local stub
+SPARQL server and reports requests per second for each transport. The
+stub can add a fixed delay to every new connection to stand in for the
+TCP and TLS handshakes paid against a remote Fuseki.
+
+Usage:
+    python benchmarks/bench_transport.py [--requests N] [--connect-latency SECONDS]
+"""
+
+import argparse
+import time
+
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.store import FusekiStore
+from langgraphsemantic.transport import SessionTransport, SPARQLWrapperTransport
+
+
+def run(store: FusekiStore, requests: int) -> float:
+    """Run alternating queries and updates, returning requests per second."""
+    query = "SELECT ?s ?name ?value WHERE { ?s ?name ?value } LIMIT 10"
+    update = "INSERT DATA { <http://example.org/s> <http://example.org/p> 1 }"
+
+    start = time.perf_counter()
+    for i in range(requests):
+        if i % 2:
+            store.update.execute_update(update)
+        else:
+            store.query.execute_select(query)
+    elapsed = time.perf_counter() - start
+    store.connection.close()
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--connect-latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    for latency in sorted({0.0, args.connect_latency}):
+        print(f"connect latency {latency * 1000:.1f} ms")
+        with serve_in_subprocess(connect_latency=latency) as base_url:
+            transports = [
+                ("SPARQLWrapperTransport (before)", SPARQLWrapperTransport()),
+                ("SessionTransport (after)", SessionTransport()),
+            ]
+            for name, transport in transports:
+                store = FusekiStore(base_url, "ds", transport=transport)
+                rate = run(store, args.requests)
+                print(f"  {name:34s} {rate:10.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
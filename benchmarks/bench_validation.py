@@ -0,0 +1,72 @@
+"""
+Benchmark SHACL validation.
+
+Compares validating each instance as an rdflib Graph (serializing the
+instance and walking the graph) with ShapeValidator checking the
+instance's attributes directly, one instance at a time and as a batch
+checked column by column. All use the same compiled shape. A quarter of
+the instances violate a constraint.
+
+Usage:
+    python benchmarks/bench_validation.py [--instances N]
+"""
+
+import argparse
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from langgraphsemantic.core import ShapeGenerator
+from langgraphsemantic.serialization import InstanceSerializer
+from langgraphsemantic.validation import ShapeValidator
+
+
+class Person(BaseModel):
+    name: str = Field(..., min_length=1, max_length=40, regex=r"^[A-Z]")
+    age: int = Field(..., ge=0, lt=150)
+    score: float = Field(..., gt=0)
+    active: bool
+    email: Optional[str] = Field(None, regex=r"@")
+    tags: List[str] = []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--instances", type=int, default=20000)
+    args = parser.parse_args()
+
+    # construct() skips Pydantic validation, so invalid instances can be built
+    people = [
+        Person.construct(name=f"Person {i}", age=i % 90 if i % 4 else 200, score=i / 7 + 1,
+                         active=bool(i % 2), email=f"p{i}@example.org", tags=["a", "b"])
+        for i in range(args.instances)
+    ]
+
+    start = time.perf_counter()
+    validator = ShapeValidator(ShapeGenerator().generate_shape(Person))
+    compile_ms = (time.perf_counter() - start) * 1000
+    serializer = InstanceSerializer()
+
+    start = time.perf_counter()
+    graph_failures = sum(not validator.validate(serializer.to_graph(person))["conforms"]
+                         for person in people)
+    graph_rate = args.instances / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    direct_failures = sum(not validator.validate_instance(person)["conforms"]
+                          for person in people)
+    direct_rate = args.instances / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch_failures = int((~validator.validate_batch(people)["conforms"]).sum())
+    batch_rate = args.instances / (time.perf_counter() - start)
+
+    print(f"shape compilation             {compile_ms:10.2f} ms")
+    print(f"Graph per instance            {graph_rate:10.0f} instances/s  ({graph_failures} invalid)")
+    print(f"validate_instance             {direct_rate:10.0f} instances/s  ({direct_failures} invalid)")
+    print(f"validate_batch                {batch_rate:10.0f} instances/s  ({batch_failures} invalid)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark the write-behind update queue.
+
+Stores small inserts, one instance's worth of triples each, spread over
+a few named graphs of a local stub SPARQL server. Compares sending each
+insert as its own update with queueing them on the write-behind queue,
+which coalesces inserts for the same graph into one request. Reports
+inserts per second as seen by the caller, the time to flush, and the
+number of update requests sent.
+
+Usage:
+    python benchmarks/bench_write_behind.py [--inserts N]
+"""
+
+import argparse
+import time
+
+from stub_server import serve_in_subprocess
+
+from langgraphsemantic.store import FusekiStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--inserts", type=int, default=2000)
+    args = parser.parse_args()
+
+    inserts = [
+        (f'<http://example.org/Person_{i}> <http://example.org/name> "Person {i}" .\n'
+         f'<http://example.org/Person_{i}> <http://example.org/age> "{i % 90}"'
+         f'^^<http://www.w3.org/2001/XMLSchema#integer> .\n',
+         f"http://example.org/graph/{i % 4}")
+        for i in range(args.inserts)
+    ]
+
+    with serve_in_subprocess(rows=0) as base_url:
+        for name, size in [("synchronous", 0), ("write-behind", 5000)]:
+            store = FusekiStore(base_url, "ds", write_behind_size=size)
+            start = time.perf_counter()
+            for ntriples, graph_uri in inserts:
+                store.update.insert_ntriples(ntriples, graph_uri)
+            queued = time.perf_counter() - start
+            store.update.flush()
+            total = time.perf_counter() - start
+            requests = (store.update.write_behind.stats()["requests"]
+                        if store.update.write_behind else args.inserts)
+            store.connection.close()
+            print(f"{name:14s} {args.inserts / queued:10.0f} inserts/s  "
+                  f"{total * 1000:8.1f} ms to flush  {requests:6d} requests")
+
+
+if __name__ == "__main__":
+    main()
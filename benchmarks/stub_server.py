@@ -0,0 +1,245 @@
+"""
+A local stub SPARQL server for benchmarks.
+
+The server speaks just enough of the SPARQL 1.1 protocol to exercise the
+store layer: it answers queries on ``/<dataset>/query`` with canned results,
+accepts updates on ``/<dataset>/update`` and Graph Store Protocol uploads
+on ``/<dataset>/data``. It supports HTTP/1.1
+keep-alive so that pooled transports can reuse connections. Faults can be
+injected: a share of requests is answered with an error status instead,
+as an overloaded Fuseki would.
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+
+class StubSPARQLHandler(BaseHTTPRequestHandler):
+    """Request handler answering SPARQL protocol requests with canned data."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+        pass
+
+    def setup(self):
+        """Count the new connection and simulate its setup cost (TCP and TLS handshakes)."""
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def do_GET(self):
+        """Answer a query sent as a GET."""
+        self._answer()
+
+    def do_POST(self):
+        """Answer a query, update or data upload sent as a POST."""
+        self._answer(self._read_body())
+
+    def _read_body(self) -> bytes:
+        """Read the request body, decoding chunked transfer encoding."""
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        body = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if size == 0:
+                self.rfile.readline()
+                return b"".join(body)
+            body.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _answer(self, body: bytes = b""):
+        """Dispatch on the endpoint in the request path, or inject a fault."""
+        path = self.path.split("?", 1)[0]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_rate and self.server.random.random() < self.server.fail_rate:
+            self.server.faults += 1
+            self._send(self.server.fail_status, b"injected fault", "text/plain")
+        elif path.endswith("/data"):
+            self.server.triples_loaded += body.count(b"\n")
+            self._send(200, b"{}", "application/json")
+        elif path.endswith("/update"):
+            self.server.updates += 1
+            self._send(204, b"", "text/plain")
+        elif path.endswith("/query"):
+            self.server.queries += 1
+            accept = self.headers.get("Accept", "")
+            if "turtle" in accept:
+                self._send(200, self.server.turtle_body, "text/turtle")
+            elif "tab-separated-values" in accept:
+                self._send(200, self.server.tsv_body, "text/tab-separated-values")
+            else:
+                self._send(200, self.server.json_body, "application/sparql-results+json")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        """Write a complete response."""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class StubSPARQLServer:
+    """
+    A stub SPARQL server running in a background thread.
+
+    Use it as a context manager; ``base_url`` points at the server root,
+    suitable for passing to FusekiStore. Counters of connections, queries,
+    updates, loaded triples and injected faults are kept on ``httpd``.
+    """
+
+    def __init__(self, rows: int = 10, port: int = 0, connect_latency: float = 0.0,
+                 fail_rate: float = 0.0, fail_status: int = 503, seed: int = 0,
+                 latency: float = 0.0):
+        """
+        Initialize the StubSPARQLServer.
+
+        Args:
+            rows: The number of rows returned by every SELECT query
+            port: The port to listen on (0 picks a free port)
+            connect_latency: Seconds of simulated setup cost for each new connection
+            fail_rate: The share of requests answered with fail_status; it
+                can be changed on ``httpd`` while the server runs
+            fail_status: The status of injected faults
+            seed: Seed for choosing which requests fail
+            latency: Seconds of simulated work for each request
+        """
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), StubSPARQLHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.connect_latency = connect_latency
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.queries = 0
+        self.httpd.updates = 0
+        self.httpd.triples_loaded = 0
+        self.httpd.fail_rate = fail_rate
+        self.httpd.fail_status = fail_status
+        self.httpd.faults = 0
+        self.httpd.latency = latency
+        self.httpd.random = random.Random(seed)
+        self.httpd.json_body = self._json_body(rows)
+        self.httpd.tsv_body = self._tsv_body(rows)
+        self.httpd.turtle_body = b"<http://example.org/s> <http://example.org/p> \"o\" .\n"
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """The base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubSPARQLServer":
+        """Start serving in a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubSPARQLServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @staticmethod
+    def _json_body(rows: int) -> bytes:
+        """Build a SPARQL JSON result with the given number of rows."""
+        bindings = []
+        for i in range(rows):
+            bindings.append({
+                "s": {"type": "uri", "value": f"http://example.org/item/{i}"},
+                "name": {"type": "literal", "value": f"Item {i}"},
+                "value": {"type": "literal", "value": str(i),
+                          "datatype": "http://www.w3.org/2001/XMLSchema#integer"},
+            })
+        return json.dumps({
+            "head": {"vars": ["s", "name", "value"]},
+            "results": {"bindings": bindings},
+        }).encode("utf-8")
+
+    @staticmethod
+    def _tsv_body(rows: int) -> bytes:
+        """Build a SPARQL TSV result with the same rows as _json_body."""
+        lines = ["?s\t?name\t?value"]
+        for i in range(rows):
+            lines.append(f'<http://example.org/item/{i}>\t"Item {i}"\t{i}')
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@contextlib.contextmanager
+def serve_in_subprocess(rows: int = 10, connect_latency: float = 0.0,
+                        fail_rate: float = 0.0, latency: float = 0.0) -> Iterator[str]:
+    """
+    Run a stub server in a separate process.
+
+    Keeping the server out of the benchmark process stops it from competing
+    with the client for the GIL.
+
+    Args:
+        rows: The number of rows returned by every SELECT query
+        connect_latency: Seconds of simulated setup cost for each new connection
+        fail_rate: The share of requests answered with a 503
+        latency: Seconds of simulated work for each request
+
+    Yields:
+        The base URL of the server
+    """
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--rows", str(rows),
+         "--connect-latency", str(connect_latency), "--fail-rate", str(fail_rate),
+         "--latency", str(latency)],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a stub SPARQL server.")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--connect-latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubSPARQLServer(rows=args.rows, port=args.port,
+                              connect_latency=args.connect_latency,
+                              fail_rate=args.fail_rate, fail_status=args.fail_status,
+                              latency=args.latency)
+    print(server.base_url, flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
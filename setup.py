@@ -15,6 +15,11 @@ setup(
         "langchain>=0.0.267",
         "requests>=2.25.0",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "numpy": ["numpy>=1.20"],
+        "otel": ["opentelemetry-api>=1.0"],
+    },
     python_requires=">=3.8",
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,480 @@
+"""
+Asynchronous RDF store interface for Fuseki.
+
+This module provides asyncio counterparts of the classes in the store
+module, so that code running on an event loop (such as LangGraph agents)
+can talk to Fuseki without blocking the loop or hopping to worker threads.
+It requires the optional aiohttp dependency (pip install langgraphsemantic[async]).
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from rdflib import Graph, Literal, URIRef
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from langgraphsemantic.core import SCHEMA_FINGERPRINT
+from langgraphsemantic.serialization import nt_line
+from langgraphsemantic.store import QueryExecutor
+from langgraphsemantic.transport import (
+    MAX_GET_QUERY_LENGTH,
+    SPARQL_RESULTS_JSON,
+    SPARQL_UPDATE,
+    TURTLE_MEDIA_TYPE,
+)
+
+
+class AsyncStoreConnection:
+    """
+    Manages a pooled, non-blocking connection to an RDF store.
+
+    Requests share one aiohttp session with a bounded connection pool.
+    A semaphore caps the number of requests in flight; callers beyond the
+    limit wait on the event loop rather than opening more connections.
+    Cancelling the awaiting task aborts its request and frees its slot.
+    """
+
+    def __init__(self,
+                 endpoint_url: str,
+                 update_endpoint: Optional[str] = None,
+                 max_concurrency: int = 16,
+                 pool_maxsize: int = 16,
+                 connect_timeout: Optional[float] = 5.0,
+                 read_timeout: Optional[float] = 60.0,
+                 auth: Optional[Tuple[str, str]] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the AsyncStoreConnection.
+
+        Args:
+            endpoint_url: The URL of the SPARQL query endpoint
+            update_endpoint: The URL of the SPARQL update endpoint (if different)
+            max_concurrency: The maximum number of requests in flight at once
+            pool_maxsize: The maximum number of connections kept open per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait between bytes of the response
+            auth: Optional (username, password) for HTTP basic authentication
+            headers: Optional headers to send with every request
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncStoreConnection requires aiohttp; "
+                "install it with 'pip install langgraphsemantic[async]'"
+            )
+
+        self.endpoint_url = endpoint_url
+        self.update_endpoint = update_endpoint or endpoint_url
+        self.max_concurrency = max_concurrency
+        self.pool_maxsize = pool_maxsize
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout,
+                                             sock_read=read_timeout)
+        self.auth = aiohttp.BasicAuth(*auth) if auth else None
+        self.headers = headers or {}
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def query(self, query: str, accept: str = SPARQL_RESULTS_JSON) -> bytes:
+        """
+        Send a SPARQL query to the query endpoint.
+
+        Args:
+            query: The SPARQL query string
+            accept: The media type to request for the results
+
+        Returns:
+            The response body
+        """
+        headers = {"Accept": accept}
+        encoded = urlencode({"query": query})
+
+        if len(encoded) <= MAX_GET_QUERY_LENGTH:
+            return await self._request("GET", f"{self.endpoint_url}?{encoded}", headers)
+
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+        return await self._request("POST", self.endpoint_url, headers, encoded)
+
+    async def update(self, update: str) -> bytes:
+        """
+        Send a SPARQL update to the update endpoint.
+
+        Args:
+            update: The SPARQL UPDATE string
+
+        Returns:
+            The response body
+        """
+        headers = {"Content-Type": f"{SPARQL_UPDATE}; charset=utf-8"}
+        return await self._request("POST", self.update_endpoint, headers,
+                                   update.encode("utf-8"))
+
+    async def test_connection(self) -> bool:
+        """
+        Test the connection to the RDF store.
+
+        Returns:
+            True if the connection is successful, False otherwise
+        """
+        try:
+            results = json.loads(await self.query("ASK { ?s ?p ?o }"))
+            return results.get('boolean', False)
+        except Exception as e:
+            print(f"Connection test failed: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def __aenter__(self) -> "AsyncStoreConnection":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _request(self, method: str, url: str, headers: Dict[str, str],
+                       data: Any = None) -> bytes:
+        """
+        Send a request once a concurrency slot is free.
+
+        Args:
+            method: The HTTP method
+            url: The request URL
+            headers: The request headers
+            data: The request body, if any
+
+        Returns:
+            The response body
+        """
+        session = self._get_session()
+        async with self._semaphore:
+            async with session.request(method, url, headers=headers, data=data) as response:
+                response.raise_for_status()
+                return await response.read()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """
+        Get the client session, creating it on first use.
+
+        The session and semaphore are created lazily because they must be
+        bound to the running event loop.
+
+        Returns:
+            The client session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize,
+                                             limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=self.timeout,
+                                                  auth=self.auth,
+                                                  headers=self.headers)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+
+class AsyncQueryExecutor:
+    """
+    Executes SPARQL queries against RDF stores without blocking the event loop.
+
+    Results are converted exactly as QueryExecutor converts them.
+    """
+
+    def __init__(self, connection: AsyncStoreConnection):
+        """
+        Initialize the AsyncQueryExecutor.
+
+        Args:
+            connection: An AsyncStoreConnection instance
+        """
+        self.connection = connection
+
+    async def execute_select(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Execute a SPARQL SELECT query.
+
+        Args:
+            query: The SPARQL SELECT query string
+
+        Returns:
+            A list of dictionaries containing the query results
+        """
+        results = json.loads(await self.connection.query(query, SPARQL_RESULTS_JSON))
+
+        bindings = []
+        for binding in results["results"]["bindings"]:
+            result = {}
+            for var, value in binding.items():
+                result[var] = self._convert_binding_value(value)
+            bindings.append(result)
+
+        return bindings
+
+    async def execute_many(self, queries: Iterable[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Execute several SPARQL SELECT queries concurrently.
+
+        Concurrency is bounded by the connection's max_concurrency. If one
+        query fails, the others are cancelled and the error is raised.
+
+        Args:
+            queries: The SPARQL SELECT query strings
+
+        Returns:
+            The results of each query, in the same order as the queries
+        """
+        tasks = [asyncio.ensure_future(self.execute_select(query)) for query in queries]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def execute_ask(self, query: str) -> bool:
+        """
+        Execute a SPARQL ASK query.
+
+        Args:
+            query: The SPARQL ASK query string
+
+        Returns:
+            The boolean result of the ASK query
+        """
+        results = json.loads(await self.connection.query(query, SPARQL_RESULTS_JSON))
+        return results.get("boolean", False)
+
+    async def execute_construct(self, query: str) -> Graph:
+        """
+        Execute a SPARQL CONSTRUCT query.
+
+        Args:
+            query: The SPARQL CONSTRUCT query string
+
+        Returns:
+            An RDFLib Graph containing the constructed triples
+        """
+        body = await self.connection.query(query, TURTLE_MEDIA_TYPE)
+        graph = Graph()
+        graph.parse(data=body, format="turtle")
+        return graph
+
+    _convert_binding_value = QueryExecutor._convert_binding_value
+
+
+class AsyncUpdateExecutor:
+    """
+    Executes SPARQL updates against RDF stores without blocking the event loop.
+    """
+
+    def __init__(self, connection: AsyncStoreConnection):
+        """
+        Initialize the AsyncUpdateExecutor.
+
+        Args:
+            connection: An AsyncStoreConnection instance
+        """
+        self.connection = connection
+
+    async def execute_update(self, update: str) -> bool:
+        """
+        Execute a SPARQL UPDATE operation.
+
+        Cancellation is not treated as a failure: it propagates to the caller.
+
+        Args:
+            update: The SPARQL UPDATE string
+
+        Returns:
+            True if the update was successful, False otherwise
+        """
+        try:
+            await self.connection.update(update)
+            return True
+        except Exception as e:
+            print(f"Update failed: {e}")
+            return False
+
+    async def insert_graph(self, graph: Graph, graph_uri: Optional[str] = None) -> bool:
+        """
+        Insert an RDFLib Graph into the store.
+
+        Args:
+            graph: The RDFLib Graph to insert
+            graph_uri: Optional URI for the named graph
+
+        Returns:
+            True if the insertion was successful, False otherwise
+        """
+        # N-Triples rather than Turtle: @prefix lines are not valid inside INSERT DATA
+        triples = "".join(nt_line(s, p, o) for s, p, o in graph)
+
+        if graph_uri:
+            update = f"INSERT DATA {{ GRAPH <{graph_uri}> {{ {triples} }} }}"
+        else:
+            update = f"INSERT DATA {{ {triples} }}"
+
+        return await self.execute_update(update)
+
+    async def delete_graph(self, graph_uri: str) -> bool:
+        """
+        Delete a named graph from the store.
+
+        Args:
+            graph_uri: The URI of the graph to delete
+
+        Returns:
+            True if the deletion was successful, False otherwise
+        """
+        return await self.execute_update(f"DROP GRAPH <{graph_uri}>")
+
+
+class AsyncFusekiStore:
+    """
+    Asynchronous interface for working with Apache Jena Fuseki.
+
+    This class mirrors FusekiStore, with coroutine methods. Many tasks can
+    share one instance; its connection limits how many requests reach
+    Fuseki at the same time.
+    """
+
+    def __init__(self, base_url: str, dataset: str, max_concurrency: int = 16,
+                 **connection_options: Any):
+        """
+        Initialize the AsyncFusekiStore.
+
+        Args:
+            base_url: The base URL of the Fuseki server
+            dataset: The name of the dataset to use
+            max_concurrency: The maximum number of requests in flight at once
+            **connection_options: Further options for AsyncStoreConnection,
+                such as pool_maxsize, connect_timeout and read_timeout
+        """
+        self.base_url = base_url
+        self.dataset = dataset
+
+        query_endpoint = f"{base_url}/{dataset}/query"
+        update_endpoint = f"{base_url}/{dataset}/update"
+
+        self.connection = AsyncStoreConnection(query_endpoint, update_endpoint,
+                                               max_concurrency=max_concurrency,
+                                               **connection_options)
+        self.query = AsyncQueryExecutor(self.connection)
+        self.update = AsyncUpdateExecutor(self.connection)
+
+        # Define graph URIs for organizing data
+        self.shapes_graph_uri = f"{base_url}/{dataset}/shapes"
+        self.data_graph_uri = f"{base_url}/{dataset}/data"
+
+    async def store_shape(self, shape_graph: Graph, shape_name: str,
+                          fingerprint: Optional[str] = None) -> bool:
+        """
+        Store a SHACL shape in the shapes graph, replacing any previous one.
+
+        Args:
+            shape_graph: The RDFLib Graph containing the SHACL shape
+            shape_name: A name for the shape
+            fingerprint: The schema fingerprint the shape was generated from
+
+        Returns:
+            True if the shape was stored successfully, False otherwise
+        """
+        shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
+
+        ntriples = "".join(nt_line(s, p, o) for s, p, o in shape_graph)
+        if fingerprint:
+            ntriples += nt_line(URIRef(shape_uri), SCHEMA_FINGERPRINT, Literal(fingerprint))
+
+        update = (f"DROP SILENT GRAPH <{shape_uri}> ;\n"
+                  f"INSERT DATA {{ GRAPH <{shape_uri}> {{ {ntriples} }} }}")
+        return await self.update.execute_update(update)
+
+    async def get_shape_fingerprint(self, shape_name: str) -> Optional[str]:
+        """
+        Get the schema fingerprint of a stored SHACL shape.
+
+        Args:
+            shape_name: The name of the shape
+
+        Returns:
+            The fingerprint, or None if the shape is not stored or was
+            stored without one
+        """
+        shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
+
+        query = f"""
+        SELECT ?fingerprint
+        WHERE {{
+            GRAPH <{shape_uri}> {{
+                <{shape_uri}> <{SCHEMA_FINGERPRINT}> ?fingerprint
+            }}
+        }}
+        LIMIT 1
+        """
+
+        try:
+            results = await self.query.execute_select(query)
+        except Exception as e:
+            print(f"Failed to retrieve shape fingerprint: {e}")
+            return None
+
+        fingerprint = results[0].get("fingerprint") if results else None
+        return str(fingerprint) if fingerprint is not None else None
+
+    async def get_shape(self, shape_name: str) -> Optional[Graph]:
+        """
+        Retrieve a SHACL shape from the shapes graph.
+
+        Args:
+            shape_name: The name of the shape to retrieve
+
+        Returns:
+            An RDFLib Graph containing the shape, or None if not found
+        """
+        shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
+
+        query = f"""
+        CONSTRUCT {{ ?s ?p ?o }}
+        WHERE {{
+            GRAPH <{shape_uri}> {{
+                ?s ?p ?o
+            }}
+        }}
+        """
+
+        try:
+            return await self.query.execute_construct(query)
+        except Exception as e:
+            print(f"Failed to retrieve shape: {e}")
+            return None
+
+    async def store_instance_data(self, data_graph: Graph, model_name: str) -> bool:
+        """
+        Store instance data in the data graph.
+
+        Args:
+            data_graph: The RDFLib Graph containing the instance data
+            model_name: The name of the model the data conforms to
+
+        Returns:
+            True if the data was stored successfully, False otherwise
+        """
+        data_uri = f"{self.data_graph_uri}/{model_name}"
+        return await self.update.insert_graph(data_graph, data_uri)
+
+    async def close(self) -> None:
+        """Close the connection to the store."""
+        await self.connection.close()
+
+    async def __aenter__(self) -> "AsyncFusekiStore":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
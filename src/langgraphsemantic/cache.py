@@ -0,0 +1,372 @@
+"""
+In-memory caching for store clients.
+
+This module provides a thread-safe LRU cache with an optional time to
+live, used for the client-side caches in front of the RDF store, and a
+SPARQL result cache whose entries are invalidated by writes to the
+graphs their queries read.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+from langgraphsemantic.instrumentation import metrics
+
+
+# Tokens of SPARQL text that normalization must keep intact or drop
+_SPARQL_TOKEN_RE = re.compile(
+    r'("""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|<[^<>"{}|^`\\\s]*>'
+    r"|(?:\s|#[^\n]*)+)"
+)
+
+# Keywords followed by the graph an operation reads or writes
+_GRAPH_KEYWORD_RE = re.compile(
+    r"(?<![\w:?$])(?:GRAPH|FROM(?:\s+NAMED)?|WITH|INTO|USING(?:\s+NAMED)?|TO)\s+(<[^>]*>|DEFAULT\b|\S+)",
+    re.IGNORECASE,
+)
+
+# Operations on all named graphs at once
+_ALL_GRAPHS_RE = re.compile(r"\b(?:DROP|CLEAR)\s+(?:SILENT\s+)?(?:ALL|NAMED)\b", re.IGNORECASE)
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache with an optional time to live.
+
+    Entries older than the time to live are reported as expired rather
+    than dropped straight away, so callers can revalidate them cheaply
+    instead of fetching them again. Hits, misses, expirations and
+    evictions are counted.
+    """
+
+    def __init__(self, max_size: int = 128, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, name: Optional[str] = None):
+        """
+        Initialize the LRUCache.
+
+        Args:
+            max_size: The maximum number of entries
+            ttl: Seconds an entry stays fresh, or None for no expiry
+            clock: The time source
+            name: If given, hits and misses are also counted by the library
+                instrumentation, as "<name>.hits" and "<name>.misses"
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """The number of entries, fresh or expired."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether an entry, fresh or expired, exists for a key."""
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a fresh entry.
+
+        Args:
+            key: The key to look up
+            default: The value to return if there is no fresh entry
+
+        Returns:
+            The cached value, or default
+        """
+        entry = self.get_entry(key)
+        if entry is None or entry[1]:
+            return default
+        return entry[0]
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, bool]]:
+        """
+        Get an entry, even if it has expired.
+
+        Args:
+            key: The key to look up
+
+        Returns:
+            A tuple of (value, expired), or None if there is no entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                expired = self.ttl is not None and self.clock() - entry[1] >= self.ttl
+                if expired:
+                    self.expirations += 1
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        if self.name is not None and metrics.enabled:
+            hit = entry is not None and not expired
+            metrics.count(f"{self.name}.hits" if hit else f"{self.name}.misses")
+        return (entry[0], expired) if entry is not None else None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Add or replace an entry, evicting the least recently used if full.
+
+        Args:
+            key: The key to store the value under
+            value: The value to cache
+        """
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def touch(self, key: Hashable) -> None:
+        """
+        Mark an entry as fresh again, e.g. after revalidating it.
+
+        Args:
+            key: The key of the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], self.clock())
+
+    def pop(self, key: Hashable) -> Any:
+        """
+        Remove an entry.
+
+        Args:
+            key: The key of the entry
+
+        Returns:
+            The removed value, or None if there was no entry
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def remove_if(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Remove every entry a predicate selects.
+
+        Args:
+            predicate: Called with each key and value; entries it returns
+                True for are removed
+
+        Returns:
+            The number of entries removed
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            A dictionary with the size, hits, misses, expirations,
+            evictions and hit rate of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _normalize_token(match: "re.Match") -> str:
+    """Collapse whitespace and drop comments; keep strings and IRIs as written."""
+    token = match.group(1)
+    if token[0] == "#" or token[0].isspace():
+        return " "
+    return token
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize SPARQL text for use as a cache key.
+
+    Runs of whitespace are collapsed and comments removed, outside of
+    string literals and IRIs. Case is kept, as variable names and
+    literals are case-sensitive.
+
+    Args:
+        query: The SPARQL text
+
+    Returns:
+        The normalized text
+    """
+    return _SPARQL_TOKEN_RE.sub(_normalize_token, query).strip()
+
+
+def _strip_strings(text: str) -> str:
+    """Replace string literals and comments with spaces, keeping IRIs."""
+    def replace(match: "re.Match") -> str:
+        token = match.group(1)
+        return token if token[0] == "<" else " "
+    return _SPARQL_TOKEN_RE.sub(replace, text)
+
+
+def referenced_graphs(text: str) -> Optional[FrozenSet[str]]:
+    """
+    Find the named graphs a SPARQL query or update refers to.
+
+    Graphs named in GRAPH, FROM, FROM NAMED, WITH, INTO, USING and TO
+    clauses are collected. The default graph is not listed.
+
+    Args:
+        text: The SPARQL query or update
+
+    Returns:
+        The graph IRIs, or None if the graphs cannot be determined, e.g.
+        for GRAPH ?g, prefixed graph names or DROP ALL
+    """
+    text = _strip_strings(text)
+    if _ALL_GRAPHS_RE.search(text):
+        return None
+
+    graphs = set()
+    for match in _GRAPH_KEYWORD_RE.finditer(text):
+        target = match.group(1)
+        if target[0] == "<":
+            graphs.add(target[1:-1])
+        elif target.upper() != "DEFAULT":
+            return None
+    return frozenset(graphs)
+
+
+class QueryCache:
+    """
+    Caches SPARQL query results, scoped to the graphs each query reads.
+
+    Entries are keyed by normalized query text and evicted by LRU and
+    time to live. A write to a named graph invalidates the entries whose
+    queries name that graph, as well as entries whose graphs are unknown
+    (queries that name no graph, or use GRAPH ?g). A write to the default
+    graph, or to unknown graphs, invalidates everything.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: Optional[float] = 60.0):
+        """
+        Initialize the QueryCache.
+
+        Args:
+            max_size: The maximum number of cached results
+            ttl: Seconds a result stays valid, or None for no expiry
+        """
+        self.entries = LRUCache(max_size, ttl, name="query_cache")
+        self.invalidations = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """A counter bumped by every invalidation."""
+        return self._generation
+
+    def key(self, kind: str, query: str) -> Tuple[str, str]:
+        """
+        Build the cache key for a query.
+
+        Args:
+            kind: The kind of result, such as "select" or "ask"
+            query: The SPARQL query
+
+        Returns:
+            The cache key
+        """
+        return kind, normalize_query(query)
+
+    def get(self, key: Tuple[str, str]) -> Any:
+        """
+        Get a cached result.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The result, or None if it is not cached
+        """
+        entry = self.entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key: Tuple[str, str], result: Any, generation: int) -> None:
+        """
+        Cache a result, unless the store was written to since the query was sent.
+
+        Args:
+            key: The cache key
+            result: The query result
+            generation: The generation read before the query was sent
+        """
+        graphs = referenced_graphs(key[1])
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.entries.put(key, (result, graphs or None))
+
+    def invalidate(self, graphs: Optional[Iterable[str]]) -> int:
+        """
+        Invalidate the results a write may have changed.
+
+        Args:
+            graphs: The named graphs written to; an empty collection for
+                the default graph, or None if unknown
+
+        Returns:
+            The number of entries removed
+        """
+        written = frozenset(graphs) if graphs is not None else None
+        with self._lock:
+            self._generation += 1
+            if not written:
+                removed = len(self.entries)
+                self.entries.clear()
+            else:
+                removed = self.entries.remove_if(
+                    lambda key, entry: entry[1] is None or not entry[1].isdisjoint(written))
+        self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove all cached results."""
+        self.invalidate(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            The LRUCache counters, plus the number of invalidated entries
+        """
+        stats = self.entries.stats()
+        stats["invalidations"] = self.invalidations
+        return stats
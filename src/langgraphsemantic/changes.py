@@ -0,0 +1,267 @@
+"""
+Change tracking for local indexes over store data.
+
+This module describes changes to the store's graphs as Change records,
+produced by UpdateExecutor.insert_graph and delete_graph or by polling a
+modification timestamp predicate, and applies them to an index in a
+background thread with IndexUpdater.
+"""
+
+import queue
+import threading
+from typing import Callable, FrozenSet, Iterable, List, Optional, Set
+
+from rdflib import Literal
+from rdflib.namespace import DCTERMS
+
+
+class Change:
+    """
+    A change to a graph in the store.
+
+    A change names the subjects whose triples were written, so an index
+    only needs to look at those again, or reports that the whole graph
+    was dropped.
+    """
+
+    def __init__(self, graph_uri: Optional[str], subjects: Iterable[str] = (),
+                 dropped: bool = False):
+        """
+        Initialize the Change.
+
+        Args:
+            graph_uri: The named graph that changed, or None for the default graph
+            subjects: The IRIs of the subjects whose triples changed
+            dropped: Whether the whole graph was dropped
+        """
+        self.graph_uri = graph_uri
+        self.subjects: FrozenSet[str] = frozenset(subjects)
+        self.dropped = dropped
+
+    def __repr__(self) -> str:
+        """Summarize the change."""
+        if self.dropped:
+            return f"Change({self.graph_uri!r}, dropped=True)"
+        return f"Change({self.graph_uri!r}, {len(self.subjects)} subjects)"
+
+
+def coalesce(changes: Iterable[Change]) -> tuple:
+    """
+    Merge a sequence of changes to one graph.
+
+    Args:
+        changes: The changes, oldest first
+
+    Returns:
+        A tuple of (dropped, subjects): whether the graph was dropped at
+        some point, and the subjects changed after the last drop
+    """
+    dropped = False
+    subjects: Set[str] = set()
+    for change in changes:
+        if change.dropped:
+            dropped = True
+            subjects = set()
+        else:
+            subjects |= change.subjects
+    return dropped, subjects
+
+
+class IndexUpdater:
+    """
+    Applies changes to an index in a background thread.
+
+    Changes are queued by submit, which returns at once, so it can be
+    registered as a change listener. The thread takes every change queued
+    so far and applies them in one call, so a burst of writes is applied
+    as one batch.
+    """
+
+    def __init__(self, apply: Callable[[List[Change]], None], max_batch: int = 1000):
+        """
+        Initialize the IndexUpdater.
+
+        Args:
+            apply: Called in the background thread with a batch of changes
+            max_batch: The maximum number of changes applied at once
+        """
+        self.apply = apply
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Change]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, change: Change) -> None:
+        """
+        Queue a change, starting the background thread if needed.
+
+        Args:
+            change: The change to apply
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="IndexUpdater",
+                                                    daemon=True)
+                    self._thread.start()
+        self._queue.put(change)
+
+    def flush(self) -> None:
+        """Wait until every queued change has been applied."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Apply the queued changes and stop the background thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self) -> None:
+        """Apply batches of queued changes until closed."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            changes = [change for change in batch if change is not None]
+            try:
+                if changes:
+                    self.apply(changes)
+            except Exception as e:
+                print(f"Failed to apply changes: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(changes) < len(batch):
+                return
+
+
+class ModificationPoller:
+    """
+    Reports changes by polling a modification timestamp in a graph.
+
+    Writers that do not go through insert_graph and delete_graph can
+    still be followed if they stamp each subject they change, e.g. with
+    dcterms:modified. Every interval seconds the poller asks for the
+    subjects stamped since the last poll and reports them as one Change.
+    Deleted subjects are only noticed if they are stamped as well.
+    """
+
+    def __init__(self, store, graph_uri: str, listener: Callable[[Change], None],
+                 predicate: str = str(DCTERMS.modified), interval: float = 5.0,
+                 page_size: int = 1000):
+        """
+        Initialize the ModificationPoller.
+
+        Args:
+            store: The FusekiStore to poll
+            graph_uri: The named graph to poll
+            listener: Called with each Change found
+            predicate: The IRI of the modification timestamp predicate
+            interval: Seconds between polls
+            page_size: The maximum number of subjects fetched per query
+        """
+        self.store = store
+        self.graph_uri = graph_uri
+        self.listener = listener
+        self.predicate = predicate
+        self.interval = interval
+        self.page_size = page_size
+        self.watermark: Optional[Literal] = None
+        self._at_watermark: Set[str] = set()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start polling in a background thread, from the current state of the graph."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        query = f"""
+        SELECT (MAX(?stamp) AS ?latest)
+        WHERE {{ GRAPH <{self.graph_uri}> {{ ?subject <{self.predicate}> ?stamp }} }}
+        """
+        results = self.store.query.execute_select(query, use_cache=False)
+        self.watermark = results[0].get("latest") if results else None
+        self._thread = threading.Thread(target=self._run, name="ModificationPoller",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> Optional[Change]:
+        """
+        Look for subjects stamped since the last poll.
+
+        Subjects stamped exactly at the last timestamp seen are asked for
+        again, since a writer may have stamped more of them since, but are
+        only reported once. Later pages continue after the (timestamp,
+        subject) pair that ended the previous page, so any number of
+        subjects sharing a timestamp are paged through. The change is
+        passed to the listener.
+
+        Returns:
+            The change, or None if nothing changed
+        """
+        subjects: Set[str] = set()
+        after = None
+        while True:
+            since = f"FILTER(?stamp >= {self.watermark.n3()})" if self.watermark is not None else ""
+            having = ""
+            if after is not None:
+                stamp, subject = after[0].n3(), Literal(after[1]).n3()
+                having = (f"HAVING (MAX(?stamp) > {stamp} || "
+                          f"(MAX(?stamp) = {stamp} && STR(?subject) > {subject}))")
+            query = f"""
+            SELECT ?subject (MAX(?stamp) AS ?modified)
+            WHERE {{
+                GRAPH <{self.graph_uri}> {{ ?subject <{self.predicate}> ?stamp }}
+                {since}
+            }}
+            GROUP BY ?subject
+            {having}
+            ORDER BY ?modified STR(?subject)
+            LIMIT {self.page_size}
+            """
+            results = self.store.query.execute_select(query, use_cache=False)
+            for result in results:
+                subject = str(result["subject"])
+                modified = result.get("modified")
+                if modified is None:
+                    continue
+                after = (modified, subject)
+                if self.watermark is not None and modified == self.watermark:
+                    if subject in self._at_watermark:
+                        continue
+                else:
+                    self.watermark = modified
+                    self._at_watermark = set()
+                self._at_watermark.add(subject)
+                subjects.add(subject)
+            if len(results) < self.page_size or after is None:
+                break
+
+        if not subjects:
+            return None
+        change = Change(self.graph_uri, subjects)
+        self.listener(change)
+        return change
+
+    def _run(self) -> None:
+        """Poll every interval seconds until stopped."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Failed to poll for changes: {e}")
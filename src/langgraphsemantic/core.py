@@ -6,7 +6,15 @@ and generating equivalent SHACL shapes for RDF validation.
 """
 
 from typing import Any, Dict, List, Optional, Set, Type, Union
+import datetime
+import decimal
+import hashlib
 import inspect
+import json
+import os
+import threading
+import uuid
+import weakref
 import rdflib
 from rdflib import Graph, Namespace, URIRef, Literal, BNode
 from rdflib.namespace import RDF, RDFS, XSD, SH
@@ -14,6 +22,15 @@ import pydantic
 from pydantic import BaseModel, Field, validator
 from pydantic.fields import ModelField
 
+from langgraphsemantic.instrumentation import metrics
+
+
+# Bump when ShapeGenerator output changes, so cached shapes are regenerated
+SHAPE_FORMAT_VERSION = "3"
+
+# Predicate linking a stored shape graph to the schema fingerprint it was built from
+SCHEMA_FINGERPRINT = URIRef("urn:langgraphsemantic:schemaFingerprint")
+
 
 class ModelIntrospector:
     """
@@ -81,7 +98,8 @@ class ModelIntrospector:
             constraints["max_length"] = field.field_info.max_length
             
         if field.field_info.regex is not None:
-            constraints["pattern"] = field.field_info.regex.pattern
+            regex = field.field_info.regex
+            constraints["pattern"] = regex if isinstance(regex, str) else regex.pattern
             
         if field.field_info.gt is not None:
             constraints["gt"] = field.field_info.gt
@@ -133,23 +151,80 @@ class TypeMapper:
     Maps Python/Pydantic types to RDF/SHACL equivalents.
     
     This class provides functionality to convert Python type annotations
-    to appropriate RDF datatypes and SHACL constraints.
+    to appropriate RDF datatypes and SHACL constraints. Resolved types are
+    cached, so generic aliases such as Optional[List[int]] are only
+    walked once. Further types can be added with register().
     """
     
-    def __init__(self):
-        """Initialize the TypeMapper."""
+    def __init__(self, max_cache_size: int = 1024):
+        """
+        Initialize the TypeMapper.
+        
+        Args:
+            max_cache_size: The maximum number of resolved types to cache
+        """
         self.type_map = {
             str: XSD.string,
             int: XSD.integer,
-            float: XSD.decimal,
+            float: XSD.double,
             bool: XSD.boolean,
-            # Add more type mappings as needed
+            datetime.datetime: XSD.dateTime,
+            datetime.date: XSD.date,
+            datetime.time: XSD.time,
+            datetime.timedelta: XSD.dayTimeDuration,
+            decimal.Decimal: XSD.decimal,
+            uuid.UUID: XSD.string,
         }
+        self.max_cache_size = max_cache_size
+        # Bumped on every registration, so dependents can tell the mapping changed
+        self.version = 0
+        self._cache: Dict[Any, Optional[URIRef]] = {}
+        
+    def register(self, python_type: Type, datatype: URIRef) -> None:
+        """
+        Map a Python type, and its subclasses, to an RDF datatype.
+        
+        Args:
+            python_type: The Python type to map
+            datatype: The RDF datatype URI to map it to
+        """
+        self.type_map[python_type] = datatype
+        self._cache = {}
+        self.version += 1
         
     def map_type(self, python_type: Type) -> Optional[URIRef]:
         """
         Map a Python type to an RDF datatype.
         
+        Args:
+            python_type: The Python type to map
+            
+        Returns:
+            The corresponding RDF datatype URI or None if no mapping exists
+        """
+        try:
+            return self._cache[python_type]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable annotation, e.g. Annotated with unhashable metadata
+            return self._resolve(python_type)
+        
+        datatype = self._resolve(python_type)
+        
+        cache = self._cache
+        if len(cache) >= self.max_cache_size:
+            try:
+                del cache[next(iter(cache))]
+            except (KeyError, StopIteration, RuntimeError):
+                pass
+        cache[python_type] = datatype
+        return datatype
+    
+    def _resolve(self, python_type: Type) -> Optional[URIRef]:
+        """
+        Resolve a Python type to an RDF datatype without the cache.
+        
         Args:
             python_type: The Python type to map
             
@@ -176,39 +251,246 @@ class TypeMapper:
                 # Return the type of list items
                 return self.map_type(args[0])
         
-        # Handle custom Pydantic models
-        if inspect.isclass(python_type) and issubclass(python_type, BaseModel):
-            # For custom models, we'll return None and handle them separately
-            return None
+        if inspect.isclass(python_type):
+            # Handle custom Pydantic models
+            if issubclass(python_type, BaseModel):
+                # For custom models, we'll return None and handle them separately
+                return None
+            
+            # Subclasses of mapped types, such as constr/conint and str enums
+            for base in python_type.__mro__[1:]:
+                if base in self.type_map:
+                    return self.type_map[base]
             
         # Default to string if no mapping is found
         return XSD.string
 
 
+class ShapeCache:
+    """
+    Caches generated SHACL shapes by model class and schema fingerprint.
+    
+    Shapes are kept in memory for the lifetime of their model class. If a
+    cache directory is given, shapes are also written there as N-Triples
+    files named after the model and fingerprint, so that a restarted
+    process can skip shape generation. The cache also remembers which
+    fingerprint was last uploaded for each stored shape graph, so that
+    registering an unchanged model only has to check that the shape graph
+    still exists.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize the ShapeCache.
+        
+        Args:
+            cache_dir: Optional directory for the on-disk cache layer
+        """
+        self.cache_dir = cache_dir
+        self._shapes = weakref.WeakKeyDictionary()
+        self._stored: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def get(self, model_class: Type[BaseModel], fingerprint: str) -> Optional[Graph]:
+        """
+        Get a cached shape.
+        
+        Args:
+            model_class: The Pydantic model class
+            fingerprint: The model's current schema fingerprint
+            
+        Returns:
+            The cached shape graph, or None if there is no shape for this
+            fingerprint. The graph is shared and must not be modified.
+        """
+        entry = self._shapes.get(model_class)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        
+        path = self._shape_path(model_class, fingerprint)
+        if path and os.path.exists(path):
+            graph = Graph()
+            graph.parse(path, format="nt")
+            self._shapes[model_class] = (fingerprint, graph)
+            return graph
+        
+        return None
+    
+    def put(self, model_class: Type[BaseModel], fingerprint: str, graph: Graph) -> None:
+        """
+        Add a shape to the cache.
+        
+        Args:
+            model_class: The Pydantic model class
+            fingerprint: The schema fingerprint the shape was generated from
+            graph: The shape graph
+        """
+        self._shapes[model_class] = (fingerprint, graph)
+        
+        path = self._shape_path(model_class, fingerprint)
+        if path:
+            self._write_atomically(path, graph.serialize(format="nt"))
+    
+    def get_stored_fingerprint(self, shape_uri: str) -> Optional[str]:
+        """
+        Get the fingerprint last uploaded to a shape graph.
+        
+        Args:
+            shape_uri: The URI of the shape's named graph
+            
+        Returns:
+            The fingerprint, or None if no upload has been recorded
+        """
+        return self._load_stored().get(shape_uri)
+    
+    def set_stored_fingerprint(self, shape_uri: str, fingerprint: str) -> None:
+        """
+        Record the fingerprint uploaded to a shape graph.
+        
+        Args:
+            shape_uri: The URI of the shape's named graph
+            fingerprint: The fingerprint of the uploaded shape
+        """
+        with self._lock:
+            stored = self._load_stored()
+            stored[shape_uri] = fingerprint
+            if self.cache_dir:
+                self._write_atomically(os.path.join(self.cache_dir, "stored-shapes.json"),
+                                       json.dumps(stored, indent=2, sort_keys=True))
+    
+    def clear(self) -> None:
+        """Forget all cached shapes and recorded uploads, in memory and on disk."""
+        with self._lock:
+            self._shapes = weakref.WeakKeyDictionary()
+            self._stored = {}
+            if self.cache_dir:
+                for name in os.listdir(self.cache_dir):
+                    if name.endswith(".nt") or name == "stored-shapes.json":
+                        os.remove(os.path.join(self.cache_dir, name))
+    
+    def _load_stored(self) -> Dict[str, str]:
+        """Load the recorded uploads, reading them from disk on first use."""
+        if self._stored is None:
+            stored = {}
+            if self.cache_dir:
+                path = os.path.join(self.cache_dir, "stored-shapes.json")
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        stored = json.load(f)
+            self._stored = stored
+        return self._stored
+    
+    def _shape_path(self, model_class: Type[BaseModel], fingerprint: str) -> Optional[str]:
+        """Get the on-disk path for a shape, or None without a cache directory."""
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{model_class.__name__}-{fingerprint}.nt")
+    
+    @staticmethod
+    def _write_atomically(path: str, content: str) -> None:
+        """Write a file so that readers never see a partial file."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
 class ShapeGenerator:
     """
     Produces complete SHACL shapes from Pydantic models.
     
     This class generates RDF graphs containing SHACL shapes based on
-    the structure and validation rules of Pydantic models.
+    the structure and validation rules of Pydantic models. Generated
+    shapes are cached by model class and schema fingerprint.
     """
     
-    def __init__(self, base_namespace: str = "http://example.org/"):
+    def __init__(self, base_namespace: str = "http://example.org/",
+                 cache: Optional[ShapeCache] = None,
+                 type_mapper: Optional[TypeMapper] = None):
         """
         Initialize the ShapeGenerator.
         
         Args:
             base_namespace: The base URI namespace for generated shapes
+            cache: The shape cache to use (defaults to a new in-memory cache)
+            type_mapper: The type mapper to use (defaults to a new TypeMapper)
         """
         self.base_namespace = base_namespace
         self.ns = Namespace(base_namespace)
         self.introspector = ModelIntrospector(base_namespace)
-        self.type_mapper = TypeMapper()
+        self.type_mapper = type_mapper if type_mapper is not None else TypeMapper()
+        self.cache = cache if cache is not None else ShapeCache()
+        self._fingerprints = weakref.WeakKeyDictionary()
+        
+    def schema_fingerprint(self, model_class: Type[BaseModel]) -> str:
+        """
+        Compute a fingerprint of everything a model's shape is built from.
+        
+        The fingerprint covers the namespace, model name and docstring and
+        each field's name, type, datatype, cardinality, description and
+        constraints. It is computed once per model class.
+        
+        Args:
+            model_class: The Pydantic model class
+            
+        Returns:
+            A hex digest identifying the model's schema
+        """
+        # Memoized per class and type mapping, as registering a type can change the shape
+        entry = self._fingerprints.get(model_class)
+        if entry is not None and entry[0] == self.type_mapper.version:
+            return entry[1]
+        
+        model_info = self.introspector.introspect_model(model_class)
+        parts = [SHAPE_FORMAT_VERSION, self.base_namespace, model_info["name"],
+                 model_info["doc"] or ""]
+        for field_name, field_info in model_info["fields"].items():
+            parts.append(repr((
+                field_name,
+                repr(field_info["type"]),
+                str(self.type_mapper.map_type(field_info["type"])),
+                field_info["required"],
+                field_info["description"],
+                sorted(field_info["constraints"].items()),
+            )))
+        
+        fingerprint = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        self._fingerprints[model_class] = (self.type_mapper.version, fingerprint)
+        return fingerprint
         
     def generate_shape(self, model_class: Type[BaseModel]) -> Graph:
         """
         Generate a SHACL shape from a Pydantic model.
         
+        The shape is taken from the cache when the model's schema has not
+        changed since it was last generated. Cached graphs are shared, so
+        callers must not modify the returned graph.
+        
+        Args:
+            model_class: The Pydantic model class to convert
+            
+        Returns:
+            An RDF graph containing the SHACL shape
+        """
+        with metrics.span("shape.generate", model=model_class.__name__) as span:
+            fingerprint = self.schema_fingerprint(model_class)
+            graph = self.cache.get(model_class, fingerprint)
+            if metrics.enabled:
+                span.set_attribute("cached", graph is not None)
+                metrics.count("shape_generator_cache.misses" if graph is None
+                              else "shape_generator_cache.hits")
+            if graph is None:
+                graph = self._build_shape(model_class)
+                self.cache.put(model_class, fingerprint, graph)
+            return graph
+    
+    def _build_shape(self, model_class: Type[BaseModel]) -> Graph:
+        """
+        Build the SHACL shape for a Pydantic model.
+        
         Args:
             model_class: The Pydantic model class to convert
             
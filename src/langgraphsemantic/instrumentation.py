@@ -0,0 +1,607 @@
+"""
+Instrumentation of the library's hot paths.
+
+This module records how long the library spends in each operation,
+such as shape generation, serialization, HTTP requests and result
+decoding, in latency histograms, and counts bytes, triples and cache
+lookups. Gauges hold current states, such as whether a circuit breaker
+is open. Each timed operation is a span, nested like the calls it
+times, that exporters can follow as it starts and ends. Exporters also
+receive snapshots of the histograms, counters and gauges.
+
+Instrumentation is off until enable() is called. While it is off, a
+span is a shared object that does nothing, and counters are behind a
+single attribute check, so the instrumented code runs at nearly full
+speed.
+"""
+
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+
+# Upper bounds, in seconds, of the default latency histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    A histogram of observed values with fixed bucket bounds.
+
+    Quantiles are estimated by interpolating within the bucket they fall
+    in, as Prometheus does.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the Histogram.
+
+        Args:
+            buckets: The upper bounds of the buckets, in increasing order
+        """
+        self.buckets = tuple(buckets)
+        # One count per bucket, plus one for values above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+
+        Args:
+            value: The value to add
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the observed values.
+
+        Args:
+            q: The quantile, between 0 and 1
+
+        Returns:
+            The estimate, or 0.0 if nothing was observed
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def copy(self) -> "Histogram":
+        """A copy of the histogram."""
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        return histogram
+
+
+class Span:
+    """
+    One timed operation.
+
+    A span is used as a context manager around the operation. Spans
+    started while another is open in the same thread or task are its
+    children, and share its trace ID. Start and end times are nanoseconds
+    since the epoch; duration is in seconds.
+
+    An operation that goes on after its block, such as reading a streamed
+    response body, calls defer() inside the block and end() when it is
+    done. Spans started after the block are not its children.
+    """
+
+    def __init__(self, owner: "Instrumentation", name: str, attributes: Dict[str, Any]):
+        """
+        Initialize the Span.
+
+        Args:
+            owner: The Instrumentation recording the span
+            name: The name of the operation
+            attributes: Details of the operation
+        """
+        self.owner = owner
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = 0
+        self.span_id = random.getrandbits(64)
+        self.parent: Optional["Span"] = None
+        self.start_time_ns = 0
+        self.end_time_ns = 0
+        self.duration = 0.0
+        self.error: Optional[BaseException] = None
+        # Per-exporter state, such as the span an exporter mirrors this one with
+        self.context: Dict[Any, Any] = {}
+        self._token = None
+        self._started = 0.0
+        self._deferred = False
+        self._ended = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Record a detail of the operation.
+
+        Args:
+            key: The name of the detail
+            value: Its value
+        """
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else random.getrandbits(128)
+        self._token = _current_span.set(self)
+        self.start_time_ns = time.time_ns()
+        self._started = time.perf_counter()
+        for exporter in self.owner.exporters:
+            try:
+                exporter.on_start(self)
+            except Exception as e:
+                print(f"Span exporter failed: {e}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+        if exc is None and self._deferred:
+            return
+        self.end(exc)
+
+    def defer(self) -> None:
+        """Keep the span open after its block, until end() is called."""
+        self._deferred = True
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        End the span, unless it has already ended.
+
+        Args:
+            error: The exception the operation failed with, if any
+        """
+        if self._ended:
+            return
+        self._ended = True
+        # Wall clock times for exporters, a monotonic clock for the duration
+        self.duration = time.perf_counter() - self._started
+        self.end_time_ns = time.time_ns()
+        self.error = error
+        self.owner.observe(self.name, self.duration)
+        if error is not None:
+            self.owner.count(f"{self.name}.errors")
+        for exporter in self.owner.exporters:
+            try:
+                exporter.on_end(self)
+            except Exception as e:
+                print(f"Span exporter failed: {e}")
+
+
+class _NoopSpan:
+    """The span handed out while instrumentation is off."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def defer(self) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar(
+    "langgraphsemantic_span", default=None)
+
+
+class Exporter:
+    """
+    Base class for exporters.
+
+    on_start and on_end are called in the thread running the operation,
+    so they should be quick; export is called with a snapshot of the
+    histograms, counters and gauges when Instrumentation.export() is called.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when a span starts."""
+        pass
+
+    def on_end(self, span: Span) -> None:
+        """Called when a span ends."""
+        pass
+
+    def export(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Export a snapshot.
+
+        Args:
+            snapshot: The result of Instrumentation.snapshot()
+        """
+        pass
+
+
+class LoggingExporter(Exporter):
+    """Writes snapshots, and optionally every span, to a logger."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO,
+                 log_spans: bool = False):
+        """
+        Initialize the LoggingExporter.
+
+        Args:
+            logger: The logger to write to (defaults to the module's logger)
+            level: The level to log at
+            log_spans: Whether to log each span as it ends
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+        self.log_spans = log_spans
+
+    def on_end(self, span: Span) -> None:
+        """Log the span, if asked to."""
+        if self.log_spans:
+            self.logger.log(self.level, "%s %.3f ms %s", span.name, span.duration * 1000,
+                            span.attributes)
+
+    def export(self, snapshot: Dict[str, Any]) -> None:
+        """Log one line per histogram, counter, gauge and hit rate."""
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            self.logger.log(self.level, "%s count=%d mean=%.3fms p50=%.3fms p99=%.3fms",
+                            name, histogram.count,
+                            histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                            histogram.quantile(0.5) * 1000, histogram.quantile(0.99) * 1000)
+        for name, value in sorted(snapshot["counters"].items()):
+            self.logger.log(self.level, "%s %g", name, value)
+        for name, series in sorted(snapshot["gauges"].items()):
+            for labels, value in sorted(series.items()):
+                self.logger.log(self.level, "%s%s %g", name, dict(labels) if labels else "",
+                                value)
+        for name, rate in sorted(snapshot["hit_rates"].items()):
+            self.logger.log(self.level, "%s hit_rate=%.3f", name, rate)
+
+
+class PrometheusExporter(Exporter):
+    """
+    Renders snapshots in the Prometheus text exposition format.
+
+    Histograms become Prometheus histograms in seconds, counters become
+    counters, and gauges and hit rates become gauges. Names are prefixed
+    and dots are replaced with underscores; gauge labels are kept. The text of the latest snapshot is kept in
+    ``text``, ready to be served on a /metrics endpoint.
+    """
+
+    def __init__(self, prefix: str = "langgraphsemantic"):
+        """
+        Initialize the PrometheusExporter.
+
+        Args:
+            prefix: The prefix of every metric name
+        """
+        self.prefix = prefix
+        self.text = ""
+
+    def export(self, snapshot: Dict[str, Any]) -> None:
+        """Render the snapshot into ``text``."""
+        self.text = self.render(snapshot)
+
+    def render(self, snapshot: Dict[str, Any]) -> str:
+        """
+        Render a snapshot.
+
+        Args:
+            snapshot: The result of Instrumentation.snapshot()
+
+        Returns:
+            The metrics in the Prometheus text format
+        """
+        lines = []
+        for name, histogram in sorted(snapshot["histograms"].items()):
+            metric = self._name(name, "_seconds")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = self._name(name, "_total")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, series in sorted(snapshot["gauges"].items()):
+            metric = self._name(name, "")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in sorted(series.items()):
+                if labels:
+                    text = ",".join(f'{key}="{_escape_label(label)}"' for key, label in labels)
+                    lines.append(f"{metric}{{{text}}} {value}")
+                else:
+                    lines.append(f"{metric} {value}")
+        for name, rate in sorted(snapshot["hit_rates"].items()):
+            metric = self._name(name, "_hit_ratio")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {rate}")
+        return "\n".join(lines) + "\n"
+
+    def _name(self, name: str, suffix: str) -> str:
+        """Turn a metric name into a Prometheus metric name."""
+        return f"{self.prefix}_{name}".replace(".", "_").replace("-", "_") + suffix
+
+
+def _escape_label(value: Any) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SpanRecorder(Exporter):
+    """
+    Keeps the most recent finished spans, OpenTelemetry style.
+
+    Each span is kept as a dictionary with its name, trace and span IDs
+    in hex, parent span ID, start and end times in nanoseconds, status
+    and attributes, as an OpenTelemetry span exporter would see it.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        """
+        Initialize the SpanRecorder.
+
+        Args:
+            max_spans: The number of spans kept; older spans are dropped
+        """
+        self.max_spans = max_spans
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        """Keep the span."""
+        record = {
+            "name": span.name,
+            "trace_id": f"{span.trace_id:032x}",
+            "span_id": f"{span.span_id:016x}",
+            "parent_span_id": f"{span.parent.span_id:016x}" if span.parent is not None else None,
+            "start_time_ns": span.start_time_ns,
+            "end_time_ns": span.end_time_ns,
+            "status": "ERROR" if span.error is not None else "OK",
+            "attributes": dict(span.attributes),
+        }
+        with self._lock:
+            self.spans.append(record)
+            if len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+
+    def clear(self) -> List[Dict[str, Any]]:
+        """
+        Take the kept spans.
+
+        Returns:
+            The spans kept so far, oldest first
+        """
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+
+class OpenTelemetryExporter(Exporter):
+    """
+    Mirrors spans as OpenTelemetry spans.
+
+    This requires the optional opentelemetry-api dependency (pip install
+    langgraphsemantic[otel]); the spans go wherever the configured
+    OpenTelemetry SDK sends them.
+    """
+
+    def __init__(self, tracer=None):
+        """
+        Initialize the OpenTelemetryExporter.
+
+        Args:
+            tracer: The OpenTelemetry tracer (defaults to one for this library)
+
+        Raises:
+            ImportError: If opentelemetry-api is not installed
+        """
+        if otel_trace is None:
+            raise ImportError(
+                "OpenTelemetryExporter requires opentelemetry-api; "
+                "install it with: pip install langgraphsemantic[otel]"
+            )
+        self.tracer = tracer or otel_trace.get_tracer("langgraphsemantic")
+
+    def on_start(self, span: Span) -> None:
+        """Start the mirroring OpenTelemetry span, under the parent's if there is one."""
+        parent = span.parent.context.get(self) if span.parent is not None else None
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        span.context[self] = self.tracer.start_span(span.name, context=context)
+
+    def on_end(self, span: Span) -> None:
+        """Copy the attributes and status to the mirroring span and end it."""
+        otel_span = span.context.pop(self, None)
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if span.error is not None:
+            otel_span.record_exception(span.error)
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+        otel_span.end()
+
+
+class Instrumentation:
+    """
+    Records latency histograms, counters and gauges, and hands spans to exporters.
+
+    Counters named "<cache>.hits" and "<cache>.misses" are also reported
+    as a hit rate for the cache in snapshots.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the Instrumentation, disabled.
+
+        Args:
+            buckets: The upper bounds of the latency histogram buckets, in seconds
+        """
+        self.enabled = False
+        self.buckets = tuple(buckets)
+        self.exporters: List[Exporter] = []
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, exporters: Iterable[Exporter] = ()) -> None:
+        """
+        Turn instrumentation on.
+
+        Args:
+            exporters: Exporters to add
+        """
+        self.exporters.extend(exporters)
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Turn instrumentation off; recorded values are kept."""
+        self.enabled = False
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Time an operation.
+
+        Args:
+            name: The name of the operation, such as "http.query"
+            **attributes: Details of the operation
+
+        Returns:
+            A context manager around the operation, with a set_attribute
+            method for details known only once it has run
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Add a value to a histogram.
+
+        Args:
+            name: The name of the histogram
+            value: The value, in seconds for latencies
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Add to a counter.
+
+        Callers on hot paths should check ``enabled`` first.
+
+        Args:
+            name: The name of the counter
+            value: The amount to add
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge.
+
+        Callers on hot paths should check ``enabled`` first.
+
+        Args:
+            name: The name of the gauge
+            value: Its current value
+            **labels: What the value is for, such as the server it describes;
+                each combination of labels is a separate value
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a copy of the recorded values.
+
+        Returns:
+            A dictionary with "histograms" (name to Histogram), "counters"
+            (name to value), "gauges" (name to a dictionary from sorted
+            (label, value) tuples to the gauge's value) and "hit_rates"
+            (cache name to hit rate)
+        """
+        with self._lock:
+            histograms = {name: histogram.copy() for name, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+
+        hit_rates = {}
+        for name in counters:
+            for suffix in (".hits", ".misses"):
+                if name.endswith(suffix):
+                    cache = name[:-len(suffix)]
+                    hits = counters.get(f"{cache}.hits", 0)
+                    lookups = hits + counters.get(f"{cache}.misses", 0)
+                    hit_rates[cache] = hits / lookups if lookups else 0.0
+        return {"histograms": histograms, "counters": counters, "gauges": gauges,
+                "hit_rates": hit_rates}
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Pass a snapshot to every exporter.
+
+        Returns:
+            The snapshot
+        """
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            try:
+                exporter.export(snapshot)
+            except Exception as e:
+                print(f"Metrics exporter failed: {e}")
+        return snapshot
+
+    def reset(self) -> None:
+        """Forget the recorded values."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+# The instrumentation used throughout the library
+metrics = Instrumentation()
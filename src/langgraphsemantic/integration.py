@@ -5,15 +5,40 @@ This module provides components that integrate semantic capabilities with
 LangChain and LangGraph frameworks.
 """
 
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Type, Union
+from urllib.parse import quote
 from pydantic import BaseModel
-from rdflib import Graph, URIRef, Literal
+from rdflib import URIRef, Literal
+from rdflib.namespace import RDF
 import langchain
 from langchain.memory import BaseMemory
 from langchain.schema import BaseRetriever
 
-from langgraphsemantic.core import ShapeGenerator
+from langgraphsemantic.changes import Change, IndexUpdater, ModificationPoller, coalesce
+from langgraphsemantic.core import ShapeCache, ShapeGenerator, TypeMapper
+from langgraphsemantic.search import BM25Index, lucene_query
+from langgraphsemantic.serialization import InstanceSerializer, nt_line
 from langgraphsemantic.store import FusekiStore
+from langgraphsemantic.validation import ShapeValidator
+from langgraphsemantic.vectors import Embedder, VectorIndex, text_digest
+
+
+# Vocabulary for conversation memory
+MEMORY_CONTEXT = URIRef("urn:langgraphsemantic:Context")
+MEMORY_SESSION = URIRef("urn:langgraphsemantic:session")
+MEMORY_SEQUENCE = URIRef("urn:langgraphsemantic:sequence")
+MEMORY_TIMESTAMP = URIRef("urn:langgraphsemantic:timestamp")
+
+# Vocabulary for retrievable documents
+DOCUMENT = URIRef("http://example.org/Document")
+DOCUMENT_TEXT = URIRef("http://example.org/text")
+DOCUMENT_TITLE = URIRef("http://example.org/title")
+DOCUMENT_SOURCE = URIRef("http://example.org/source")
 
 
 class SemanticMemory(BaseMemory):
@@ -22,12 +47,30 @@ class SemanticMemory(BaseMemory):
     
     This class extends LangChain's BaseMemory to provide semantically-enhanced
     memory capabilities using RDF and SHACL.
+    
+    Each saved turn becomes a context node in the memory graph with a
+    session, a sequence number and a timestamp. The sequence number is the
+    save time in nanoseconds, and the turn's IRI adds a random suffix to
+    it, so several processes can write to the same session without their
+    turns colliding. The last k turns are kept in a local window, so
+    loading memory only queries the store the first time, to pick up the
+    session where an earlier process left off. Saves are buffered and
+    written to the store in batches, either when flush_size turns are
+    pending or every flush_interval seconds, so a chain step does not wait
+    for a store write. While the store cannot be written to, at most
+    max_pending turns are kept; older ones are dropped. Call flush() or
+    close() before exiting to write any pending turns.
     """
     
     def __init__(self, 
                  store: FusekiStore,
                  memory_key: str = "semantic_memory",
-                 return_messages: bool = False):
+                 return_messages: bool = False,
+                 session_id: str = "default",
+                 k: int = 10,
+                 flush_size: int = 20,
+                 flush_interval: Optional[float] = 1.0,
+                 max_pending: int = 1000):
         """
         Initialize the SemanticMemory.
         
@@ -35,11 +78,34 @@ class SemanticMemory(BaseMemory):
             store: The FusekiStore instance for data storage
             memory_key: The key to use for memory in chain inputs/outputs
             return_messages: Whether to return memory as messages
+            session_id: The conversation the memory belongs to
+            k: The number of most recent turns to load
+            flush_size: The number of pending turns that triggers a write
+            flush_interval: Seconds between background writes of pending
+                turns, or None to only write on flush_size and flush()
+            max_pending: The maximum number of unwritten turns kept
         """
         self.store = store
         self.memory_key = memory_key
         self.return_messages = return_messages
         self.shape_generator = ShapeGenerator()
+        self.session_id = session_id
+        self.k = k
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, flush_size, 1)
+        self.memory_graph_uri = f"{store.data_graph_uri}/memory"
+        
+        # (sequence, turn IRI, [(predicate, object)]) for the last k turns
+        self._window = deque(maxlen=k)
+        self._loaded = False
+        self._last_sequence = 0
+        # The N-Triples of each unwritten turn
+        self._pending: List[str] = []
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
         
     def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -49,71 +115,195 @@ class SemanticMemory(BaseMemory):
             inputs: The inputs dictionary
             
         Returns:
-            A dictionary containing memory variables
-        """
-        # This is a simplified implementation
-        # In a real implementation, you would query the RDF store based on inputs
-        
-        query = f"""
-        SELECT ?subject ?predicate ?object
-        WHERE {{
-            GRAPH <{self.store.data_graph_uri}/memory> {{
-                ?subject ?predicate ?object
-            }}
-        }}
-        LIMIT 10
+            A dictionary containing memory variables: the triples of the
+            last k turns, oldest first
         """
-        
         try:
-            results = self.store.query.execute_select(query)
-            
-            # Convert results to a more usable format
-            memory_data = []
-            for result in results:
-                memory_data.append({
-                    "subject": str(result.get("subject", "")),
-                    "predicate": str(result.get("predicate", "")),
-                    "object": str(result.get("object", ""))
-                })
-                
-            return {self.memory_key: memory_data}
+            self._ensure_loaded()
         except Exception as e:
             print(f"Failed to load memory: {e}")
             return {self.memory_key: []}
+        
+        with self._lock:
+            turns = list(self._window)
+        
+        memory_data = []
+        for _, turn_uri, triples in turns:
+            for predicate, obj in triples:
+                memory_data.append({
+                    "subject": turn_uri,
+                    "predicate": predicate,
+                    "object": obj
+                })
+        return {self.memory_key: memory_data}
     
     def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
         """
         Save the context of a model run to memory.
         
+        The turn is added to the local window at once and written to the
+        store with the next flush. If the earlier turns of the session
+        cannot be loaded, the turn is still saved, and loading is tried
+        again next time.
+        
         Args:
             inputs: The inputs to the model
             outputs: The outputs from the model
         """
-        # This is a simplified implementation
-        # In a real implementation, you would convert inputs/outputs to RDF
-        # and store them in the RDF store
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            print(f"Failed to load memory: {e}")
         
-        # Create a simple graph with the input/output data
-        graph = Graph()
+        values = [(f"{self.store.base_url}/input/{key}", value)
+                  for key, value in inputs.items() if isinstance(value, str)]
+        values += [(f"{self.store.base_url}/output/{key}", value)
+                   for key, value in outputs.items() if isinstance(value, str)]
+        if not values:
+            return
         
-        # Add some triples representing the context
-        memory_uri = URIRef(f"{self.store.data_graph_uri}/memory/context_{id(inputs)}")
+        with self._lock:
+            # Increasing within this process even if the clock steps back
+            sequence = self._last_sequence = max(time.time_ns(), self._last_sequence + 1)
+            turn_uri = (f"{self.memory_graph_uri}/{quote(self.session_id, safe='')}/"
+                        f"{sequence}-{secrets.token_hex(4)}")
+            
+            triples = [
+                (str(RDF.type), MEMORY_CONTEXT),
+                (str(MEMORY_SESSION), Literal(self.session_id)),
+                (str(MEMORY_SEQUENCE), Literal(sequence)),
+                (str(MEMORY_TIMESTAMP), Literal(datetime.now(timezone.utc))),
+            ]
+            triples += [(predicate, Literal(value)) for predicate, value in values]
+            
+            subject = URIRef(turn_uri)
+            self._pending.append("".join(nt_line(subject, URIRef(predicate), obj)
+                                         for predicate, obj in triples))
+            self._window.append((sequence, turn_uri,
+                                 [(predicate, str(obj)) for predicate, obj in triples]))
+            self._drop_overflow()
+            pending_turns = len(self._pending)
         
-        for key, value in inputs.items():
-            if isinstance(value, str):
-                graph.add((memory_uri, URIRef(f"{self.store.base_url}/input/{key}"), Literal(value)))
-                
-        for key, value in outputs.items():
-            if isinstance(value, str):
-                graph.add((memory_uri, URIRef(f"{self.store.base_url}/output/{key}"), Literal(value)))
+        if pending_turns >= self.flush_size:
+            self.flush()
+        else:
+            self._start_flusher()
+    
+    def flush(self) -> bool:
+        """
+        Write pending turns to the store.
         
-        # Store the graph
-        if len(graph) > 0:
-            self.store.update.insert_graph(graph, f"{self.store.data_graph_uri}/memory")
+        Returns:
+            True if there was nothing to write or the write succeeded,
+            False otherwise. Turns that failed to write stay pending.
+        """
+        with self._flush_lock:
+            with self._lock:
+                turns, self._pending = self._pending, []
+            if not turns:
+                return True
+            
+            if self.store.update.insert_ntriples("".join(turns), self.memory_graph_uri):
+                return True
+            
+            with self._lock:
+                self._pending[:0] = turns
+                self._drop_overflow()
+            return False
+    
+    def close(self) -> None:
+        """Write pending turns and stop the background writer."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
     
     def clear(self) -> None:
-        """Clear all memory contents."""
-        self.store.update.delete_graph(f"{self.store.data_graph_uri}/memory")
+        """Clear all memory contents of this session."""
+        with self._lock:
+            self._pending = []
+            self._window.clear()
+            self._loaded = True
+        
+        update = f"""
+        DELETE WHERE {{
+            GRAPH <{self.memory_graph_uri}> {{
+                ?turn <{MEMORY_SESSION}> {Literal(self.session_id).n3()} .
+                ?turn ?predicate ?object
+            }}
+        }}
+        """
+        self.store.update.execute_update(update, [self.memory_graph_uri])
+    
+    def _ensure_loaded(self) -> None:
+        """
+        Load the last k turns of the session from the store, once.
+        
+        Turns saved before the load succeeded are merged into the window
+        in sequence order.
+        """
+        if self._loaded:
+            return
+        
+        with self._lock:
+            if self._loaded:
+                return
+            
+            query = f"""
+            SELECT ?turn ?sequence ?predicate ?object
+            WHERE {{
+                {{
+                    SELECT ?turn ?sequence
+                    WHERE {{
+                        GRAPH <{self.memory_graph_uri}> {{
+                            ?turn <{MEMORY_SESSION}> {Literal(self.session_id).n3()} ;
+                                  <{MEMORY_SEQUENCE}> ?sequence .
+                        }}
+                    }}
+                    ORDER BY DESC(?sequence)
+                    LIMIT {self.k}
+                }}
+                GRAPH <{self.memory_graph_uri}> {{
+                    ?turn ?predicate ?object
+                }}
+            }}
+            ORDER BY ?sequence
+            """
+            
+            turns: Dict[str, tuple] = {}
+            for result in self.store.query.execute_select(query, use_cache=False):
+                turn_uri = str(result["turn"])
+                turn = turns.setdefault(turn_uri, (int(result["sequence"].toPython()), turn_uri, []))
+                turn[2].append((str(result["predicate"]), str(result["object"])))
+            
+            for turn in self._window:
+                turns.setdefault(turn[1], turn)
+            merged = sorted(turns.values(), key=lambda turn: turn[0])
+            self._window.clear()
+            self._window.extend(merged)
+            self._loaded = True
+    
+    def _drop_overflow(self) -> None:
+        """Drop the oldest unwritten turns beyond max_pending; the lock must be held."""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            print(f"Memory store unavailable; dropped {overflow} unsaved turns")
+    
+    def _start_flusher(self) -> None:
+        """Start the background writer, if it is enabled and not running."""
+        if self.flush_interval is None or self._flusher is not None or self._closed.is_set():
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically,
+                                                 name="SemanticMemory-flush", daemon=True)
+                self._flusher.start()
+    
+    def _flush_periodically(self) -> None:
+        """Write pending turns every flush_interval seconds until closed."""
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
 
 
 class SemanticRetriever(BaseRetriever):
@@ -122,17 +312,91 @@ class SemanticRetriever(BaseRetriever):
     
     This class extends LangChain's BaseRetriever to provide semantically-enhanced
     retrieval capabilities using RDF and SPARQL.
+    
+    Documents are ranked by full-text relevance. If the dataset is
+    configured with a Jena text index over document text, pass
+    text_index=True to query it with text:query. Otherwise documents are
+    loaded from the documents graph into an in-process BM25 index on first
+    use. Documents added or removed through the retriever update the index
+    in place; other writes to the documents graph cause it to be reloaded
+    on the next query.
+    
+    With an embedder, documents are ranked by semantic similarity instead,
+    using an approximate nearest-neighbour VectorIndex kept in memory or
+    in vector_index_path. Only documents whose text changed are embedded
+    again when the index is reloaded. The vector hits can be restricted to
+    documents matching graph_filter, a SPARQL pattern over ?doc, and are
+    followed by the documents they link to, or are linked from, in the
+    documents graph.
+    
+    With track_changes, the local index follows writes instead of being
+    reloaded: documents written with UpdateExecutor.insert_graph are
+    fetched again, delete_graph empties the index, and if
+    modified_predicate is given, the documents graph is polled for
+    documents stamped with a newer modification time. The changes are
+    applied in a background thread. Call close() to stop it.
     """
     
-    def __init__(self, store: FusekiStore):
+    def __init__(self, store: FusekiStore, k: int = 5, text_index: bool = False,
+                 embedder: Optional[Embedder] = None,
+                 vector_index_path: Optional[str] = None,
+                 graph_filter: Optional[str] = None,
+                 expand: bool = True,
+                 neighbour_weight: float = 0.5,
+                 track_changes: bool = False,
+                 modified_predicate: Optional[str] = None,
+                 poll_interval: float = 5.0):
         """
         Initialize the SemanticRetriever.
         
         Args:
             store: The FusekiStore instance for data retrieval
+            k: The number of documents to return
+            text_index: Whether to query the dataset's Jena text index
+                instead of an in-process index
+            embedder: A function embedding a list of texts, to rank
+                documents by vector similarity
+            vector_index_path: A directory to keep the vector index in
+            graph_filter: A SPARQL group graph pattern over ?doc that
+                vector hits must match
+            expand: Whether to add the graph neighbours of vector hits
+            neighbour_weight: The share of a hit's score given to its
+                neighbours
+            track_changes: Whether to update the local index from changes
+                instead of reloading it
+            modified_predicate: The IRI of a modification timestamp to
+                poll for, with track_changes
+            poll_interval: Seconds between polls for modified documents
         """
         super().__init__()
         self.store = store
+        self.k = k
+        self.text_index = text_index and embedder is None
+        self.embedder = embedder
+        self.vector_index_path = vector_index_path
+        self.graph_filter = graph_filter
+        self.expand = expand
+        self.neighbour_weight = neighbour_weight
+        self.documents_graph_uri = f"{store.data_graph_uri}/documents"
+        self.index = BM25Index()
+        self.vectors: Optional[VectorIndex] = None
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        
+        self._index_lock = threading.Lock()
+        self._index_generation = None
+        self._writes = 0
+        self._local = threading.local()
+        self.updater: Optional[IndexUpdater] = None
+        self.poller: Optional[ModificationPoller] = None
+        if not self.text_index:
+            store.connection.add_write_listener(self._on_write)
+            if track_changes:
+                self.updater = IndexUpdater(self.apply_changes)
+                store.update.add_change_listener(self._on_change)
+                if modified_predicate:
+                    self.poller = ModificationPoller(store, self.documents_graph_uri,
+                                                     self.updater.submit,
+                                                     modified_predicate, poll_interval)
         
     def _get_relevant_documents(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -142,57 +406,350 @@ class SemanticRetriever(BaseRetriever):
             query: The query string
             
         Returns:
-            A list of relevant documents
+            A list of relevant documents, best first
+        """
+        try:
+            if self.text_index:
+                return self._search_text_index(query)
+            
+            self._ensure_index()
+            if self.embedder is not None:
+                return self._search_vectors(query)
+            documents = []
+            for document, score in self.index.search(query, self.k):
+                metadata = dict(document["metadata"], score=score)
+                documents.append({"id": document["id"], "text": document["text"],
+                                  "metadata": metadata})
+            return documents
+        except Exception as e:
+            print(f"Failed to retrieve documents: {e}")
+            return []
+    
+    def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """
-        # This is a simplified implementation
-        # In a real implementation, you would use more sophisticated semantic matching
+        Store documents and add them to the index.
         
-        # Convert the query to a SPARQL query
-        # This is a very basic approach - in practice, you would use NLP techniques
-        # to convert the natural language query to a semantic query
+        Args:
+            documents: Documents with an "id", a "text" and optionally a
+                "metadata" dictionary with a "title" and a "source"
+            
+        Returns:
+            True if the documents were stored, False otherwise
+        """
+        lines = []
+        for document in documents:
+            subject = URIRef(document["id"])
+            metadata = document.get("metadata") or {}
+            lines.append(nt_line(subject, RDF.type, DOCUMENT))
+            lines.append(nt_line(subject, DOCUMENT_TEXT, Literal(document["text"])))
+            for key, predicate in (("title", DOCUMENT_TITLE), ("source", DOCUMENT_SOURCE)):
+                if metadata.get(key):
+                    lines.append(nt_line(subject, predicate, Literal(metadata[key])))
         
-        keywords = query.lower().split()
-        filter_clauses = []
+        ids = [f"<{document['id']}>" for document in documents]
+        update = f"""
+        DELETE {{ GRAPH <{self.documents_graph_uri}> {{ ?doc ?predicate ?object }} }}
+        WHERE {{
+            GRAPH <{self.documents_graph_uri}> {{ ?doc ?predicate ?object }}
+            VALUES ?doc {{ {" ".join(ids)} }}
+        }} ;
+        INSERT DATA {{ GRAPH <{self.documents_graph_uri}> {{ {"".join(lines)} }} }}
+        """
+        if not self._own_write(update):
+            return False
         
-        for keyword in keywords:
-            filter_clauses.append(f'FILTER(CONTAINS(LCASE(STR(?text)), "{keyword}"))')
+        if not self.text_index:
+            with self._index_lock:
+                self._index_documents([
+                    (document["id"], document["text"],
+                     {"title": (document.get("metadata") or {}).get("title", ""),
+                      "source": (document.get("metadata") or {}).get("source", "")})
+                    for document in documents
+                ])
+        return True
+    
+    def remove_documents(self, ids: List[str]) -> bool:
+        """
+        Delete documents from the store and the index.
+        
+        Args:
+            ids: The IRIs of the documents
             
-        filter_str = " || ".join(filter_clauses)
+        Returns:
+            True if the documents were deleted, False otherwise
+        """
+        values = " ".join(f"<{doc_id}>" for doc_id in ids)
+        update = f"""
+        DELETE {{ GRAPH <{self.documents_graph_uri}> {{ ?doc ?predicate ?object }} }}
+        WHERE {{
+            GRAPH <{self.documents_graph_uri}> {{ ?doc ?predicate ?object }}
+            VALUES ?doc {{ {values} }}
+        }}
+        """
+        if not self._own_write(update):
+            return False
         
-        sparql_query = f"""
-        SELECT ?doc ?text ?title ?source
+        with self._index_lock:
+            self._unindex(ids)
+        return True
+    
+    def apply_changes(self, changes: List[Change]) -> None:
+        """
+        Update the local index from changes to the documents graph.
+        
+        The documents named in the changes are fetched again and indexed,
+        or removed from the index if they are gone. Nothing is done before
+        the index is first loaded, since loading reads the current state.
+        
+        Args:
+            changes: The changes, oldest first
+        """
+        changes = [change for change in changes
+                   if change.graph_uri == self.documents_graph_uri]
+        if not changes:
+            return
+        
+        with self._index_lock:
+            if self._index_generation is None:
+                return
+            dropped, subjects = coalesce(changes)
+            if dropped:
+                self._unindex(list(self.index.documents) + list(self._documents))
+            
+            subjects = sorted(subjects)
+            for start in range(0, len(subjects), 500):
+                batch = subjects[start:start + 500]
+                documents = self._fetch_documents(batch)
+                self._unindex([doc_id for doc_id in batch if doc_id not in documents])
+                self._index_documents(list(documents.values()))
+    
+    def close(self) -> None:
+        """Stop following changes, after applying those already received."""
+        if self.poller is not None:
+            self.poller.stop()
+        if self.updater is not None:
+            self.updater.close()
+    
+    def refresh_index(self) -> None:
+        """Reload the in-process index from the documents graph."""
+        with self._index_lock:
+            generation = self._writes
+            documents = list(self._fetch_documents().values())
+            
+            self.index.clear()
+            if self.embedder is not None:
+                self._documents.clear()
+                vectors = self._vector_index()
+                current = {doc_id for doc_id, _, _ in documents}
+                if vectors.remove([doc_id for doc_id in list(vectors.positions)
+                                   if doc_id not in current]):
+                    vectors.save()
+            self._index_documents(documents)
+            self._index_generation = generation
+    
+    def _index_documents(self, documents: List[tuple]) -> None:
+        """
+        Add documents to the in-process index in use; the index lock must be held.
+        
+        Args:
+            documents: Tuples of (id, text, metadata)
+        """
+        if self.embedder is None:
+            for doc_id, text, metadata in documents:
+                self.index.add(doc_id, text, metadata)
+            return
+        
+        for doc_id, text, metadata in documents:
+            self._documents[doc_id] = {"id": doc_id, "text": text, "metadata": metadata}
+        
+        vectors = self._vector_index()
+        digests = [text_digest(text) for _, text, _ in documents]
+        changed = [i for i, (doc_id, _, _) in enumerate(documents)
+                   if vectors.digest(doc_id) != digests[i]]
+        for start in range(0, len(changed), 256):
+            batch = changed[start:start + 256]
+            vectors.add([documents[i][0] for i in batch],
+                        self.embedder([documents[i][1] for i in batch]),
+                        [digests[i] for i in batch])
+        if changed:
+            vectors.save()
+    
+    def _vector_index(self) -> VectorIndex:
+        """Get the vector index, opening it on first use."""
+        if self.vectors is None:
+            # Embedders need not declare their size, so ask for one vector
+            dim = getattr(self.embedder, "dim", None) or len(self.embedder(["dimension"])[0])
+            self.vectors = VectorIndex(dim, self.vector_index_path)
+        return self.vectors
+    
+    def _search_vectors(self, query: str) -> List[Dict[str, Any]]:
+        """Rank documents by vector similarity and add their graph neighbours."""
+        if self.vectors is None or not len(self.vectors):
+            return []
+        
+        vector = self.embedder([query])[0]
+        hits = self.vectors.search(vector, self.k * 4 if self.graph_filter else self.k)
+        if self.graph_filter:
+            allowed = self._matching_documents([doc_id for doc_id, _ in hits])
+            hits = [(doc_id, score) for doc_id, score in hits if doc_id in allowed][:self.k]
+        
+        scores = {doc_id: score for doc_id, score in hits}
+        via: Dict[str, str] = {}
+        if self.expand and hits:
+            for hit, neighbour in self._neighbours([doc_id for doc_id, _ in hits]):
+                if neighbour not in self._documents:
+                    continue
+                score = scores[hit] * self.neighbour_weight
+                if score > scores.get(neighbour, float("-inf")):
+                    scores[neighbour] = score
+                    via[neighbour] = hit
+        
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:self.k]
+        documents = []
+        for doc_id, score in ranked:
+            document = self._documents.get(doc_id)
+            if document is None:
+                continue
+            metadata = dict(document["metadata"], score=score)
+            if doc_id in via:
+                metadata["via"] = via[doc_id]
+            documents.append({"id": doc_id, "text": document["text"], "metadata": metadata})
+        return documents
+    
+    def _matching_documents(self, ids: List[str]) -> set:
+        """Find which of the documents match graph_filter."""
+        if not ids:
+            return set()
+        query = f"""
+        SELECT DISTINCT ?doc
         WHERE {{
-            GRAPH <{self.store.data_graph_uri}/documents> {{
-                ?doc a <http://example.org/Document> ;
-                     <http://example.org/text> ?text .
-                OPTIONAL {{ ?doc <http://example.org/title> ?title }}
-                OPTIONAL {{ ?doc <http://example.org/source> ?source }}
+            VALUES ?doc {{ {" ".join(f"<{doc_id}>" for doc_id in ids)} }}
+            GRAPH <{self.documents_graph_uri}> {{ {self.graph_filter} }}
+        }}
+        """
+        return {str(result["doc"]) for result in self.store.query.execute_select(query)}
+    
+    def _neighbours(self, ids: List[str]) -> List[tuple]:
+        """Find the documents linked to or from each of the documents."""
+        query = f"""
+        SELECT DISTINCT ?hit ?doc
+        WHERE {{
+            VALUES ?hit {{ {" ".join(f"<{doc_id}>" for doc_id in ids)} }}
+            GRAPH <{self.documents_graph_uri}> {{
+                {{ ?hit ?link ?doc }} UNION {{ ?doc ?link ?hit }}
+                ?doc a <{DOCUMENT}> .
             }}
-            {filter_str}
+            FILTER(?doc != ?hit)
         }}
-        LIMIT 5
         """
+        return [(str(result["hit"]), str(result["doc"]))
+                for result in self.store.query.execute_select(query)]
+    
+    def _ensure_index(self) -> None:
+        """Load the index if it has not been loaded or may be stale."""
+        if self._index_generation != self._writes:
+            # Poll from before the load, so no change between the two is missed
+            if self.poller is not None and self._index_generation is None:
+                self.poller.start()
+            self.refresh_index()
+    
+    def _fetch_documents(self, ids: Optional[List[str]] = None) -> Dict[str, tuple]:
+        """
+        Fetch documents from the documents graph.
         
-        try:
-            results = self.store.query.execute_select(sparql_query)
+        Args:
+            ids: The IRIs of the documents to fetch, or None for all
             
-            # Convert results to documents
-            documents = []
-            for result in results:
-                doc = {
-                    "id": str(result.get("doc", "")),
-                    "text": str(result.get("text", "")),
-                    "metadata": {
-                        "title": str(result.get("title", "")) if "title" in result else "",
-                        "source": str(result.get("source", "")) if "source" in result else ""
-                    }
-                }
-                documents.append(doc)
-                
-            return documents
-        except Exception as e:
-            print(f"Failed to retrieve documents: {e}")
+        Returns:
+            A dictionary of (id, text, metadata) tuples by ID
+        """
+        values = ""
+        if ids is not None:
+            values = f"VALUES ?doc {{ {' '.join(f'<{doc_id}>' for doc_id in ids)} }}"
+        query = f"""
+        SELECT ?doc ?text ?title ?source
+        WHERE {{
+            {values}
+            GRAPH <{self.documents_graph_uri}> {{
+                ?doc a <{DOCUMENT}> ;
+                     <{DOCUMENT_TEXT}> ?text .
+                OPTIONAL {{ ?doc <{DOCUMENT_TITLE}> ?title }}
+                OPTIONAL {{ ?doc <{DOCUMENT_SOURCE}> ?source }}
+            }}
+        }}
+        """
+        documents = {}
+        for result in self.store.query.execute_select(query, use_cache=False):
+            doc_id = str(result["doc"])
+            documents[doc_id] = (doc_id, str(result["text"]), {
+                "title": str(result.get("title", "")),
+                "source": str(result.get("source", ""))
+            })
+        return documents
+    
+    def _unindex(self, ids: List[str]) -> None:
+        """Remove documents from the local index; the index lock must be held."""
+        for doc_id in ids:
+            self.index.remove(doc_id)
+            self._documents.pop(doc_id, None)
+        if self.vectors is not None and self.vectors.remove(ids):
+            self.vectors.save()
+    
+    def _search_text_index(self, query: str) -> List[Dict[str, Any]]:
+        """Rank documents with the dataset's Jena text index."""
+        search = lucene_query(query)
+        if not search:
             return []
+        
+        sparql_query = f"""
+        PREFIX text: <http://jena.apache.org/text#>
+        SELECT ?doc ?score ?text ?title ?source
+        WHERE {{
+            GRAPH <{self.documents_graph_uri}> {{
+                (?doc ?score) text:query (<{DOCUMENT_TEXT}> {Literal(search).n3()} {self.k}) .
+                ?doc <{DOCUMENT_TEXT}> ?text .
+                OPTIONAL {{ ?doc <{DOCUMENT_TITLE}> ?title }}
+                OPTIONAL {{ ?doc <{DOCUMENT_SOURCE}> ?source }}
+            }}
+        }}
+        ORDER BY DESC(?score)
+        LIMIT {self.k}
+        """
+        
+        documents = []
+        for result in self.store.query.execute_select(sparql_query):
+            documents.append({
+                "id": str(result["doc"]),
+                "text": str(result["text"]),
+                "metadata": {
+                    "title": str(result.get("title", "")),
+                    "source": str(result.get("source", "")),
+                    "score": float(result["score"].toPython())
+                }
+            })
+        return documents
+    
+    def _own_write(self, update: str) -> bool:
+        """Send an update to the documents graph without marking the index stale."""
+        self._local.writing = True
+        try:
+            return self.store.update.execute_update(update, [self.documents_graph_uri])
+        finally:
+            self._local.writing = False
+    
+    def _on_change(self, change: Change) -> None:
+        """Queue a change to the documents graph for the index updater."""
+        if change.graph_uri == self.documents_graph_uri:
+            self.updater.submit(change)
+    
+    def _on_write(self, graphs) -> None:
+        """Mark the index stale after another write to the documents graph."""
+        if getattr(self._local, "writing", False):
+            return
+        if self.updater is not None and self.store.update.is_tracked_write():
+            return
+        if graphs is None or self.documents_graph_uri in graphs:
+            self._writes += 1
 
 
 class SemanticModelRegistry:
@@ -200,28 +757,46 @@ class SemanticModelRegistry:
     Registry for Pydantic models with semantic capabilities.
     
     This class manages the registration and retrieval of Pydantic models,
-    along with their corresponding SHACL shapes.
+    along with their corresponding SHACL shapes. Shapes are only uploaded
+    when the model's schema fingerprint differs from the stored one.
     """
     
-    def __init__(self, store: FusekiStore, base_namespace: str = "http://example.org/"):
+    def __init__(self, store: FusekiStore, base_namespace: str = "http://example.org/",
+                 shape_cache: Optional[ShapeCache] = None,
+                 type_mapper: Optional[TypeMapper] = None,
+                 serializer: Optional[InstanceSerializer] = None):
         """
         Initialize the SemanticModelRegistry.
         
         Args:
             store: The FusekiStore instance for shape storage
             base_namespace: The base URI namespace for generated shapes
+            shape_cache: The shape cache to use (defaults to a new in-memory cache)
+            type_mapper: The type mapper to use (defaults to a new TypeMapper)
+            serializer: The serializer that names stored instances, so
+                validation results refer to the same IRIs
         """
         self.store = store
         self.base_namespace = base_namespace
-        self.shape_generator = ShapeGenerator(base_namespace)
+        self.serializer = serializer or InstanceSerializer(base_namespace)
+        self.shape_generator = ShapeGenerator(base_namespace, cache=shape_cache,
+                                              type_mapper=type_mapper)
         self.registered_models = {}
+        self.validators = {}
         
-    def register_model(self, model_class: Type[BaseModel]) -> bool:
+    def register_model(self, model_class: Type[BaseModel], force: bool = False) -> bool:
         """
         Register a Pydantic model and generate its SHACL shape.
         
+        If the shape cache records that the current fingerprint was already
+        uploaded, a cheap ASK checks that the shape graph still exists, in
+        case it was dropped or the dataset was reset. Otherwise the
+        fingerprint stored with the shape is checked. The shape is only
+        uploaded if it is missing or its fingerprint differs.
+        
         Args:
             model_class: The Pydantic model class to register
+            force: If True, upload the shape even if it appears unchanged
             
         Returns:
             True if registration was successful, False otherwise
@@ -229,13 +804,28 @@ class SemanticModelRegistry:
         model_name = model_class.__name__
         
         try:
-            # Generate SHACL shape
-            shape_graph = self.shape_generator.generate_shape(model_class)
+            cache = self.shape_generator.cache
+            fingerprint = self.shape_generator.schema_fingerprint(model_class)
+            shape_uri = f"{self.store.shapes_graph_uri}/{model_name}"
             
-            # Store the shape
-            success = self.store.store_shape(shape_graph, model_name)
+            if force:
+                unchanged = False
+            elif cache.get_stored_fingerprint(shape_uri) == fingerprint:
+                unchanged = self.store.has_shape(model_name)
+            else:
+                unchanged = self.store.get_shape_fingerprint(model_name) == fingerprint
+            
+            if unchanged:
+                success = True
+            else:
+                # Generate SHACL shape
+                shape_graph = self.shape_generator.generate_shape(model_class)
+                
+                # Store the shape
+                success = self.store.store_shape(shape_graph, model_name, fingerprint)
             
             if success:
+                cache.set_stored_fingerprint(shape_uri, fingerprint)
                 self.registered_models[model_name] = model_class
                 return True
             else:
@@ -271,21 +861,59 @@ class SemanticModelRegistry:
         if model_name not in self.registered_models:
             return {"valid": False, "error": "Model not registered"}
         
-        # Convert instance to RDF
-        # This is a simplified implementation
-        graph = Graph()
-        instance_uri = URIRef(f"{self.base_namespace}{model_name}_{id(instance)}")
+        instance_uri = self.serializer.subject(instance)
         
-        # Add type triple
-        graph.add((instance_uri, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"), 
-                  URIRef(f"{self.base_namespace}{model_name}")))
+        # Validate locally against the compiled shape
+        return self.get_validator(instance.__class__).validate_instance(instance, instance_uri)
+    
+    def validate_batch(self, instances: List[BaseModel]) -> Dict[str, Any]:
+        """
+        Validate a batch of instances of one model against its SHACL shape.
         
-        # Add property triples
-        for field_name, field_value in instance.dict().items():
-            if field_value is not None:
-                if isinstance(field_value, (str, int, float, bool)):
-                    graph.add((instance_uri, URIRef(f"{self.base_namespace}{field_name}"), 
-                              Literal(field_value)))
+        Args:
+            instances: The Pydantic model instances to validate, all of
+                the same class
+            
+        Returns:
+            A dictionary with "valid", a per-instance "conforms" mask and
+            the "results" of each instance (see ShapeValidator.validate_batch)
+        """
+        instances = list(instances)
+        if not instances:
+            return {"valid": True, "conforms": [], "results": []}
+        
+        model_class = instances[0].__class__
+        model_name = model_class.__name__
         
-        # Validate against shape
-        return self.store.validate_against_shape(graph, model_name)
+        if model_name not in self.registered_models:
+            return {"valid": False, "error": "Model not registered"}
+        
+        report = self.get_validator(model_class).validate_batch(instances)
+        
+        # Naming an instance can cost a content hash, so only name the failures
+        for instance, results in zip(instances, report["results"]):
+            if results:
+                instance_uri = self.serializer.subject(instance)
+                for result in results:
+                    result["focus_node"] = instance_uri
+        return report
+    
+    def get_validator(self, model_class: Type[BaseModel]) -> ShapeValidator:
+        """
+        Get the compiled validator for a model's SHACL shape.
+        
+        Validators are compiled once per shape and recompiled only when
+        the model's shape changes.
+        
+        Args:
+            model_class: The Pydantic model class
+            
+        Returns:
+            The ShapeValidator for the model's shape
+        """
+        shape_graph = self.shape_generator.generate_shape(model_class)
+        entry = self.validators.get(model_class)
+        if entry is None or entry[0] is not shape_graph:
+            entry = self.validators[model_class] = (
+                shape_graph, ShapeValidator(shape_graph, self.base_namespace))
+        return entry[1]
@@ -0,0 +1,263 @@
+"""
+Loading Pydantic model instances back from the RDF store.
+
+This module reads instances written by InstanceSerializer. Instances of
+a model are fetched one page at a time, the models nested in a page are
+fetched with a few batched queries per level of nesting, and each row
+group is turned back into a validated Pydantic object by a decoder
+compiled once per model class.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type, Union
+
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import SHAPE_SINGLETON
+from rdflib import URIRef
+from rdflib.namespace import RDF
+
+from langgraphsemantic.serialization import encode_literal
+
+
+# A decoder takes the values of each predicate of a subject and the
+# nested instances decoded so far, and returns the instance
+Decoder = Callable[[Dict[str, List[Any]], Callable[[str, type], Optional[BaseModel]]], BaseModel]
+
+
+class InstanceLoader:
+    """
+    Loads Pydantic model instances from the store in bulk.
+
+    Instances of a model are read from the model's data graph with
+    FusekiStore.scan_pages, page_size subjects per query. The IRIs of nested
+    models found in a page are collected and fetched together, batch_size
+    subjects per query, one round per level of nesting, so loading a
+    page costs a bounded number of queries rather than one per nested
+    object. RDF does not keep the order of list items, so list fields
+    come back in no particular order.
+    """
+
+    def __init__(self, store, base_namespace: str = "http://example.org/",
+                 page_size: int = 500, batch_size: int = 500):
+        """
+        Initialize the InstanceLoader.
+
+        Args:
+            store: The FusekiStore to read from
+            base_namespace: The base URI namespace of instances and properties
+            page_size: The number of instances fetched per query
+            batch_size: The number of nested instances fetched per query
+        """
+        self.store = store
+        self.base_namespace = base_namespace
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self._decoders: Dict[type, Tuple[Decoder, Dict[str, type]]] = {}
+
+    def load(self, model_class: Type[BaseModel],
+             filter: Optional[Union[Dict[str, Any], str]] = None,
+             limit: Optional[int] = None) -> Iterator[BaseModel]:
+        """
+        Load instances of a model class.
+
+        Args:
+            model_class: The Pydantic model class
+            filter: Either a dictionary of field values the instances must
+                have, or a SPARQL group graph pattern over ?s
+            limit: The maximum number of instances to load
+
+        Yields:
+            The instances, ordered by IRI. Instances that fail validation
+            are reported and skipped.
+        """
+        if limit is not None and limit <= 0:
+            return
+        graph_uri = f"{self.store.data_graph_uri}/{model_class.__name__}"
+        pattern = (f"?s <{RDF.type}> <{self.base_namespace}{model_class.__name__}> .\n"
+                   f"{self._filter_pattern(filter)}")
+        page_size = self.page_size if limit is None else min(self.page_size, limit)
+        remaining = limit
+
+        for page in self.store.scan_pages(graph_uri, page_size, pattern):
+            subjects = self._group(page)
+            decode = self._resolver(model_class, subjects, graph_uri)
+            ordered = sorted(subjects)
+            if remaining is not None:
+                ordered = ordered[:remaining]
+                remaining -= len(ordered)
+            for subject in ordered:
+                instance = decode(subject, model_class)
+                if instance is not None:
+                    yield instance
+            if remaining is not None and remaining <= 0:
+                return
+
+    def compile(self, model_class: Type[BaseModel]) -> Tuple[Decoder, Dict[str, type]]:
+        """
+        Get the compiled decoder for a model class, compiling it on first use.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            The decoder and a dictionary of the predicates that point to
+            nested models, with each predicate's model class
+        """
+        compiled = self._decoders.get(model_class)
+        if compiled is None:
+            compiled = self._decoders[model_class] = self._compile(model_class)
+        return compiled
+
+    def _compile(self, model_class: Type[BaseModel]) -> Tuple[Decoder, Dict[str, type]]:
+        """
+        Compile the decoder for a model class.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            The decoder and the predicates of nested models
+        """
+        fields = {}
+        nested = {}
+        for field_name, field in model_class.__fields__.items():
+            predicate = f"{self.base_namespace}{field_name}"
+            inner = field.type_
+            nested_class = inner if isinstance(inner, type) and issubclass(inner, BaseModel) else None
+            fields[predicate] = (field_name, field.shape != SHAPE_SINGLETON, nested_class)
+            if nested_class is not None:
+                nested[predicate] = nested_class
+
+        def decode(values: Dict[str, List[Any]],
+                   resolve: Callable[[str, type], Optional[BaseModel]]) -> BaseModel:
+            kwargs = {}
+            for predicate, terms in values.items():
+                spec = fields.get(predicate)
+                if spec is None:
+                    continue
+                field_name, multiple, nested_class = spec
+                if nested_class is not None:
+                    items = [resolve(str(term), nested_class) for term in terms]
+                    items = [item for item in items if item is not None]
+                else:
+                    items = [term.toPython() for term in terms]
+                if items:
+                    kwargs[field_name] = items if multiple else items[0]
+            return model_class(**kwargs)
+
+        return decode, nested
+
+    def _resolver(self, model_class: Type[BaseModel], subjects: Dict[str, Dict[str, List[Any]]],
+                  graph_uri: str) -> Callable[[str, type], Optional[BaseModel]]:
+        """
+        Fetch the models nested in a page and build a function decoding its subjects.
+
+        Args:
+            model_class: The model class of the page
+            subjects: The values of each predicate of each subject in the page
+            graph_uri: The graph the page was read from
+
+        Returns:
+            A function (subject, model_class) returning the decoded instance,
+            or None if it is missing or invalid
+        """
+        rows = dict(subjects)
+        level = self._nested_iris({subject: model_class for subject in subjects}, rows)
+        while level:
+            iris = sorted(iri for iri in level if iri not in rows)
+            for start in range(0, len(iris), self.batch_size):
+                batch = iris[start:start + self.batch_size]
+                values = " ".join(f"<{iri}>" for iri in batch)
+                query = f"""
+                SELECT ?s ?p ?o
+                WHERE {{
+                    VALUES ?s {{ {values} }}
+                    GRAPH <{graph_uri}> {{ ?s ?p ?o }}
+                }}
+                """
+                fetched = self._group(self.store.query.iter_select(query))
+                for iri in batch:
+                    rows[iri] = fetched.get(iri, {})
+            level = self._nested_iris({iri: level[iri] for iri in iris}, rows)
+
+        decoded: Dict[str, Optional[BaseModel]] = {}
+        in_progress: Set[str] = set()
+
+        def resolve(subject: str, cls: type) -> Optional[BaseModel]:
+            if subject in decoded:
+                return decoded[subject]
+            values = rows.get(subject)
+            if not values or subject in in_progress:
+                return None
+            in_progress.add(subject)
+            try:
+                decoded[subject] = self.compile(cls)[0](values, resolve)
+            except ValidationError as e:
+                print(f"Failed to load {cls.__name__} {subject}: {e}")
+                decoded[subject] = None
+            finally:
+                in_progress.discard(subject)
+            return decoded[subject]
+
+        return resolve
+
+    def _nested_iris(self, subjects: Dict[str, type],
+                     rows: Dict[str, Dict[str, List[Any]]]) -> Dict[str, type]:
+        """
+        Find the IRIs of nested models that have not been fetched yet.
+
+        Args:
+            subjects: The model class of each subject to look in
+            rows: The values of each predicate of every subject fetched so far
+
+        Returns:
+            The model class of each nested IRI still to fetch
+        """
+        found: Dict[str, type] = {}
+        for subject, cls in subjects.items():
+            nested = self.compile(cls)[1]
+            if not nested:
+                continue
+            for predicate, terms in rows.get(subject, {}).items():
+                nested_class = nested.get(predicate)
+                if nested_class is None:
+                    continue
+                for term in terms:
+                    iri = str(term)
+                    if isinstance(term, URIRef) and iri not in rows:
+                        found[iri] = nested_class
+        return found
+
+    def _filter_pattern(self, filter: Optional[Union[Dict[str, Any], str]]) -> str:
+        """
+        Render a load filter as a SPARQL graph pattern over ?s.
+
+        Args:
+            filter: A dictionary of field values, a SPARQL pattern, or None
+
+        Returns:
+            The graph pattern
+
+        Raises:
+            ValueError: If a field value cannot be written as a literal
+        """
+        if filter is None:
+            return ""
+        if isinstance(filter, str):
+            return filter
+
+        patterns = []
+        for field_name, value in filter.items():
+            literal = encode_literal(value)
+            if literal is None:
+                raise ValueError(f"Cannot filter on {field_name}: unsupported value {value!r}")
+            patterns.append(f"?s <{self.base_namespace}{field_name}> {literal} .")
+        return "\n".join(patterns)
+
+    @staticmethod
+    def _group(rows) -> Dict[str, Dict[str, List[Any]]]:
+        """Group ?s ?p ?o result rows by subject and predicate."""
+        subjects: Dict[str, Dict[str, List[Any]]] = {}
+        for row in rows:
+            values = subjects.setdefault(str(row["s"]), {})
+            values.setdefault(str(row["p"]), []).append(row["o"])
+        return subjects
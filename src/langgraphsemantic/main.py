@@ -5,13 +5,17 @@ This module provides the main entry points and high-level interfaces
 for the LangGraphSemantic library.
 """
 
-from typing import Any, Dict, List, Optional, Type, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type, Union
 from pydantic import BaseModel
-from rdflib import Graph
+from rdflib import Graph, Literal, URIRef
 
-from langgraphsemantic.core import ShapeGenerator, ModelIntrospector, TypeMapper
+from langgraphsemantic.core import ShapeCache, ShapeGenerator, ModelIntrospector, TypeMapper
 from langgraphsemantic.store import FusekiStore, StoreConnection, QueryExecutor, UpdateExecutor
 from langgraphsemantic.integration import SemanticMemory, SemanticRetriever, SemanticModelRegistry
+from langgraphsemantic.loading import InstanceLoader
+from langgraphsemantic.serialization import InstanceSerializer, nt_line
+from langgraphsemantic.vectors import Embedder
 
 
 class LangGraphSemantic:
@@ -22,7 +26,8 @@ class LangGraphSemantic:
     data in LangChain and LangGraph applications.
     """
     
-    def __init__(self, fuseki_url: str, dataset: str, base_namespace: str = "http://example.org/"):
+    def __init__(self, fuseki_url: str, dataset: str, base_namespace: str = "http://example.org/",
+                 shape_cache_dir: Optional[str] = None):
         """
         Initialize the LangGraphSemantic instance.
         
@@ -30,6 +35,8 @@ class LangGraphSemantic:
             fuseki_url: The base URL of the Fuseki server
             dataset: The name of the dataset to use
             base_namespace: The base URI namespace for generated shapes
+            shape_cache_dir: Optional directory in which generated shapes
+                are cached across processes
         """
         self.fuseki_url = fuseki_url
         self.dataset = dataset
@@ -37,20 +44,56 @@ class LangGraphSemantic:
         
         # Initialize components
         self.store = FusekiStore(fuseki_url, dataset)
-        self.shape_generator = ShapeGenerator(base_namespace)
-        self.model_registry = SemanticModelRegistry(self.store, base_namespace)
+        self.shape_cache = ShapeCache(shape_cache_dir)
+        self.type_mapper = TypeMapper()
+        self.shape_generator = ShapeGenerator(base_namespace, cache=self.shape_cache,
+                                              type_mapper=self.type_mapper)
+        self.serializer = InstanceSerializer(base_namespace)
+        self.model_registry = SemanticModelRegistry(self.store, base_namespace,
+                                                    shape_cache=self.shape_cache,
+                                                    type_mapper=self.type_mapper,
+                                                    serializer=self.serializer)
+        self.instance_loader = InstanceLoader(self.store, base_namespace)
         
-    def register_model(self, model_class: Type[BaseModel]) -> bool:
+    def register_model(self, model_class: Type[BaseModel], force: bool = False) -> bool:
         """
         Register a Pydantic model for semantic storage and validation.
         
         Args:
             model_class: The Pydantic model class to register
+            force: If True, upload the shape even if it appears unchanged
             
         Returns:
             True if registration was successful, False otherwise
         """
-        return self.model_registry.register_model(model_class)
+        return self.model_registry.register_model(model_class, force=force)
+    
+    def register_type(self, python_type: Type, datatype: URIRef) -> None:
+        """
+        Map a custom Python type to an RDF datatype in generated shapes.
+        
+        Register types before the models that use them; models registered
+        earlier get an updated shape the next time they are registered.
+        
+        Args:
+            python_type: The Python type to map
+            datatype: The RDF datatype URI to map it to
+        """
+        self.type_mapper.register(python_type, datatype)
+    
+    def set_iri_key(self, model_class: Type[BaseModel], field_name: Optional[str]) -> None:
+        """
+        Name a model's instances by a key field, such as a primary key or UUID.
+        
+        Without a key field, instances are named by a hash of their
+        content. The key can also be set with an iri_key attribute on the
+        model's Config.
+        
+        Args:
+            model_class: The Pydantic model class
+            field_name: The key field, or None to name instances by content hash
+        """
+        self.serializer.set_iri_key(model_class, field_name)
     
     def store_instance(self, instance: BaseModel) -> bool:
         """
@@ -70,11 +113,296 @@ class LangGraphSemantic:
             if not self.register_model(instance.__class__):
                 return False
         
-        # Convert instance to RDF
-        graph = self._instance_to_rdf(instance)
+        # Convert instance to N-Triples
+        ntriples = self.serializer.serialize(instance)
         
         # Store the instance data
-        return self.store.store_instance_data(graph, model_name)
+        return self.store.store_instance_data(ntriples, model_name)
+    
+    def store_instances(self, instances: Iterable[BaseModel], batch_size: int = 1000,
+                        max_in_flight: int = 1, bulk: bool = False) -> Dict[str, Any]:
+        """
+        Store many Pydantic model instances in the RDF store.
+        
+        Instances are grouped by model into batches of up to batch_size
+        instances, and each batch is stored with a single request. The
+        iterable is consumed lazily, so generators can be used for inputs
+        that do not fit in memory.
+        
+        Args:
+            instances: The Pydantic model instances to store
+            batch_size: The maximum number of instances per request
+            max_in_flight: The maximum number of batches being stored at once
+            bulk: If True, store batches through the Graph Store Protocol
+                endpoint instead of SPARQL updates
+            
+        Returns:
+            A dictionary with the total succeeded and failed counts and a
+            "batches" list with the model, succeeded and failed counts of
+            each batch, in the order the batches were flushed
+        """
+        reports: List[Any] = []
+        in_flight: List[Future] = []
+        pool = ThreadPoolExecutor(max_workers=max_in_flight) if max_in_flight > 1 else None
+        
+        try:
+            for batch in self._batches(instances, batch_size):
+                if pool is None:
+                    reports.append(self._store_batch(batch, bulk))
+                    continue
+                while len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.remove(future)
+                future = pool.submit(self._store_batch, batch, bulk)
+                in_flight.append(future)
+                reports.append(future)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        
+        batches = [report.result() if isinstance(report, Future) else report
+                   for report in reports]
+        return {
+            "succeeded": sum(batch["succeeded"] for batch in batches),
+            "failed": sum(batch["failed"] for batch in batches),
+            "batches": batches
+        }
+    
+    def upsert_instances(self, instances: Iterable[BaseModel],
+                         batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Store instances, replacing what is stored under the same IRIs.
+        
+        Instances are grouped by model into batches. For each batch the
+        triples stored for its subjects, including nested instances, are
+        fetched and compared with the instances' triples, and only the
+        difference is sent, as one DELETE DATA / INSERT DATA update. A
+        batch that is already stored sends no update. Nested instances no
+        longer referenced are left in place, since other instances may
+        share them.
+        
+        Only models with a key field can be upserted. A model named by a
+        hash of its content would store a changed instance under a new
+        IRI, beside the old one, so nothing would ever be replaced.
+        
+        Args:
+            instances: The Pydantic model instances to store
+            batch_size: The maximum number of instances per update
+            
+        Returns:
+            A dictionary with the total succeeded and failed counts, the
+            number of triples inserted and deleted, and a "batches" list
+            with the same for each batch
+            
+        Raises:
+            ValueError: If an instance's model has no key field; the
+                batches before it have already been stored
+        """
+        batches = [self._upsert_batch(batch)
+                   for batch in self._batches(self._keyed(instances), batch_size)]
+        
+        return {
+            "succeeded": sum(batch["succeeded"] for batch in batches),
+            "failed": sum(batch["failed"] for batch in batches),
+            "inserted": sum(batch["inserted"] for batch in batches),
+            "deleted": sum(batch["deleted"] for batch in batches),
+            "batches": batches
+        }
+    
+    def _batches(self, instances: Iterable[BaseModel],
+                 batch_size: int) -> Iterator[Dict[str, Any]]:
+        """
+        Group instances by model into batches of serialized N-Triples.
+        
+        Each model is registered the first time one of its instances is
+        seen; instances of models that fail to register, or that fail to
+        serialize, are counted as failed. A batch is yielded once it holds
+        batch_size instances, and the rest when the input runs out.
+        
+        Args:
+            instances: The Pydantic model instances
+            batch_size: The maximum number of instances per batch
+            
+        Yields:
+            Batches with the model name, N-Triples lines, the number of
+            instances serialized ("size") and the number that failed
+        """
+        pending: Dict[str, Dict[str, Any]] = {}
+        registered = set()
+        
+        for instance in instances:
+            model_class = instance.__class__
+            model_name = model_class.__name__
+            
+            batch = pending.get(model_name)
+            if batch is None:
+                batch = pending[model_name] = {
+                    "model": model_name, "lines": [], "size": 0, "failed": 0
+                }
+            
+            # Check the registry once per model rather than once per instance
+            if model_name not in registered:
+                if (self.model_registry.get_model(model_name)
+                        or self.register_model(model_class)):
+                    registered.add(model_name)
+                else:
+                    batch["failed"] += 1
+                    continue
+            
+            lines = batch["lines"]
+            mark = len(lines)
+            try:
+                self.serializer.write(instance, lines)
+                batch["size"] += 1
+            except Exception as e:
+                print(f"Failed to convert {model_name} instance: {e}")
+                del lines[mark:]
+                batch["failed"] += 1
+            
+            if batch["size"] + batch["failed"] >= batch_size:
+                yield pending.pop(model_name)
+        
+        for model_name in list(pending):
+            yield pending.pop(model_name)
+    
+    def _keyed(self, instances: Iterable[BaseModel]) -> Iterator[BaseModel]:
+        """
+        Pass instances through, checking that their models have a key field.
+        
+        Raises:
+            ValueError: If a model is named by a hash of its content
+        """
+        checked = set()
+        for instance in instances:
+            model_class = instance.__class__
+            if model_class not in checked:
+                if self.serializer.iri_key(model_class) is None:
+                    raise ValueError(
+                        f"Cannot upsert {model_class.__name__}: it has no key field; "
+                        "set one with set_iri_key or Config.iri_key"
+                    )
+                checked.add(model_class)
+            yield instance
+    
+    def _upsert_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send the difference between one batch of upserted instances and the store.
+        
+        Args:
+            batch: The batch, with its model name, N-Triples lines and counts
+            
+        Returns:
+            A dictionary with the model, succeeded and failed counts and
+            the number of triples inserted and deleted
+        """
+        report = {"model": batch["model"], "succeeded": 0,
+                  "failed": batch["failed"] + batch["size"], "inserted": 0, "deleted": 0}
+        if batch["size"] == 0:
+            return report
+        
+        graph_uri = f"{self.store.data_graph_uri}/{batch['model']}"
+        desired = Graph()
+        desired.parse(data="".join(batch["lines"]), format="nt")
+        wanted = {self._triple_key(triple): triple for triple in desired}
+        
+        try:
+            stored = {}
+            subjects = sorted(set(desired.subjects()))
+            for start in range(0, len(subjects), 500):
+                values = " ".join(f"<{subject}>" for subject in subjects[start:start + 500])
+                query = f"""
+                SELECT ?s ?p ?o
+                WHERE {{
+                    VALUES ?s {{ {values} }}
+                    GRAPH <{graph_uri}> {{ ?s ?p ?o }}
+                }}
+                """
+                for row in self.store.query.iter_select(query):
+                    triple = (row["s"], row["p"], row["o"])
+                    stored[self._triple_key(triple)] = triple
+        except Exception as e:
+            print(f"Failed to read stored {batch['model']} instances: {e}")
+            return report
+        
+        # Delete the stored forms, insert the wanted ones
+        deletes = [stored[key] for key in stored.keys() - wanted.keys()]
+        inserts = [wanted[key] for key in wanted.keys() - stored.keys()]
+        operations = []
+        if deletes:
+            operations.append(f"DELETE DATA {{ GRAPH <{graph_uri}> {{ "
+                              f"{''.join(nt_line(*triple) for triple in deletes)} }} }}")
+        if inserts:
+            operations.append(f"INSERT DATA {{ GRAPH <{graph_uri}> {{ "
+                              f"{''.join(nt_line(*triple) for triple in inserts)} }} }}")
+        
+        if operations and not self.store.update.execute_update(" ;\n".join(operations),
+                                                               [graph_uri]):
+            return report
+        
+        report.update(succeeded=batch["size"], failed=batch["failed"],
+                      inserted=len(inserts), deleted=len(deletes))
+        return report
+    
+    @staticmethod
+    def _triple_key(triple: tuple) -> tuple:
+        """
+        Key a triple so that literals compare by value.
+        
+        The store may return a typed literal in a different lexical form
+        than it was written in, for example "1.50"^^xsd:decimal as "1.5",
+        so typed literals are compared by datatype and Python value.
+        
+        Args:
+            triple: The (subject, predicate, object) triple
+            
+        Returns:
+            A hashable key equal for triples with the same values
+        """
+        subject, predicate, obj = triple
+        if type(obj) is Literal and obj.datatype is not None:
+            value = obj.toPython()
+            if value is not obj:
+                # NaN is not equal to itself
+                return subject, predicate, (obj.datatype, "NaN" if value != value else value)
+        return triple
+    
+    def _store_batch(self, batch: Dict[str, Any], bulk: bool) -> Dict[str, Any]:
+        """
+        Store one batch of instances.
+        
+        Args:
+            batch: The batch, with its model name, N-Triples lines and counts
+            bulk: Whether to store through the Graph Store Protocol endpoint
+            
+        Returns:
+            A dictionary with the model, succeeded and failed counts
+        """
+        success = batch["size"] == 0 or self.store.store_instance_data(
+            "".join(batch["lines"]), batch["model"], bulk=bulk)
+        
+        return {
+            "model": batch["model"],
+            "succeeded": batch["size"] if success else 0,
+            "failed": batch["failed"] + (0 if success else batch["size"])
+        }
+    
+    def load_instances(self, model_class: Type[BaseModel],
+                       filter: Optional[Union[Dict[str, Any], str]] = None,
+                       limit: Optional[int] = None) -> Iterator[BaseModel]:
+        """
+        Load instances of a model from the RDF store.
+        
+        Args:
+            model_class: The Pydantic model class
+            filter: Either a dictionary of field values the instances must
+                have, or a SPARQL group graph pattern over ?s
+            limit: The maximum number of instances to load
+            
+        Returns:
+            An iterator over the validated instances, fetched a page at a time
+        """
+        return self.instance_loader.load(model_class, filter=filter, limit=limit)
     
     def validate_instance(self, instance: BaseModel) -> Dict[str, Any]:
         """
@@ -88,80 +416,93 @@ class LangGraphSemantic:
         """
         return self.model_registry.validate_instance(instance)
     
-    def create_memory(self, memory_key: str = "semantic_memory") -> SemanticMemory:
+    def validate_batch(self, instances: List[BaseModel]) -> Dict[str, Any]:
+        """
+        Validate a batch of instances of one model against its SHACL shape.
+        
+        Each constraint is checked for the whole batch at once, which is
+        faster than validating the instances one by one.
+        
+        Args:
+            instances: The Pydantic model instances to validate, all of
+                the same class
+            
+        Returns:
+            A dictionary with "valid", a per-instance "conforms" mask and
+            the "results" of each instance
+        """
+        return self.model_registry.validate_batch(instances)
+    
+    def create_memory(self, memory_key: str = "semantic_memory",
+                      session_id: str = "default", k: int = 10,
+                      flush_size: int = 20,
+                      flush_interval: Optional[float] = 1.0,
+                      max_pending: int = 1000) -> SemanticMemory:
         """
         Create a SemanticMemory instance for use with LangChain.
         
         Args:
             memory_key: The key to use for memory in chain inputs/outputs
+            session_id: The conversation the memory belongs to
+            k: The number of most recent turns to load
+            flush_size: The number of pending turns that triggers a write
+            flush_interval: Seconds between background writes of pending
+                turns, or None to only write on flush_size and flush()
+            max_pending: The maximum number of unwritten turns kept
             
         Returns:
             A SemanticMemory instance
         """
-        return SemanticMemory(self.store, memory_key)
+        return SemanticMemory(self.store, memory_key, session_id=session_id, k=k,
+                              flush_size=flush_size, flush_interval=flush_interval,
+                              max_pending=max_pending)
     
-    def create_retriever(self) -> SemanticRetriever:
+    def create_retriever(self, k: int = 5, text_index: bool = False,
+                         embedder: Optional[Embedder] = None,
+                         vector_index_path: Optional[str] = None,
+                         graph_filter: Optional[str] = None,
+                         expand: bool = True,
+                         track_changes: bool = False,
+                         modified_predicate: Optional[str] = None) -> SemanticRetriever:
         """
         Create a SemanticRetriever instance for use with LangChain.
         
+        Args:
+            k: The number of documents to return
+            text_index: Whether to query the dataset's Jena text index
+                instead of an in-process index
+            embedder: A function embedding a list of texts, to rank
+                documents by vector similarity
+            vector_index_path: A directory to keep the vector index in
+            graph_filter: A SPARQL group graph pattern over ?doc that
+                vector hits must match
+            expand: Whether to add the graph neighbours of vector hits
+            track_changes: Whether to update the local index from changes
+                instead of reloading it
+            modified_predicate: The IRI of a modification timestamp to
+                poll for, with track_changes
+        
         Returns:
             A SemanticRetriever instance
         """
-        return SemanticRetriever(self.store)
+        return SemanticRetriever(self.store, k=k, text_index=text_index, embedder=embedder,
+                                 vector_index_path=vector_index_path,
+                                 graph_filter=graph_filter, expand=expand,
+                                 track_changes=track_changes,
+                                 modified_predicate=modified_predicate)
     
-    def _instance_to_rdf(self, instance: BaseModel) -> Graph:
+    def _instance_to_rdf(self, instance: BaseModel, graph: Optional[Graph] = None) -> Graph:
         """
         Convert a Pydantic model instance to an RDF graph.
         
         Args:
             instance: The Pydantic model instance to convert
+            graph: An existing graph to add the triples to, instead of a new one
             
         Returns:
             An RDFLib Graph containing the instance data
         """
-        from rdflib import URIRef, Literal
-        
-        model_name = instance.__class__.__name__
-        graph = Graph()
-        
-        # Create a URI for the instance
-        instance_uri = URIRef(f"{self.base_namespace}{model_name}_{id(instance)}")
-        
-        # Add type triple
-        graph.add((instance_uri, URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"), 
-                  URIRef(f"{self.base_namespace}{model_name}")))
-        
-        # Add property triples
-        for field_name, field_value in instance.dict().items():
-            if field_value is not None:
-                if isinstance(field_value, (str, int, float, bool)):
-                    graph.add((instance_uri, URIRef(f"{self.base_namespace}{field_name}"), 
-                              Literal(field_value)))
-                elif isinstance(field_value, list):
-                    for i, item in enumerate(field_value):
-                        if isinstance(item, (str, int, float, bool)):
-                            graph.add((instance_uri, URIRef(f"{self.base_namespace}{field_name}"), 
-                                      Literal(item)))
-                        elif isinstance(item, BaseModel):
-                            # Handle nested models
-                            nested_graph = self._instance_to_rdf(item)
-                            graph += nested_graph
-                            
-                            # Link to the nested instance
-                            nested_uri = URIRef(f"{self.base_namespace}{item.__class__.__name__}_{id(item)}")
-                            graph.add((instance_uri, URIRef(f"{self.base_namespace}{field_name}"), 
-                                      nested_uri))
-                elif isinstance(field_value, BaseModel):
-                    # Handle nested models
-                    nested_graph = self._instance_to_rdf(field_value)
-                    graph += nested_graph
-                    
-                    # Link to the nested instance
-                    nested_uri = URIRef(f"{self.base_namespace}{field_value.__class__.__name__}_{id(field_value)}")
-                    graph.add((instance_uri, URIRef(f"{self.base_namespace}{field_name}"), 
-                              nested_uri))
-        
-        return graph
+        return self.serializer.to_graph(instance, graph)
 
 
 # Export main classes
@@ -0,0 +1,199 @@
+"""
+Load balancing of queries over read replicas.
+
+This module keeps track of a set of read endpoints, such as Fuseki
+replicas of a write primary, and picks one for each query: the one with
+the fewest requests in flight, or with the lowest expected latency.
+Endpoints are health checked passively. One that keeps failing is left
+out for a while, rather than being probed in the background.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+LEAST_OUTSTANDING = "least_outstanding"
+LATENCY = "latency"
+
+
+class Endpoint:
+    """The state of one read endpoint."""
+
+    def __init__(self, url: str):
+        """
+        Initialize the Endpoint.
+
+        Args:
+            url: The URL of the SPARQL query endpoint
+        """
+        self.url = url
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """The endpoint's counters."""
+        return {"url": self.url, "outstanding": self.outstanding, "latency": self.latency,
+                "requests": self.requests, "errors": self.errors,
+                "healthy": self.down_until <= time.monotonic()}
+
+
+class ReplicaBalancer:
+    """
+    Picks a read endpoint for each query.
+
+    With the least_outstanding strategy the endpoint with the fewest
+    requests in flight is picked. With the latency strategy each endpoint's
+    latency is tracked as an exponentially weighted moving average, and
+    the endpoint with the lowest latency times (requests in flight + 1) is
+    picked, so a slow replica gets less traffic but is not starved. Ties
+    are broken at random.
+
+    After failure_threshold failures in a row an endpoint is marked down
+    for cooldown seconds, then gets traffic again; a single success marks
+    it healthy. Failures only count if they are transient or refused by
+    a circuit breaker (see resilience.is_unavailable), so a malformed
+    query does not take a replica out.
+    """
+
+    def __init__(self, urls: Iterable[str], strategy: str = LEAST_OUTSTANDING,
+                 failure_threshold: int = 3, cooldown: float = 10.0,
+                 smoothing: float = 0.2):
+        """
+        Initialize the ReplicaBalancer.
+
+        Args:
+            urls: The URLs of the SPARQL query endpoints
+            strategy: "least_outstanding" or "latency"
+            failure_threshold: The number of failures in a row that marks an endpoint down
+            cooldown: Seconds an endpoint stays down
+            smoothing: The weight of the newest sample in the latency average
+
+        Raises:
+            ValueError: If the strategy is unknown or there are no endpoints
+        """
+        if strategy not in (LEAST_OUTSTANDING, LATENCY):
+            raise ValueError(f"Unknown balancing strategy: {strategy}")
+        self.endpoints = [Endpoint(url) for url in urls]
+        if not self.endpoints:
+            raise ValueError("No read endpoints given")
+        self.strategy = strategy
+        self.failure_threshold = max(failure_threshold, 1)
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Optional[Endpoint]:
+        """
+        Pick a healthy endpoint and count a request in flight on it.
+
+        Args:
+            exclude: The URLs of endpoints not to pick
+
+        Returns:
+            The endpoint, or None if every endpoint not excluded is down.
+            Pass the endpoint to release() once the request is done.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints
+                          if endpoint.down_until <= now and endpoint.url not in exclude]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=self._cost)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, elapsed: float, failed: bool = False) -> None:
+        """
+        Record the outcome of a request sent to an endpoint.
+
+        Args:
+            endpoint: The endpoint returned by acquire()
+            elapsed: Seconds the request took
+            failed: Whether the request failed with a transient error
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.failures >= self.failure_threshold:
+                    endpoint.down_until = time.monotonic() + self.cooldown
+                    endpoint.failures = 0
+                return
+            endpoint.failures = 0
+            endpoint.down_until = 0.0
+            if endpoint.latency is None:
+                endpoint.latency = elapsed
+            else:
+                endpoint.latency += self.smoothing * (elapsed - endpoint.latency)
+
+    def send(self, request: Callable[[str], Any], fallback: Callable[[], Any],
+             is_failure: Callable[[Exception], bool],
+             hold: Optional[Callable[[Any, Callable[[], None]], Any]] = None) -> Any:
+        """
+        Send a request to the best endpoint, failing over to the others.
+
+        Args:
+            request: Sends the request to the endpoint URL it is given
+            fallback: Sends the request elsewhere when every endpoint is down
+            is_failure: Whether an error counts against the endpoint's health
+                and should be retried on another endpoint
+            hold: For results still in use after they are returned, such as
+                streamed responses: called with the result and a function
+                that releases the endpoint, which it must see is called
+                once the result is done with. What it returns is returned.
+                The endpoint's latency is still measured until the result
+                was returned.
+
+        Returns:
+            The result of the request
+        """
+        tried: List[str] = []
+        while True:
+            endpoint = self.acquire(tried)
+            if endpoint is None:
+                return fallback()
+            tried.append(endpoint.url)
+            start = time.monotonic()
+            try:
+                result = request(endpoint.url)
+            except Exception as e:
+                failed = is_failure(e)
+                self.release(endpoint, time.monotonic() - start, failed=failed)
+                if not failed:
+                    raise
+                continue
+            elapsed = time.monotonic() - start
+            if hold is not None:
+                return hold(result, lambda: self.release(endpoint, elapsed))
+            self.release(endpoint, elapsed)
+            return result
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the counters of every endpoint.
+
+        Returns:
+            One dictionary per endpoint, with its URL, requests in flight,
+            average latency, requests, failed requests and health
+        """
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
+
+    def _cost(self, endpoint: Endpoint) -> tuple:
+        """The sort key of an endpoint; the lock must be held."""
+        if self.strategy == LATENCY:
+            # Untried endpoints go first, so every endpoint gets a latency
+            cost = (endpoint.outstanding + 1) * (endpoint.latency or 0.0)
+        else:
+            cost = endpoint.outstanding
+        return cost, self._random.random()
@@ -0,0 +1,590 @@
+"""
+Retries, deadlines and circuit breaking for store requests.
+
+This module provides a transport that wraps another one. Requests that
+fail because the store is overloaded or unreachable are retried a bounded
+number of times, with exponential backoff and jitter, within a deadline.
+While the store keeps failing, a circuit breaker fails requests at once
+instead of adding to its load, and lets a single request through now and
+then to find out whether it has recovered. Retries, failures, refusals
+and breaker states are reported to the instrumentation layer when it is
+enabled.
+"""
+
+import random
+import re
+import socket
+import threading
+import time
+import urllib.error
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+from SPARQLWrapper.SPARQLExceptions import (
+    EndPointInternalError,
+    EndPointNotFound,
+    QueryBadFormed,
+    URITooLong,
+    Unauthorized,
+)
+
+from langgraphsemantic.instrumentation import metrics
+from langgraphsemantic.transport import (
+    SPARQLTransport,
+    SessionTransport,
+    TransportResponse,
+    N_TRIPLES_MEDIA_TYPE,
+    N_QUADS_MEDIA_TYPE,
+)
+
+
+# Statuses meaning the store is overloaded or unreachable right now
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+# Statuses meaning the store refused the request without acting on it
+REFUSED_STATUSES = frozenset({429, 503})
+
+# SPARQLWrapper raises these instead of urllib's HTTPError for some statuses
+_SPARQLWRAPPER_STATUSES = ((QueryBadFormed, 400), (Unauthorized, 401), (EndPointNotFound, 404),
+                           (URITooLong, 414), (EndPointInternalError, 500))
+
+# Socket errors raised when the store cannot be reached or does not answer
+_NETWORK_ERRORS = (ConnectionError, TimeoutError, socket.timeout, socket.gaierror)
+
+_LITERAL_RE = re.compile(r'<[^<>"{}|^`\\\s]*>'
+                         r'|"""(?:[^"\\]|\\.|"(?!""))*"""'
+                         r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+                         r'|"(?:[^"\\\n]|\\.)*"'
+                         r"|'(?:[^'\\\n]|\\.)*'"
+                         r"|#[^\n]*", re.DOTALL)
+_OPERATION_RE = re.compile(r"\b(INSERT|DELETE|LOAD|CLEAR|CREATE|DROP|COPY|MOVE|ADD|WITH)\b"
+                           r"(\s+DATA\b)?", re.IGNORECASE)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+    pass
+
+
+def is_idempotent_update(update: str) -> bool:
+    """
+    Check whether sending a SPARQL update twice has the same effect as once.
+
+    Only updates made of INSERT DATA and DELETE DATA operations without
+    blank nodes are treated as idempotent. The check errs on the safe
+    side: anything it cannot rule out is reported as not idempotent.
+
+    Args:
+        update: The SPARQL UPDATE string
+
+    Returns:
+        True if the update can safely be repeated, False otherwise
+    """
+    # Drop IRIs, strings and comments, whose text could look like syntax
+    text = _LITERAL_RE.sub(" ", update)
+    if "_:" in text or "[" in text or "(" in text:
+        return False
+    operations = _OPERATION_RE.findall(text)
+    return bool(operations) and all(data for _, data in operations)
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Check whether a failed request might succeed if sent again.
+
+    Errors from requests, urllib, SPARQLWrapper and sockets are understood.
+
+    Args:
+        error: The exception raised by the transport
+
+    Returns:
+        True for connection failures, timeouts and overload statuses
+    """
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, urllib.error.URLError):
+        error = error.reason
+    return isinstance(error, _NETWORK_ERRORS)
+
+
+def is_unavailable(error: Exception) -> bool:
+    """
+    Check whether a request failed because its endpoint is unhealthy.
+
+    Such a request can be sent to another endpoint, or again later.
+
+    Args:
+        error: The exception raised by the transport
+
+    Returns:
+        True for transient errors and for requests refused by an open
+        circuit breaker
+    """
+    return isinstance(error, CircuitOpenError) or is_transient(error)
+
+
+def was_refused(error: Exception) -> bool:
+    """
+    Check whether a failed request certainly did not reach the store's data.
+
+    Such requests can be sent again even if they are not idempotent.
+
+    Args:
+        error: The exception raised by the transport
+
+    Returns:
+        True if the connection could not be made or the store refused
+        the request, False if it may have been applied
+    """
+    status = _status(error)
+    if status is not None:
+        return status in REFUSED_STATUSES
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return type(reason).__name__ == "NewConnectionError"
+    if isinstance(error, urllib.error.URLError):
+        error = error.reason
+    return isinstance(error, (ConnectionRefusedError, socket.gaierror))
+
+
+def _status(error: Exception) -> Optional[int]:
+    """Get the HTTP status of a failed request, if there was a response."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code
+    for error_type, status in _SPARQLWRAPPER_STATUSES:
+        if isinstance(error, error_type):
+            return status
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Get the delay asked for by a Retry-After header, in seconds."""
+    if isinstance(error, urllib.error.HTTPError):
+        headers = error.headers
+    else:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        # HTTP dates are not worth parsing here
+        return None
+
+
+def _origin(url: str) -> str:
+    """Get the scheme, host and port of a URL, which name the server it is sent to."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class RetryPolicy:
+    """
+    How often and how long to retry a failed request.
+
+    The delay before retry n is drawn uniformly between 0 and
+    min(max_delay, base_delay * 2 ** (n - 1)) ("full jitter"), so clients
+    that failed together do not retry together. A Retry-After header
+    from the store raises the delay to what the store asked for. No retry
+    is started if it could not finish before the deadline.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.05,
+                 max_delay: float = 2.0, deadline: Optional[float] = 30.0,
+                 seed: Optional[int] = None):
+        """
+        Initialize the RetryPolicy.
+
+        Args:
+            max_attempts: The maximum number of times a request is sent
+            base_delay: Seconds of the largest delay before the first retry
+            max_delay: Seconds of the largest delay before any retry
+            deadline: Seconds a request may take, over all its attempts,
+                or None for no deadline
+            seed: Seed for the jitter, for reproducible delays
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._random = random.Random(seed)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the delay before retrying a request.
+
+        Args:
+            attempt: The number of attempts made so far
+            retry_after: Seconds the store asked the client to wait, if any
+
+        Returns:
+            Seconds to wait
+        """
+        delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast while the store keeps failing.
+
+    The breaker starts closed. After failure_threshold transient failures
+    in a row it opens, and every request is refused with CircuitOpenError.
+    After reset_timeout seconds it is half open: one request is let
+    through as a probe. If the probe succeeds the breaker closes again;
+    if it fails the breaker opens for another reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # The value of each state in the resilience.breaker_state gauge
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            failure_threshold: The number of failures in a row that opens the breaker
+            reset_timeout: Seconds the breaker stays open before letting a probe through
+            clock: The clock, in seconds
+        """
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.rejections = 0
+        self._changed = clock()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Ask whether a request may be sent now.
+
+        Returns:
+            True if the request may be sent, False if it must be refused
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # A half-open probe that never reported back does not block forever
+            if self.clock() - self._changed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._changed = self.clock()
+                return True
+            self.rejections += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record that the store answered a request."""
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self._changed = self.clock()
+
+    def record_failure(self) -> None:
+        """Record that a request failed because the store is unhealthy."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED
+                                                and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._changed = self.clock()
+                self.opens += 1
+
+    def copy(self) -> "CircuitBreaker":
+        """
+        Get a new, closed breaker with the same settings.
+
+        Returns:
+            The new breaker
+        """
+        return type(self)(self.failure_threshold, self.reset_timeout, self.clock)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker state and counters.
+
+        Returns:
+            A dictionary with the state, the current run of failures, and
+            the number of times the breaker opened and requests it refused
+        """
+        return {"state": self.state, "failures": self.failures,
+                "opens": self.opens, "rejections": self.rejections}
+
+
+class ResilientTransport(SPARQLTransport):
+    """
+    Transport adding retries, deadlines and a circuit breaker to another transport.
+
+    Queries are retried on connection failures, timeouts and overload
+    statuses (429, 502, 503 and 504). Updates are retried the same way
+    only if they are idempotent (see is_idempotent_update); otherwise only
+    when the store certainly did not act on them. Data uploads are
+    retried like idempotent updates when the body is N-Triples or N-Quads
+    without blank nodes, and never when the body is streamed, since it
+    cannot be sent again. Other errors are raised at once. An error
+    response, such as to a malformed query, counts as the store being
+    healthy; an error without a response counts neither way.
+
+    Each server the requests go to, identified by the scheme, host and
+    port of the endpoint URL, has its own circuit breaker, so a failing
+    read replica does not shut off the primary. Callers that can send a
+    request to another server instead, as a ReplicaBalancer does, can ask
+    for a single attempt with single_attempt().
+
+    While instrumentation is enabled, the counters in stats() are also
+    counted as resilience.<counter> metrics, requests refused by a breaker
+    as resilience.rejections, and each breaker's state is kept in the
+    resilience.breaker_state gauge, labelled with its server (see
+    CircuitBreaker.STATE_VALUES).
+
+    The deadline of the retry policy caps each attempt's timeouts when
+    the wrapped transport supports it, as SessionTransport does. A
+    streamed response is only covered until its headers arrive.
+    """
+
+    def __init__(self, transport: Optional[SPARQLTransport] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the ResilientTransport.
+
+        Args:
+            transport: The transport to wrap (defaults to a pooled SessionTransport)
+            retry: The retry policy (defaults to RetryPolicy())
+            breaker: The circuit breaker settings (defaults to
+                CircuitBreaker()); each server gets a copy
+            sleep: Called to wait between attempts
+        """
+        self.transport = transport or SessionTransport()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadlines_exceeded = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def query(self, endpoint: str, query: str, accept: str,
+              stream: bool = False) -> TransportResponse:
+        """
+        Send a SPARQL query, retrying transient failures.
+
+        Args:
+            endpoint: The URL of the SPARQL query endpoint
+            query: The SPARQL query string
+            accept: The media type to request for the results
+            stream: Whether to stream the response body instead of buffering it
+
+        Returns:
+            The response from the endpoint
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+        """
+        return self._send(endpoint,
+                          lambda: self.transport.query(endpoint, query, accept, stream=stream),
+                          idempotent=True)
+
+    def update(self, endpoint: str, update: str) -> TransportResponse:
+        """
+        Send a SPARQL update, retrying transient failures if it is safe to.
+
+        Args:
+            endpoint: The URL of the SPARQL update endpoint
+            update: The SPARQL UPDATE string
+
+        Returns:
+            The response from the endpoint
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+        """
+        return self._send(endpoint, lambda: self.transport.update(endpoint, update),
+                          idempotent=is_idempotent_update(update))
+
+    def post_data(self, url: str, body: Union[bytes, Iterable[bytes]],
+                  content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        """
+        POST RDF data, retrying transient failures if it is safe to.
+
+        Args:
+            url: The URL to post to
+            body: The request body, or an iterable of byte blocks to stream
+            content_type: The media type of the body
+            params: Optional query string parameters
+
+        Returns:
+            The response from the endpoint
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+        """
+        replayable = isinstance(body, bytes)
+        idempotent = (replayable and content_type in (N_TRIPLES_MEDIA_TYPE, N_QUADS_MEDIA_TYPE)
+                      and b"_:" not in body)
+        return self._send(url, lambda: self.transport.post_data(url, body, content_type, params),
+                          idempotent=idempotent, replayable=replayable)
+
+    def close(self) -> None:
+        """Close the wrapped transport."""
+        self.transport.close()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of the server a URL points to.
+
+        Args:
+            url: The URL of an endpoint
+
+        Returns:
+            The breaker, created on first use
+        """
+        return self._breaker(_origin(url))
+
+    def _breaker(self, origin: str) -> CircuitBreaker:
+        """Get the circuit breaker of a server, creating it on first use."""
+        with self._lock:
+            breaker = self._breakers.get(origin)
+            if breaker is None:
+                breaker = self._breakers[origin] = self.breaker.copy()
+            return breaker
+
+    @contextmanager
+    def single_attempt(self):
+        """Send the requests made by this thread within the block only once."""
+        previous = getattr(self._local, "single_attempt", False)
+        self._local.single_attempt = True
+        try:
+            yield
+        finally:
+            self._local.single_attempt = previous
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the retry counters and the circuit breaker states.
+
+        Returns:
+            A dictionary with the number of requests, attempts, retries,
+            requests that failed and requests that ran out of time, and
+            under "breakers" the state and counters of each server's breaker
+        """
+        stats = {"requests": self.requests, "attempts": self.attempts,
+                 "retries": self.retries, "failures": self.failures,
+                 "deadlines_exceeded": self.deadlines_exceeded}
+        with self._lock:
+            breakers = dict(self._breakers)
+        stats["breakers"] = {origin: breaker.stats() for origin, breaker in breakers.items()}
+        return stats
+
+    def _send(self, url: str, send: Callable[[], TransportResponse], idempotent: bool,
+              replayable: bool = True) -> TransportResponse:
+        """
+        Send a request through the circuit breaker, retrying as the policy allows.
+
+        Args:
+            url: The URL the request is sent to
+            send: Sends the request once
+            idempotent: Whether the request may be repeated after any transient failure
+            replayable: Whether the request can be sent more than once at all
+
+        Returns:
+            The response from the endpoint
+        """
+        origin = _origin(url)
+        breaker = self._breaker(origin)
+        try:
+            return self._attempt(breaker, send, idempotent, replayable)
+        finally:
+            if metrics.enabled:
+                metrics.gauge("resilience.breaker_state", breaker.STATE_VALUES[breaker.state],
+                              origin=origin)
+
+    def _attempt(self, breaker: CircuitBreaker, send: Callable[[], TransportResponse],
+                 idempotent: bool, replayable: bool) -> TransportResponse:
+        """
+        Send a request through a circuit breaker until it succeeds or may not be retried.
+
+        Args:
+            breaker: The breaker of the server the request is sent to
+            send: Sends the request once
+            idempotent: Whether the request may be repeated after any transient failure
+            replayable: Whether the request can be sent more than once at all
+
+        Returns:
+            The response from the endpoint
+        """
+        policy = self.retry
+        max_attempts = 1 if getattr(self._local, "single_attempt", False) else policy.max_attempts
+        deadline = time.monotonic() + policy.deadline if policy.deadline is not None else None
+        attempt = 0
+        self._count("requests")
+
+        while True:
+            if not breaker.allow():
+                self._count("failures")
+                metrics.count("resilience.rejections")
+                raise CircuitOpenError("The store is failing; request not sent")
+            attempt += 1
+            self._count("attempts")
+            try:
+                with self._deadline(deadline):
+                    response = send()
+            except Exception as e:
+                if not is_transient(e):
+                    if _status(e) is not None:
+                        # The store answered, so it is healthy
+                        breaker.record_success()
+                    self._count("failures")
+                    raise
+                breaker.record_failure()
+                if (attempt >= max_attempts or not replayable
+                        or not (idempotent or was_refused(e))):
+                    self._count("failures")
+                    raise
+                delay = policy.delay(attempt, _retry_after(e))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    self._count("failures")
+                    self._count("deadlines_exceeded")
+                    raise
+                self._count("retries")
+                self.sleep(delay)
+                continue
+            breaker.record_success()
+            return response
+
+    def _deadline(self, deadline: Optional[float]):
+        """Cap the wrapped transport's timeouts at a deadline, if it supports that."""
+        if deadline is None or not hasattr(self.transport, "deadline"):
+            return nullcontext()
+        return self.transport.deadline(deadline - time.monotonic())
+
+    def _count(self, counter: str) -> None:
+        """Increment a counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if metrics.enabled:
+            metrics.count(f"resilience.{counter}")
@@ -0,0 +1,319 @@
+"""
+Decoding of SPARQL result formats.
+
+This module provides incremental decoders for SPARQL SELECT results, so
+that rows can be produced as the response arrives instead of after the
+whole document has been read and parsed.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rdflib import URIRef, Literal, BNode
+from rdflib.namespace import XSD
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+# Turtle string escapes allowed in TSV literals
+_ESCAPE_RE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_ESCAPES = {
+    "t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f",
+    '"': '"', "'": "'", "\\": "\\",
+}
+
+# Datatypes of the abbreviated numeric and boolean literal forms
+_INTEGER_RE = re.compile(r'^[+-]?\d+$')
+_DECIMAL_RE = re.compile(r'^[+-]?\d*\.\d+$')
+
+# Column kinds for numeric and boolean datatypes; anything else is a string column
+_INTEGER_TYPES = {
+    str(XSD[name]) for name in (
+        "integer", "int", "long", "short", "byte",
+        "nonNegativeInteger", "positiveInteger", "nonPositiveInteger", "negativeInteger",
+        "unsignedLong", "unsignedInt", "unsignedShort", "unsignedByte",
+    )
+}
+_FLOAT_TYPES = {str(XSD.decimal), str(XSD.double), str(XSD.float)}
+_BOOLEAN_TYPE = str(XSD.boolean)
+
+
+def _unescape_match(match: "re.Match") -> str:
+    """Replace a single Turtle escape sequence."""
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return _ESCAPES.get(escape, escape)
+
+
+def unescape_string(text: str) -> str:
+    """
+    Undo Turtle string escaping.
+
+    Args:
+        text: The escaped string body, without quotes
+
+    Returns:
+        The unescaped string
+    """
+    if "\\" not in text:
+        return text
+    return _ESCAPE_RE.sub(_unescape_match, text)
+
+
+def split_tsv_term(text: str) -> Tuple[str, str, Optional[str], Optional[str]]:
+    """
+    Split an RDF term written in SPARQL TSV syntax into its parts.
+
+    Args:
+        text: The term as it appears in a TSV results cell
+
+    Returns:
+        A tuple of (kind, value, datatype, language), where kind is
+        "uri", "literal" or "bnode"
+    """
+    first = text[0]
+
+    if first == "<":
+        return "uri", text[1:-1], None, None
+
+    if first == '"' or first == "'":
+        end = text.rfind(first)
+        value = unescape_string(text[1:end])
+        suffix = text[end + 1:]
+        if not suffix:
+            return "literal", value, None, None
+        if suffix[0] == "@":
+            return "literal", value, None, suffix[1:]
+        return "literal", value, suffix[3:-1], None
+
+    if first == "_" and text.startswith("_:"):
+        return "bnode", text[2:], None, None
+
+    # Abbreviated literal forms
+    if text == "true" or text == "false":
+        return "literal", text, str(XSD.boolean), None
+    if _INTEGER_RE.match(text):
+        return "literal", text, str(XSD.integer), None
+    if _DECIMAL_RE.match(text):
+        return "literal", text, str(XSD.decimal), None
+    return "literal", text, str(XSD.double), None
+
+
+def convert_tsv_term(text: str) -> Any:
+    """
+    Convert an RDF term written in SPARQL TSV syntax to an RDFLib term.
+
+    The result is the same as QueryExecutor._convert_binding_value gives
+    for the equivalent SPARQL JSON binding.
+
+    Args:
+        text: The term as it appears in a TSV results cell
+
+    Returns:
+        The corresponding URIRef, Literal or BNode
+    """
+    kind, value, datatype, lang = split_tsv_term(text)
+
+    if kind == "uri":
+        return URIRef(value)
+    elif kind == "bnode":
+        return BNode(value)
+    elif datatype:
+        return Literal(value, datatype=URIRef(datatype))
+    elif lang:
+        return Literal(value, lang=lang)
+    else:
+        return Literal(value)
+
+
+def parse_tsv_header(line: str) -> List[str]:
+    """
+    Parse the header line of a SPARQL TSV result.
+
+    Args:
+        line: The first line of the result
+
+    Returns:
+        The variable names, without their leading '?'
+    """
+    return [name.lstrip("?$") for name in line.split("\t")] if line else []
+
+
+def iter_tsv_rows(lines: Iterable[bytes], raw: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Decode a SPARQL TSV result line by line.
+
+    Unbound variables are left out of a row, as in QueryExecutor.execute_select.
+
+    Args:
+        lines: The lines of the result, starting with the header line
+        raw: If True, produce the plain lexical form of each value as a
+            string instead of an RDFLib term
+
+    Yields:
+        One dictionary per result row
+    """
+    lines = iter(lines)
+    header = next(lines, None)
+    if header is None:
+        return
+    variables = parse_tsv_header(header.decode("utf-8"))
+    convert = _raw_tsv_value if raw else convert_tsv_term
+
+    for line in lines:
+        if not line:
+            continue
+        cells = line.decode("utf-8").split("\t")
+        row = {}
+        for var, cell in zip(variables, cells):
+            if cell:
+                row[var] = convert(cell)
+        yield row
+
+
+def _raw_tsv_value(text: str) -> str:
+    """Get the lexical form of a TSV cell."""
+    return split_tsv_term(text)[1]
+
+
+class ColumnarResult:
+    """
+    A SPARQL SELECT result stored column by column.
+
+    Each variable maps to one NumPy array with a row per solution.
+    Integer, decimal/floating point and boolean datatypes are stored as
+    int64, float64 and bool arrays; everything else (strings, IRIs, blank
+    node labels and mixed columns) as object arrays of lexical strings.
+    masks[var] is True where the variable is unbound; the value stored at
+    those positions is 0, NaN, False or None depending on the column type.
+    """
+
+    def __init__(self, variables: List[str], columns: Dict[str, Any],
+                 masks: Dict[str, Any]):
+        """
+        Initialize the ColumnarResult.
+
+        Args:
+            variables: The variable names, in result order
+            columns: The value array for each variable
+            masks: The unbound mask for each variable
+        """
+        self.variables = variables
+        self.columns = columns
+        self.masks = masks
+
+    def __len__(self) -> int:
+        """The number of rows."""
+        if not self.variables:
+            return 0
+        return len(self.columns[self.variables[0]])
+
+    def __getitem__(self, variable: str) -> Any:
+        """The value array for a variable."""
+        return self.columns[variable]
+
+
+def decode_tsv_columns(lines: Iterable[bytes]) -> ColumnarResult:
+    """
+    Decode a SPARQL TSV result straight into columns.
+
+    Values are kept as lexical strings while the result is read and
+    converted to typed arrays once per column at the end, so no per-row
+    dictionaries or per-cell RDFLib terms are created.
+
+    Args:
+        lines: The lines of the result, starting with the header line
+
+    Returns:
+        The result as a ColumnarResult
+    """
+    if np is None:
+        raise ImportError(
+            "Columnar results require numpy; "
+            "install it with 'pip install langgraphsemantic[numpy]'"
+        )
+
+    lines = iter(lines)
+    header = next(lines, None)
+    variables = parse_tsv_header(header.decode("utf-8")) if header else []
+    width = len(variables)
+
+    values: List[List[Optional[str]]] = [[] for _ in variables]
+    kinds: List[set] = [set() for _ in variables]
+    last_types: List[Optional[str]] = [None] * width
+
+    for line in lines:
+        if not line:
+            continue
+        cells = line.decode("utf-8").split("\t")
+        if len(cells) < width:
+            cells.extend([""] * (width - len(cells)))
+        for i in range(width):
+            cell = cells[i]
+            if not cell:
+                values[i].append(None)
+                continue
+            kind, value, datatype, _ = split_tsv_term(cell)
+            values[i].append(value)
+            column_type = datatype if kind == "literal" else kind
+            if column_type != last_types[i]:
+                last_types[i] = column_type
+                kinds[i].add(_column_kind(column_type))
+
+    columns = {}
+    masks = {}
+    for i, var in enumerate(variables):
+        columns[var], masks[var] = _build_column(values[i], kinds[i])
+
+    return ColumnarResult(variables, columns, masks)
+
+
+def _column_kind(datatype: Optional[str]) -> str:
+    """Get the column kind for a literal datatype or term kind."""
+    if datatype in _INTEGER_TYPES:
+        return "int"
+    if datatype in _FLOAT_TYPES:
+        return "float"
+    if datatype == _BOOLEAN_TYPE:
+        return "bool"
+    return "str"
+
+
+def _build_column(values: List[Optional[str]], kinds: set) -> Tuple[Any, Any]:
+    """
+    Convert a list of lexical values to a typed array and an unbound mask.
+
+    Args:
+        values: The lexical value of each row, or None where unbound
+        kinds: The column kinds seen in the values
+
+    Returns:
+        A tuple of (values array, unbound mask)
+    """
+    mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+
+    if kinds == {"int"}:
+        try:
+            filled = ["0" if value is None else value for value in values]
+            return np.array(filled, dtype=str).astype(np.int64), mask
+        except (OverflowError, ValueError):
+            kinds = {"float"}
+
+    if kinds and kinds <= {"int", "float"}:
+        filled = ["nan" if value is None else value for value in values]
+        try:
+            return np.array(filled, dtype=str).astype(np.float64), mask
+        except ValueError:
+            pass
+
+    if kinds == {"bool"}:
+        return np.fromiter((value in ("true", "1") for value in values),
+                           dtype=bool, count=len(values)), mask
+
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column, mask
@@ -0,0 +1,168 @@
+"""
+Full-text search over documents.
+
+This module provides an in-process inverted index with BM25 ranking, used
+by the retriever when the dataset has no Jena text index, and helpers for
+building Jena text queries.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text: The text to split
+
+    Returns:
+        The tokens, in order
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+def lucene_query(text: str) -> str:
+    """
+    Build a Lucene query matching any of the words in a text.
+
+    Words are made of letters, digits and underscores only, and are
+    lowercased, so the text cannot inject Lucene operators or syntax.
+
+    Args:
+        text: The search text
+
+    Returns:
+        The Lucene query string
+    """
+    return " OR ".join(tokenize(text))
+
+
+class BM25Index:
+    """
+    A thread-safe inverted index ranking documents by BM25.
+
+    Documents can be added, replaced and removed one at a time, so the
+    index can follow changes to the store without being rebuilt. Each
+    document's text and metadata are kept, so search results need no
+    further lookups.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the BM25Index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """The number of indexed documents."""
+        return len(self.documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Whether a document is indexed."""
+        return doc_id in self.documents
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Add a document, replacing any document with the same ID.
+
+        Args:
+            doc_id: The document ID
+            text: The text to index
+            metadata: Extra data returned with search results
+        """
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._remove(doc_id)
+            self.documents[doc_id] = {"id": doc_id, "text": text, "metadata": metadata or {}}
+            for term, count in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            length = sum(counts.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document.
+
+        Args:
+            doc_id: The document ID
+
+        Returns:
+            True if the document was indexed, False otherwise
+        """
+        with self._lock:
+            return self._remove(doc_id)
+
+    def clear(self) -> None:
+        """Remove all documents."""
+        with self._lock:
+            self.documents.clear()
+            self._postings.clear()
+            self._lengths.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Find the documents that best match a query.
+
+        Args:
+            query: The search text
+            k: The maximum number of results
+
+        Returns:
+            Pairs of (document, score), best first. Documents sharing no
+            term with the query are not returned.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + \
+                        idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+            return [(self.documents[doc_id], score) for doc_id, score in best]
+
+    def _remove(self, doc_id: str) -> bool:
+        """Remove a document; the lock must be held."""
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return False
+        for term in set(tokenize(document["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        return True
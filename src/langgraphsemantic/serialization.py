@@ -0,0 +1,448 @@
+"""
+Line-based RDF serialization helpers.
+
+This module writes RDF terms, triples and quads as N-Triples / N-Quads
+text. Unlike Turtle, every line stands on its own, so output can be
+streamed, split into chunks or embedded in a SPARQL INSERT DATA block.
+It also provides InstanceSerializer, which writes Pydantic model
+instances to N-Triples without building an rdflib Graph.
+"""
+
+import datetime
+import decimal
+import hashlib
+import math
+import uuid
+from itertools import islice
+from urllib.parse import quote
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+from rdflib import Graph, URIRef, Literal, BNode
+from rdflib.namespace import RDF, XSD
+from rdflib.term import Node
+
+from langgraphsemantic.core import ModelIntrospector
+
+
+def escape_string(value: str) -> str:
+    """
+    Escape a string for use inside a quoted N-Triples literal.
+
+    Args:
+        value: The lexical form of the literal
+
+    Returns:
+        The escaped string, without surrounding quotes
+    """
+    if "\\" in value:
+        value = value.replace("\\", "\\\\")
+    if '"' in value:
+        value = value.replace('"', '\\"')
+    if "\n" in value:
+        value = value.replace("\n", "\\n")
+    if "\r" in value:
+        value = value.replace("\r", "\\r")
+    return value
+
+
+def nt_term(term: Node) -> str:
+    """
+    Write an RDF term in N-Triples syntax.
+
+    Args:
+        term: A URIRef, Literal or BNode
+
+    Returns:
+        The term in N-Triples syntax
+    """
+    # Exact type checks first: isinstance on rdflib terms goes through ABC hooks
+    term_type = type(term)
+    if term_type is URIRef:
+        return f"<{term}>"
+    if term_type is Literal or isinstance(term, Literal):
+        quoted = f'"{escape_string(str(term))}"'
+        if term.language:
+            return f"{quoted}@{term.language}"
+        if term.datatype:
+            return f"{quoted}^^<{term.datatype}>"
+        return quoted
+    if term_type is BNode or isinstance(term, BNode):
+        return f"_:{term}"
+    return f"<{term}>"
+
+
+def nt_line(subject: Node, predicate: Node, obj: Node,
+            graph: Optional[Node] = None) -> str:
+    """
+    Write one triple, or quad if a graph is given, as an N-Triples/N-Quads line.
+
+    Args:
+        subject: The subject term
+        predicate: The predicate term
+        obj: The object term
+        graph: The named graph, for N-Quads output
+
+    Returns:
+        The line, including its trailing newline
+    """
+    if graph is None:
+        return f"{nt_term(subject)} {nt_term(predicate)} {nt_term(obj)} .\n"
+    return f"{nt_term(subject)} {nt_term(predicate)} {nt_term(obj)} {nt_term(graph)} .\n"
+
+
+def iter_nt_blocks(lines: Iterable[str], lines_per_block: int = 1000) -> Iterator[bytes]:
+    """
+    Group text lines into UTF-8 encoded blocks for a streamed request body.
+
+    Args:
+        lines: The lines to send
+        lines_per_block: The number of lines per block
+
+    Yields:
+        Encoded blocks of whole lines
+    """
+    lines = iter(lines)
+    while True:
+        block = "".join(islice(lines, lines_per_block))
+        if not block:
+            return
+        yield block.encode("utf-8")
+
+
+def has_bnode(triple: Tuple[Node, Node, Node]) -> bool:
+    """
+    Check whether a triple mentions a blank node.
+
+    Args:
+        triple: The triple to check
+
+    Returns:
+        True if the subject or object is a blank node
+    """
+    subject_type = type(triple[0])
+    object_type = type(triple[2])
+    if subject_type is URIRef and (object_type is URIRef or object_type is Literal):
+        return False
+    return isinstance(triple[0], BNode) or isinstance(triple[2], BNode)
+
+
+# Encoders for literal values, matching the lexical forms and datatypes
+# rdflib's Literal() gives the same Python values
+_XSD_INTEGER = f"^^<{XSD.integer}>"
+_XSD_DOUBLE = f"^^<{XSD.double}>"
+_XSD_BOOLEAN = f"^^<{XSD.boolean}>"
+
+
+def _encode_str(value: str) -> str:
+    return f'"{escape_string(value)}"'
+
+
+def _encode_int(value: int) -> str:
+    return f'"{value}"{_XSD_INTEGER}'
+
+
+def _encode_float(value: float) -> str:
+    if math.isfinite(value):
+        return f'"{value}"{_XSD_DOUBLE}'
+    # str() gives inf, -inf and nan, which are not xsd:double lexical forms
+    if math.isnan(value):
+        return f'"NaN"{_XSD_DOUBLE}'
+    return f'"INF"{_XSD_DOUBLE}' if value > 0 else f'"-INF"{_XSD_DOUBLE}'
+
+
+def _encode_bool(value: bool) -> str:
+    return f'"true"{_XSD_BOOLEAN}' if value else f'"false"{_XSD_BOOLEAN}'
+
+
+_LITERAL_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    str: _encode_str,
+    int: _encode_int,
+    float: _encode_float,
+    bool: _encode_bool,
+}
+
+# Further types written through rdflib's Literal (datetime is a subclass of date)
+EXTENDED_LITERAL_TYPES = (datetime.date, datetime.time, datetime.timedelta,
+                          decimal.Decimal, uuid.UUID)
+
+
+def encode_literal(value: Any) -> Optional[str]:
+    """
+    Write a Python scalar as an N-Triples literal.
+
+    Args:
+        value: A str, int, float or bool (or a subclass of one), or one
+            of EXTENDED_LITERAL_TYPES
+
+    Returns:
+        The literal in N-Triples syntax, or None for other types
+    """
+    encoder = _LITERAL_ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    # Subclasses such as str-based enums; bool must be checked before int
+    for base in (bool, str, int, float):
+        if isinstance(value, base):
+            # str() of a str enum member gives its name, not its value
+            return _LITERAL_ENCODERS[base](str.__str__(value) if base is str else base(value))
+    if isinstance(value, EXTENDED_LITERAL_TYPES):
+        return nt_term(Literal(value))
+    return None
+
+
+class InstanceSerializer:
+    """
+    Writes Pydantic model instances straight to N-Triples or N-Quads text.
+
+    For each model class a writer is compiled once from ModelIntrospector
+    metadata, with the subject prefix, type triple and field predicates
+    already rendered and a literal encoder picked per field. Writing an
+    instance then reads its attributes directly and appends lines to a
+    buffer; no rdflib Graph or dict copy of the instance is built.
+
+    Instance IRIs are deterministic, so storing an instance again names
+    the same subject. A model's IRI is taken from its key field, such as
+    a primary key or UUID field, set with set_iri_key or an iri_key
+    attribute on the model's Config. Models without a key field are
+    named by a hash of their content, so equal instances share an IRI.
+    """
+
+    def __init__(self, base_namespace: str = "http://example.org/"):
+        """
+        Initialize the InstanceSerializer.
+
+        Args:
+            base_namespace: The base URI namespace for instances and properties
+        """
+        self.base_namespace = base_namespace
+        self.introspector = ModelIntrospector(base_namespace)
+        self._writers: Dict[type, Callable[[Any, List[str], str], str]] = {}
+        self._iri_keys: Dict[type, Optional[str]] = {}
+
+    def set_iri_key(self, model_class: Type[BaseModel], field_name: Optional[str]) -> None:
+        """
+        Set the field whose value names a model's instances.
+
+        Args:
+            model_class: The Pydantic model class
+            field_name: The key field, or None to name instances by a hash
+                of their content
+
+        Raises:
+            ValueError: If the model has no such field
+        """
+        if field_name is not None and field_name not in model_class.__fields__:
+            raise ValueError(f"{model_class.__name__} has no field {field_name!r}")
+        self._iri_keys[model_class] = field_name
+        self._writers.pop(model_class, None)
+
+    def iri_key(self, model_class: Type[BaseModel]) -> Optional[str]:
+        """
+        Get the field whose value names a model's instances.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            The key field, or None if instances are named by content hash
+        """
+        if model_class in self._iri_keys:
+            return self._iri_keys[model_class]
+        return getattr(getattr(model_class, "Config", None), "iri_key", None)
+
+    def subject(self, instance: BaseModel) -> str:
+        """
+        Get the IRI an instance is written under.
+
+        Args:
+            instance: The Pydantic model instance
+
+        Returns:
+            The IRI of the instance
+        """
+        if self.iri_key(instance.__class__) is not None:
+            return self._keyed_subject(instance)[1:-1]
+        return self.write(instance, [])
+
+    def serialize(self, instance: BaseModel, graph_uri: Optional[str] = None) -> str:
+        """
+        Serialize an instance and the models nested in it.
+
+        Args:
+            instance: The Pydantic model instance to serialize
+            graph_uri: If given, write N-Quads in this named graph
+
+        Returns:
+            The N-Triples (or N-Quads) text
+        """
+        out: List[str] = []
+        self.write(instance, out, graph_uri)
+        return "".join(out)
+
+    def write(self, instance: BaseModel, out: List[str],
+              graph_uri: Optional[str] = None) -> str:
+        """
+        Append the lines for an instance to a buffer.
+
+        Args:
+            instance: The Pydantic model instance to serialize
+            out: The list of lines to append to
+            graph_uri: If given, write N-Quads in this named graph
+
+        Returns:
+            The IRI of the instance
+        """
+        end = f" <{graph_uri}> .\n" if graph_uri else " .\n"
+        return self.compile(instance.__class__)(instance, out, end)[1:-1]
+
+    def to_graph(self, instance: BaseModel, graph: Optional[Graph] = None) -> Graph:
+        """
+        Build an RDFLib Graph for an instance.
+
+        Args:
+            instance: The Pydantic model instance to convert
+            graph: An existing graph to add the triples to, instead of a new one
+
+        Returns:
+            The graph containing the instance data
+        """
+        if graph is None:
+            graph = Graph()
+        graph.parse(data=self.serialize(instance), format="nt")
+        return graph
+
+    def compile(self, model_class: Type[BaseModel]) -> Callable[[Any, List[str], str], str]:
+        """
+        Get the compiled writer for a model class, compiling it on first use.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            A function (instance, out, end) that appends the instance's
+            lines to out and returns its subject in N-Triples syntax
+        """
+        writer = self._writers.get(model_class)
+        if writer is None:
+            writer = self._writers[model_class] = self._compile(model_class)
+        return writer
+
+    def _compile(self, model_class: Type[BaseModel]) -> Callable[[Any, List[str], str], str]:
+        """
+        Compile the writer for a model class.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            The writer function
+        """
+        model_info = self.introspector.introspect_model(model_class)
+        model_name = model_info["name"]
+
+        subject_prefix = f"<{self.base_namespace}{model_name}_"
+        type_triple = f" <{RDF.type}> <{self.base_namespace}{model_name}>"
+        fields = [
+            (field_name, f" <{self.base_namespace}{field_name}> ",
+             self._scalar_encoder(field_info["type"]))
+            for field_name, field_info in model_info["fields"].items()
+        ]
+        write_value = self._write_value
+        keyed_subject = self._keyed_subject if self.iri_key(model_class) is not None else None
+
+        def write(instance: Any, out: List[str], end: str) -> str:
+            # Collect the predicate-object pairs first: a content-hashed
+            # subject is only known once they have all been written
+            pairs = []
+            for field_name, predicate, encoder in fields:
+                value = getattr(instance, field_name, None)
+                if value is None:
+                    continue
+                if encoder is not None and type(value) is encoder[0]:
+                    pairs.append(f"{predicate}{encoder[1](value)}")
+                else:
+                    write_value(predicate, value, pairs, out, end)
+
+            if keyed_subject is not None:
+                subject = keyed_subject(instance)
+            else:
+                pairs.sort()
+                digest = hashlib.sha256("\n".join(pairs).encode("utf-8")).hexdigest()[:32]
+                subject = f"{subject_prefix}{digest}>"
+
+            out.append(f"{subject}{type_triple}{end}")
+            out.extend(f"{subject}{pair}{end}" for pair in pairs)
+            return subject
+
+        return write
+
+    def _keyed_subject(self, instance: BaseModel) -> str:
+        """
+        Build the subject of an instance from its key field.
+
+        Args:
+            instance: The Pydantic model instance
+
+        Returns:
+            The subject in N-Triples syntax
+
+        Raises:
+            ValueError: If the key field has no value
+        """
+        model_class = instance.__class__
+        field_name = self.iri_key(model_class)
+        value = getattr(instance, field_name, None)
+        if value is None:
+            raise ValueError(f"{model_class.__name__} instance has no value for its "
+                             f"IRI key field {field_name!r}")
+        if isinstance(value, str):
+            value = str.__str__(value)
+        key = quote(str(value), safe="-._~")
+        return f"<{self.base_namespace}{model_class.__name__}_{key}>"
+
+    def _write_value(self, predicate: str, value: Any, pairs: List[str],
+                     out: List[str], end: str) -> None:
+        """
+        Add a field value whose type was not known up front.
+
+        Args:
+            predicate: The rendered predicate
+            value: The field value
+            pairs: The list of predicate-object pairs of the subject
+            out: The list of lines to append nested instances to
+            end: The line ending, including the graph for N-Quads
+        """
+        if isinstance(value, BaseModel):
+            nested = self.compile(value.__class__)(value, out, end)
+            pairs.append(f"{predicate}{nested}")
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            for item in value:
+                if item is not None:
+                    self._write_value(predicate, item, pairs, out, end)
+        else:
+            literal = encode_literal(value)
+            if literal is not None:
+                pairs.append(f"{predicate}{literal}")
+
+    @staticmethod
+    def _scalar_encoder(field_type: Any) -> Optional[Tuple[type, Callable[[Any], str]]]:
+        """
+        Pick the literal encoder for a field declared as a plain scalar type.
+
+        Args:
+            field_type: The declared type of the field
+
+        Returns:
+            A tuple of (expected type, encoder), or None if the field is not
+            a (possibly Optional) str, int, float or bool
+        """
+        origin = getattr(field_type, "__origin__", None)
+        if origin is Union:
+            args = [arg for arg in field_type.__args__ if arg is not type(None)]
+            if len(args) != 1:
+                return None
+            field_type = args[0]
+
+        encoder = _LITERAL_ENCODERS.get(field_type)
+        return (field_type, encoder) if encoder is not None else None
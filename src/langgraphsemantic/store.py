@@ -5,10 +5,42 @@ This module provides functionality for connecting to RDF stores,
 executing SPARQL queries, and managing RDF data.
 """
 
-from typing import Any, Dict, List, Optional, Union
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import chain, islice
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
 from rdflib import Graph, URIRef, Literal, BNode
-from SPARQLWrapper import SPARQLWrapper, JSON, POST, GET
+
+from langgraphsemantic.cache import LRUCache, QueryCache, referenced_graphs
+from langgraphsemantic.changes import Change
+from langgraphsemantic.core import SCHEMA_FINGERPRINT
+from langgraphsemantic.instrumentation import metrics
+from langgraphsemantic.replicas import LEAST_OUTSTANDING, ReplicaBalancer
+from langgraphsemantic.resilience import (
+    CircuitBreaker,
+    ResilientTransport,
+    RetryPolicy,
+    is_unavailable,
+)
+from langgraphsemantic.results import ColumnarResult, decode_tsv_columns, iter_tsv_rows
+from langgraphsemantic.serialization import has_bnode, iter_nt_blocks, nt_line
+from langgraphsemantic.validation import ShapeValidator
+from langgraphsemantic.transport import (
+    SPARQLTransport,
+    SessionTransport,
+    TransportResponse,
+    SPARQL_RESULTS_JSON,
+    SPARQL_RESULTS_TSV,
+    TURTLE_MEDIA_TYPE,
+    N_TRIPLES_MEDIA_TYPE,
+    N_QUADS_MEDIA_TYPE,
+)
+
+
+# The longest wait, in seconds, before retrying a failed write-behind insert
+MAX_RETRY_DELAY = 30.0
 
 
 class StoreConnection:
@@ -17,22 +49,222 @@ class StoreConnection:
     
     This class provides methods for connecting to RDF triple stores,
     particularly Apache Jena Fuseki, and executing SPARQL operations.
+    HTTP requests are sent through a pluggable transport, which by
+    default keeps a pool of keep-alive connections to the store.
+    Write listeners are told which graphs each update or data upload
+    may have changed. Close listeners run before the transport is closed,
+    so queued writes can still be sent.
+    
+    Queries can be spread over read replicas by a ReplicaBalancer. A
+    query that fails on one replica with a transient error, or is refused
+    by its circuit breaker, is sent to another, and to the primary query
+    endpoint when no replica is healthy. A transport that retries, such
+    as ResilientTransport, only retries on the primary.
+    Replicas lag behind the primary, so for read_your_writes seconds after
+    each write through this connection queries go to the primary instead.
+    A streamed query counts as in flight on its replica until its body has
+    been read or closed.
     """
     
-    def __init__(self, endpoint_url: str, update_endpoint: Optional[str] = None):
+    def __init__(self, endpoint_url: str, update_endpoint: Optional[str] = None,
+                 transport: Optional[SPARQLTransport] = None,
+                 data_endpoint: Optional[str] = None,
+                 balancer: Optional[ReplicaBalancer] = None,
+                 read_your_writes: float = 0.0):
         """
         Initialize the StoreConnection.
         
         Args:
             endpoint_url: The URL of the SPARQL query endpoint
             update_endpoint: The URL of the SPARQL update endpoint (if different)
+            transport: The transport used to send requests (defaults to a
+                pooled SessionTransport)
+            data_endpoint: The URL of the Graph Store Protocol endpoint, if any
+            balancer: Picks the read replica for each query; if None, queries
+                go to endpoint_url
+            read_your_writes: Seconds after a write during which queries go
+                to endpoint_url rather than to a replica
         """
         self.endpoint_url = endpoint_url
         self.update_endpoint = update_endpoint or endpoint_url
-        self.query_wrapper = SPARQLWrapper(endpoint_url)
-        self.query_wrapper.setReturnFormat(JSON)
-        self.update_wrapper = SPARQLWrapper(self.update_endpoint)
-        self.update_wrapper.setMethod(POST)
+        self.data_endpoint = data_endpoint
+        self.transport = transport or SessionTransport()
+        self.balancer = balancer
+        self.read_your_writes = read_your_writes
+        self._pinned_until = 0.0
+        self.write_listeners: List[Callable[[Optional[FrozenSet[str]]], None]] = []
+        self.close_listeners: List[Callable[[], None]] = []
+        
+    def query(self, query: str, accept: str = SPARQL_RESULTS_JSON,
+              stream: bool = False) -> TransportResponse:
+        """
+        Send a SPARQL query to the query endpoint.
+        
+        Args:
+            query: The SPARQL query string
+            accept: The media type to request for the results
+            stream: Whether to stream the response body instead of buffering it
+            
+        Returns:
+            The response from the store
+        """
+        def send(endpoint: str) -> TransportResponse:
+            return self.transport.query(endpoint, query, accept, stream=stream)
+        
+        def send_once(endpoint: str) -> TransportResponse:
+            # Fail over to another replica rather than retrying this one
+            with self._single_attempt():
+                return send(endpoint)
+        
+        def hold(response: TransportResponse, release: Callable[[], None]) -> TransportResponse:
+            return self._on_close(response, lambda received: release())
+        
+        with metrics.span("http.query") as span:
+            if self.balancer is None or time.monotonic() < self._pinned_until:
+                response = send(self.endpoint_url)
+            else:
+                response = self.balancer.send(send_once, lambda: send(self.endpoint_url),
+                                              is_unavailable, hold if stream else None)
+            if stream:
+                # The query is not over until its body has been read
+                span.defer()
+        if metrics.enabled:
+            self._count_bytes(len(query.encode("utf-8")), None if stream else response)
+            if stream:
+                def measured(received: int) -> None:
+                    metrics.count("http.bytes_received", received)
+                    span.end()
+                
+                response = self._on_close(response, measured)
+        return response
+    
+    def update(self, update: str, graphs: Optional[Iterable[str]] = None) -> TransportResponse:
+        """
+        Send a SPARQL update to the update endpoint.
+        
+        Args:
+            update: The SPARQL UPDATE string
+            graphs: The named graphs the update writes to, if known (an
+                empty collection for the default graph). If not given, they
+                are read from the update text when there are write listeners.
+            
+        Returns:
+            The response from the store
+        """
+        try:
+            with metrics.span("http.update"):
+                response = self.transport.update(self.update_endpoint, update)
+            if metrics.enabled:
+                self._count_bytes(len(update.encode("utf-8")), response)
+            return response
+        finally:
+            # Also on failure: the store may have applied the update anyway
+            self._pin_reads()
+            if self.write_listeners:
+                self._notify_write(frozenset(graphs) if graphs is not None
+                                   else referenced_graphs(update))
+    
+    def post_data(self, body: Union[bytes, Iterable[bytes]], content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        """
+        POST RDF data to the Graph Store Protocol endpoint.
+        
+        Args:
+            body: The request body, or an iterable of byte blocks to stream
+            content_type: The media type of the body
+            params: Optional query string parameters, such as the target graph
+            
+        Returns:
+            The response from the store
+        """
+        if not self.data_endpoint:
+            raise ValueError("No Graph Store Protocol endpoint configured")
+        try:
+            with metrics.span("http.post_data"):
+                response = self.transport.post_data(self.data_endpoint, body, content_type, params)
+            if metrics.enabled:
+                # The size of a streamed body is not known here
+                self._count_bytes(len(body) if isinstance(body, bytes) else 0, response)
+            return response
+        finally:
+            self._pin_reads()
+            if self.write_listeners:
+                params = params or {}
+                if "graph" in params:
+                    graphs = frozenset([params["graph"]])
+                elif "default" in params:
+                    graphs = frozenset()
+                else:
+                    # N-Quads name their graphs in the body
+                    graphs = None
+                self._notify_write(graphs)
+    
+    def add_write_listener(self, listener: Callable[[Optional[FrozenSet[str]]], None]) -> None:
+        """
+        Register a function to call after every write.
+        
+        Args:
+            listener: Called with the named graphs written to; an empty
+                set for the default graph, or None if unknown
+        """
+        self.write_listeners.append(listener)
+    
+    @staticmethod
+    def _count_bytes(sent: int, response: Optional[TransportResponse]) -> None:
+        """Count the bytes of a request and of its response, if it was buffered."""
+        metrics.count("http.bytes_sent", sent)
+        if response is not None:
+            metrics.count("http.bytes_received", len(response.content))
+    
+    @staticmethod
+    def _on_close(response: TransportResponse,
+                  callback: Callable[[int], None]) -> TransportResponse:
+        """
+        Wrap a streamed response to learn when it has been read or closed.
+        
+        Args:
+            response: The streamed response
+            callback: Called once, with the number of bytes received, when
+                the body has been read or the response closed
+            
+        Returns:
+            A response streaming the same body
+        """
+        received = 0
+        
+        def count_chunks() -> Iterator[bytes]:
+            nonlocal received
+            for chunk in response.iter_content():
+                received += len(chunk)
+                yield chunk
+        
+        chunks = count_chunks()
+        
+        def close() -> None:
+            chunks.close()
+            response.close()
+            callback(received)
+        
+        return TransportResponse(response.status_code, response.headers, chunks=chunks,
+                                 closer=close)
+    
+    def _single_attempt(self):
+        """Have the transport send requests only once, if it can retry them."""
+        single_attempt = getattr(self.transport, "single_attempt", None)
+        return single_attempt() if single_attempt is not None else nullcontext()
+    
+    def _pin_reads(self) -> None:
+        """Send queries to the primary for the read-your-writes window."""
+        if self.balancer is not None and self.read_your_writes > 0:
+            self._pinned_until = time.monotonic() + self.read_your_writes
+    
+    def _notify_write(self, graphs: Optional[FrozenSet[str]]) -> None:
+        """Call the write listeners."""
+        for listener in self.write_listeners:
+            try:
+                listener(graphs)
+            except Exception as e:
+                print(f"Write listener failed: {e}")
         
     def test_connection(self) -> bool:
         """
@@ -42,19 +274,31 @@ class StoreConnection:
             True if the connection is successful, False otherwise
         """
         try:
-            self.query_wrapper.setQuery("ASK { ?s ?p ?o }")
-            self.query_wrapper.setReturnFormat(JSON)
-            results = self.query_wrapper.query().convert()
+            results = self.query("ASK { ?s ?p ?o }").json()
             return results.get('boolean', False)
         except Exception as e:
             print(f"Connection test failed: {e}")
             return False
             
+    def add_close_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Register a function to call before the connection is closed.
+        
+        Args:
+            listener: Called with no arguments; the transport is still open
+        """
+        self.close_listeners.append(listener)
+            
     def close(self) -> None:
-        """Close the connection to the RDF store."""
-        # SPARQLWrapper doesn't maintain persistent connections,
-        # so there's nothing to close
-        pass
+        """Close the connection to the RDF store, after running the close listeners."""
+        try:
+            for listener in self.close_listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    print(f"Close listener failed: {e}")
+        finally:
+            self.transport.close()
 
 
 class QueryExecutor:
@@ -62,7 +306,9 @@ class QueryExecutor:
     Executes SPARQL queries against RDF stores.
     
     This class provides methods for executing various types of SPARQL
-    queries and processing the results.
+    queries and processing the results. The executor keeps no per-query
+    state, so one instance can be used from several threads at once.
+    SELECT and ASK results can be cached; see enable_cache.
     """
     
     def __init__(self, connection: StoreConnection):
@@ -73,44 +319,163 @@ class QueryExecutor:
             connection: A StoreConnection instance
         """
         self.connection = connection
+        self.cache: Optional[QueryCache] = None
+    
+    def enable_cache(self, max_size: int = 256, ttl: Optional[float] = 60.0) -> QueryCache:
+        """
+        Cache the results of SELECT and ASK queries.
+        
+        Results are invalidated when anything sent through this
+        executor's connection writes to a graph the query reads.
+        Writes by other clients are only picked up when entries expire.
         
-    def execute_select(self, query: str) -> List[Dict[str, Any]]:
+        Args:
+            max_size: The maximum number of cached results
+            ttl: Seconds a result stays valid, or None for no expiry
+            
+        Returns:
+            The QueryCache, for inspecting its counters
+        """
+        if self.cache is None:
+            self.cache = QueryCache(max_size, ttl)
+            self.connection.add_write_listener(self.cache.invalidate)
+        return self.cache
+        
+    def execute_select(self, query: str, use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Execute a SPARQL SELECT query.
         
         Args:
             query: The SPARQL SELECT query string
+            use_cache: Whether to use the result cache, if enabled
             
         Returns:
             A list of dictionaries containing the query results
         """
-        self.connection.query_wrapper.setQuery(query)
-        self.connection.query_wrapper.setReturnFormat(JSON)
-        results = self.connection.query_wrapper.query().convert()
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            key = cache.key("select", query)
+            cached = cache.get(key)
+            if cached is not None:
+                return [dict(row) for row in cached]
+            generation = cache.generation
+        
+        response = self.connection.query(query, SPARQL_RESULTS_JSON)
+        with metrics.span("select.decode"):
+            results = response.json()
         
-        bindings = []
-        for binding in results["results"]["bindings"]:
-            result = {}
-            for var, value in binding.items():
-                result[var] = self._convert_binding_value(value)
-            bindings.append(result)
+        with metrics.span("select.convert") as span:
+            bindings = []
+            for binding in results["results"]["bindings"]:
+                result = {}
+                for var, value in binding.items():
+                    result[var] = self._convert_binding_value(value)
+                bindings.append(result)
+            if metrics.enabled:
+                span.set_attribute("rows", len(bindings))
+                metrics.count("select.rows", len(bindings))
+        
+        if cache is not None:
+            cache.put(key, bindings, generation)
+            return [dict(row) for row in bindings]
             
         return bindings
     
-    def execute_ask(self, query: str) -> bool:
+    def iter_select(self, query: str, raw: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a SPARQL SELECT query and stream the results.
+        
+        The results are requested in the SPARQL TSV format and decoded
+        line by line as the response arrives, so the first row is available
+        before the whole response has been received and memory use does not
+        grow with the size of the result. The response is released when the
+        generator is exhausted or closed.
+        
+        Args:
+            query: The SPARQL SELECT query string
+            raw: If True, yield the plain lexical form of each value as a
+                string instead of converting it to an RDFLib term
+            
+        Yields:
+            One dictionary per result row
+        """
+        response = self.connection.query(query, SPARQL_RESULTS_TSV, stream=True)
+        try:
+            yield from iter_tsv_rows(response.iter_lines(), raw=raw)
+        finally:
+            response.close()
+    
+    def select_columns(self, query: str) -> ColumnarResult:
+        """
+        Execute a SPARQL SELECT query and decode the results into columns.
+        
+        Each variable becomes one NumPy array: numeric and boolean datatypes
+        go into int64, float64 or bool arrays and everything else into
+        string arrays, with a mask marking unbound values. This avoids
+        building a dictionary per row and an RDFLib term per value.
+        Requires numpy.
+        
+        Args:
+            query: The SPARQL SELECT query string
+            
+        Returns:
+            The results as a ColumnarResult
+        """
+        response = self.connection.query(query, SPARQL_RESULTS_TSV, stream=True)
+        try:
+            return decode_tsv_columns(response.iter_lines())
+        finally:
+            response.close()
+    
+    def execute_many(self, queries: Iterable[str],
+                     max_workers: int = 4) -> List[List[Dict[str, Any]]]:
+        """
+        Execute several SPARQL SELECT queries concurrently.
+        
+        The queries are fanned out over a thread pool. If any query fails,
+        its exception is raised once the earlier results have been collected.
+        Keep max_workers at or below the transport's connection pool size,
+        otherwise the extra requests open connections that are not reused.
+        
+        Args:
+            queries: The SPARQL SELECT query strings
+            max_workers: The maximum number of queries in flight at once
+            
+        Returns:
+            The results of each query, in the same order as the queries
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+            return list(pool.map(self.execute_select, queries))
+    
+    def execute_ask(self, query: str, use_cache: bool = True) -> bool:
         """
         Execute a SPARQL ASK query.
         
         Args:
             query: The SPARQL ASK query string
+            use_cache: Whether to use the result cache, if enabled
             
         Returns:
             The boolean result of the ASK query
         """
-        self.connection.query_wrapper.setQuery(query)
-        self.connection.query_wrapper.setReturnFormat(JSON)
-        results = self.connection.query_wrapper.query().convert()
-        return results.get("boolean", False)
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            key = cache.key("ask", query)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+        
+        results = self.connection.query(query, SPARQL_RESULTS_JSON).json()
+        answer = results.get("boolean", False)
+        
+        if cache is not None:
+            cache.put(key, answer, generation)
+        return answer
     
     def execute_construct(self, query: str) -> Graph:
         """
@@ -122,8 +487,9 @@ class QueryExecutor:
         Returns:
             An RDFLib Graph containing the constructed triples
         """
-        self.connection.query_wrapper.setQuery(query)
-        graph = self.connection.query_wrapper.query().convert()
+        response = self.connection.query(query, TURTLE_MEDIA_TYPE)
+        graph = Graph()
+        graph.parse(data=response.content, format="turtle")
         return graph
     
     def _convert_binding_value(self, value: Dict[str, str]) -> Any:
@@ -161,7 +527,10 @@ class UpdateExecutor:
     Executes SPARQL updates against RDF stores.
     
     This class provides methods for executing SPARQL UPDATE operations
-    and managing transactions.
+    and managing transactions. Change listeners are told which subjects
+    insert_graph wrote and which graphs delete_graph dropped, so local
+    indexes can be updated without rescanning the store. Inserts can be
+    queued and written in the background; see enable_write_behind.
     """
     
     def __init__(self, connection: StoreConnection):
@@ -172,20 +541,92 @@ class UpdateExecutor:
             connection: A StoreConnection instance
         """
         self.connection = connection
+        self.change_listeners: List[Callable[[Change], None]] = []
+        self.write_behind: Optional[WriteBehindQueue] = None
+        self._tracking = threading.local()
+    
+    def enable_write_behind(self, max_triples: int = 5000, max_delay: float = 0.5,
+                            max_pending: int = 50000, max_retries: int = 5,
+                            retry_delay: float = 0.5) -> "WriteBehindQueue":
+        """
+        Queue inserts and write them in the background.
+        
+        insert_ntriples and insert_graph then return once the triples are
+        queued, and queued triples for the same graph are sent as one
+        request. Other updates first wait for the queue to be written, so
+        writes reach the store in the order they were made. Queued triples
+        are not visible to queries until they are written; call flush()
+        to wait for them.
+        
+        Args:
+            max_triples: The number of queued triples that triggers a write
+            max_delay: Seconds a queued triple waits at most before a write
+            max_pending: The number of queued triples at which inserts
+                block until the queue has been written
+            max_retries: The number of times a failed write is retried
+            retry_delay: Seconds before the first retry of a failed write
+            
+        Returns:
+            The WriteBehindQueue, for inspecting its counters
+        """
+        if self.write_behind is None:
+            self.write_behind = WriteBehindQueue(self, max_triples, max_delay, max_pending,
+                                                 max_retries, retry_delay)
+            self.connection.add_close_listener(self.write_behind.close)
+        return self.write_behind
+    
+    def flush(self) -> bool:
+        """
+        Write any queued inserts.
+        
+        Returns:
+            True if everything queued has been written, False otherwise
+        """
+        return self.write_behind.flush() if self.write_behind is not None else True
+    
+    def close(self) -> None:
+        """Write any queued inserts and stop the background writer."""
+        if self.write_behind is not None:
+            self.write_behind.close()
+    
+    def add_change_listener(self, listener: Callable[[Change], None]) -> None:
+        """
+        Register a function to call with the changes made by insert_graph and delete_graph.
+        
+        Args:
+            listener: Called with a Change after each successful write
+        """
+        self.change_listeners.append(listener)
+    
+    def is_tracked_write(self) -> bool:
+        """
+        Whether the current thread is inside a write reported to change listeners.
         
-    def execute_update(self, update: str) -> bool:
+        Write listeners can use this to skip writes that change listeners
+        already see in detail.
+        
+        Returns:
+            True during insert_graph and delete_graph, False otherwise
+        """
+        return getattr(self._tracking, "active", False)
+        
+    def execute_update(self, update: str, graphs: Optional[Iterable[str]] = None) -> bool:
         """
         Execute a SPARQL UPDATE operation.
         
         Args:
             update: The SPARQL UPDATE string
+            graphs: The named graphs the update writes to, if known (an
+                empty collection for the default graph)
             
         Returns:
             True if the update was successful, False otherwise
         """
+        # Keep writes in order: queued inserts go first
+        if self.write_behind is not None and not self.write_behind.is_writer_thread():
+            self.write_behind.flush()
         try:
-            self.connection.update_wrapper.setQuery(update)
-            self.connection.update_wrapper.query()
+            self.connection.update(update, graphs)
             return True
         except Exception as e:
             print(f"Update failed: {e}")
@@ -202,14 +643,46 @@ class UpdateExecutor:
         Returns:
             True if the insertion was successful, False otherwise
         """
-        turtle = graph.serialize(format="turtle")
+        # N-Triples rather than Turtle: @prefix lines are not valid inside INSERT DATA
+        with metrics.span("store.serialize", triples=len(graph)):
+            ntriples = "".join(nt_line(s, p, o) for s, p, o in graph)
+        if not self.change_listeners:
+            return self.insert_ntriples(ntriples, graph_uri)
         
-        if graph_uri:
-            update = f"INSERT DATA {{ GRAPH <{graph_uri}> {{ {turtle} }} }}"
-        else:
-            update = f"INSERT DATA {{ {turtle} }}"
+        change = Change(graph_uri, {str(s) for s in graph.subjects() if isinstance(s, URIRef)})
+        if self.write_behind is not None:
+            # Report the change once the triples are in the store
+            self.write_behind.put(ntriples, graph_uri, lambda: self._notify_change(change))
+            return True
+        
+        with self._tracked_write():
+            success = self.insert_ntriples(ntriples, graph_uri)
+        if success:
+            self._notify_change(change)
+        return success
+    
+    def insert_ntriples(self, ntriples: str, graph_uri: Optional[str] = None) -> bool:
+        """
+        Insert triples given as N-Triples text into the store.
+        
+        Args:
+            ntriples: The triples in N-Triples syntax
+            graph_uri: Optional URI for the named graph
             
-        return self.execute_update(update)
+        Returns:
+            True if the insertion was successful (or, with write-behind,
+            queued), False otherwise
+        """
+        if self.write_behind is not None and not self.write_behind.is_writer_thread():
+            self.write_behind.put(ntriples, graph_uri)
+            return True
+        
+        try:
+            self._send_insert(ntriples, graph_uri)
+            return True
+        except Exception as e:
+            print(f"Update failed: {e}")
+            return False
     
     def delete_graph(self, graph_uri: str) -> bool:
         """
@@ -222,7 +695,482 @@ class UpdateExecutor:
             True if the deletion was successful, False otherwise
         """
         update = f"DROP GRAPH <{graph_uri}>"
-        return self.execute_update(update)
+        if not self.change_listeners:
+            return self.execute_update(update, [graph_uri])
+        
+        with self._tracked_write():
+            success = self.execute_update(update, [graph_uri])
+        if success:
+            self._notify_change(Change(graph_uri, dropped=True))
+        return success
+    
+    def _send_insert(self, ntriples: str, graph_uri: Optional[str] = None) -> None:
+        """
+        Send triples as an INSERT DATA update at once, raising if it fails.
+        
+        Args:
+            ntriples: The triples in N-Triples syntax
+            graph_uri: Optional URI for the named graph
+        """
+        if metrics.enabled:
+            metrics.count("store.triples_inserted", ntriples.count("\n"))
+        if graph_uri:
+            update = f"INSERT DATA {{ GRAPH <{graph_uri}> {{ {ntriples} }} }}"
+        else:
+            update = f"INSERT DATA {{ {ntriples} }}"
+        self.connection.update(update, [graph_uri] if graph_uri else [])
+    
+    @contextmanager
+    def _tracked_write(self):
+        """Mark the current thread as inside a tracked write."""
+        self._tracking.active = True
+        try:
+            yield
+        finally:
+            self._tracking.active = False
+    
+    def _notify_change(self, change: Change) -> None:
+        """Call the change listeners."""
+        for listener in self.change_listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                print(f"Change listener failed: {e}")
+
+
+class WriteBehindQueue:
+    """
+    Queues inserts for an UpdateExecutor and writes them in a background thread.
+    
+    Inserts aimed at the same graph are coalesced into one INSERT DATA
+    request. The queue is written when it holds max_triples triples, when
+    its oldest insert has waited max_delay seconds, or on flush(). Once
+    max_pending triples are queued, put() blocks until the writer has
+    caught up.
+    
+    A write that fails because the store is unreachable or overloaded is
+    kept and retried with exponential backoff, from retry_delay seconds,
+    up to max_retries times; the backoff also applies while closing. A
+    write that fails for any other reason, such as a malformed update,
+    cannot succeed later, and is dropped at once. Dropped writes are
+    reported and counted in stats().
+    """
+    
+    def __init__(self, executor: UpdateExecutor, max_triples: int = 5000,
+                 max_delay: float = 0.5, max_pending: int = 50000,
+                 max_retries: int = 5, retry_delay: float = 0.5):
+        """
+        Initialize the WriteBehindQueue.
+        
+        Args:
+            executor: The UpdateExecutor to write through
+            max_triples: The number of queued triples that triggers a write
+            max_delay: Seconds a queued triple waits at most before a write
+            max_pending: The number of queued triples at which put() blocks
+            max_retries: The number of times a failed write is retried
+            retry_delay: Seconds before the first retry of a failed write
+        """
+        self.executor = executor
+        self.max_triples = max_triples
+        self.max_delay = max_delay
+        self.max_pending = max(max_pending, max_triples)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.requests = 0
+        self.inserts = 0
+        self.failures = 0
+        self.dropped = 0
+        self.dropped_triples = 0
+        
+        self._graphs: Dict[Optional[str], List[str]] = {}
+        self._callbacks: Dict[Optional[str], List[Callable[[], None]]] = {}
+        self._retries: Dict[Optional[str], int] = {}
+        self._retry_at: Optional[float] = None
+        self._pending = 0
+        self._oldest: Optional[float] = None
+        self._writing = 0
+        self._flushes = 0
+        self._written = 0
+        self._last_failed = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._writer = threading.Thread(target=self._run, name="WriteBehindQueue", daemon=True)
+        self._writer.start()
+    
+    def put(self, ntriples: str, graph_uri: Optional[str] = None,
+            callback: Optional[Callable[[], None]] = None) -> None:
+        """
+        Queue triples for insertion, blocking while the queue is full.
+        
+        Args:
+            ntriples: The triples in N-Triples syntax
+            graph_uri: Optional URI for the named graph
+            callback: Called in the writer thread once the triples are written
+        """
+        if not ntriples.endswith("\n"):
+            ntriples += "\n"
+        count = ntriples.count("\n")
+        with self._condition:
+            while self._pending >= self.max_pending and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed")
+            self._graphs.setdefault(graph_uri, []).append(ntriples)
+            if callback is not None:
+                self._callbacks.setdefault(graph_uri, []).append(callback)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._pending += count
+            self.inserts += 1
+            if self._pending >= self.max_triples or self._pending == count:
+                self._condition.notify_all()
+    
+    def flush(self) -> bool:
+        """
+        Write everything queued so far and wait for it to be written.
+        
+        While a failed write is waiting to be retried, this returns at once.
+        
+        Returns:
+            True if the writes succeeded, False if any failed
+        """
+        with self._condition:
+            if self._pending == 0 and self._writing == 0:
+                return True
+            self._flushes += 1
+            target = self._flushes
+            self._condition.notify_all()
+            while self._written < target and self._writer.is_alive():
+                self._condition.wait()
+            return not self._last_failed
+    
+    def close(self) -> int:
+        """
+        Write everything queued and stop the writer thread.
+        
+        Failed writes are still retried, up to max_retries times each, so
+        this returns in bounded time even if the store is down.
+        
+        Returns:
+            The number of writes dropped while closing
+        """
+        if self._closed:
+            return 0
+        dropped, dropped_triples = self.dropped, self.dropped_triples
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        
+        dropped, dropped_triples = self.dropped - dropped, self.dropped_triples - dropped_triples
+        if dropped:
+            print(f"Write-behind queue closed with {dropped} writes "
+                  f"({dropped_triples} triples) dropped")
+        return dropped
+    
+    def is_writer_thread(self) -> bool:
+        """Whether the current thread is the writer thread."""
+        return threading.current_thread() is self._writer
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the queue counters.
+        
+        Returns:
+            A dictionary with the number of queued triples, of inserts,
+            requests and failed requests so far, and of writes and triples
+            dropped after failing
+        """
+        return {"pending": self._pending, "inserts": self.inserts,
+                "requests": self.requests, "failures": self.failures,
+                "dropped": self.dropped, "dropped_triples": self.dropped_triples}
+    
+    def _run(self) -> None:
+        """Write the queue whenever a threshold is reached or a flush is asked for."""
+        while True:
+            with self._condition:
+                while True:
+                    flush = self._flushes
+                    if self._closed and not self._pending:
+                        return
+                    if self._pending and self._retry_at is not None:
+                        # Back off after a failure, even when closing
+                        delay = self._retry_at - time.monotonic()
+                        if delay <= 0:
+                            break
+                        if flush > self._written:
+                            # Do not hold up the flush: the write has failed
+                            self._written = flush
+                            self._condition.notify_all()
+                            continue
+                        self._condition.wait(delay)
+                        continue
+                    if self._pending and (self._pending >= self.max_triples or flush > self._written
+                                          or self._closed
+                                          or time.monotonic() - self._oldest >= self.max_delay):
+                        break
+                    if flush > self._written:
+                        # Nothing queued: the flush is already done
+                        self._written = flush
+                        self._condition.notify_all()
+                        continue
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self._oldest + self.max_delay - time.monotonic())
+                    self._condition.wait(timeout)
+                
+                graphs, self._graphs = self._graphs, {}
+                callbacks, self._callbacks = self._callbacks, {}
+                self._writing = self._pending
+                self._pending = 0
+                self._oldest = None
+                self._retry_at = None
+                self._condition.notify_all()
+            
+            failed = {}
+            dropped = False
+            for graph_uri, chunks in graphs.items():
+                self.requests += 1
+                try:
+                    self.executor._send_insert("".join(chunks), graph_uri)
+                except Exception as e:
+                    self.failures += 1
+                    attempts = self._retries.get(graph_uri, 0) + 1
+                    if is_unavailable(e) and attempts <= self.max_retries:
+                        self._retries[graph_uri] = attempts
+                        failed[graph_uri] = chunks
+                        continue
+                    self._retries.pop(graph_uri, None)
+                    triples = sum(chunk.count("\n") for chunk in chunks)
+                    self.dropped += 1
+                    self.dropped_triples += triples
+                    dropped = True
+                    print(f"Write-behind insert of {triples} triples into "
+                          f"{graph_uri or 'the default graph'} dropped after "
+                          f"{attempts} attempts: {e}")
+                    continue
+                
+                self._retries.pop(graph_uri, None)
+                for callback in callbacks.get(graph_uri, ()):
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"Write-behind callback failed: {e}")
+            
+            with self._condition:
+                for graph_uri, chunks in failed.items():
+                    self._graphs.setdefault(graph_uri, [])[:0] = chunks
+                    self._callbacks.setdefault(graph_uri, [])[:0] = callbacks.get(graph_uri, [])
+                    self._pending += sum(chunk.count("\n") for chunk in chunks)
+                if failed:
+                    attempts = max(self._retries.get(graph_uri, 1) for graph_uri in failed)
+                    self._retry_at = time.monotonic() + min(
+                        self.retry_delay * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                    if self._oldest is None:
+                        self._oldest = time.monotonic()
+                self._last_failed = bool(failed) or dropped
+                self._writing = 0
+                self._written = max(self._written, flush)
+                self._condition.notify_all()
+
+
+class BulkLoader:
+    """
+    Loads large amounts of RDF data through the Graph Store Protocol.
+    
+    Instead of wrapping data in a SPARQL INSERT DATA string, the loader
+    POSTs N-Triples (or N-Quads) to the store's data endpoint, which the
+    store can parse without going through its SPARQL Update parser. Large
+    graphs are split into chunks of chunk_size triples, one request each.
+    Each chunk is serialized while it is streamed as the request body.
+    When the transport retries failed requests (a ResilientTransport), a
+    chunk is serialized into one buffer instead, so it can be sent again;
+    chunk_size then bounds the memory a chunk takes.
+    """
+    
+    def __init__(self, connection: StoreConnection, chunk_size: int = 50000):
+        """
+        Initialize the BulkLoader.
+        
+        Args:
+            connection: A StoreConnection with a data_endpoint
+            chunk_size: The maximum number of triples sent per request
+        """
+        self.connection = connection
+        self.chunk_size = chunk_size
+        
+    def load(self, graph: Graph, graph_uri: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load an RDFLib Graph into the store.
+        
+        Blank node labels are only shared within one request, so triples
+        that mention blank nodes are all sent together in the last request
+        instead of being split across chunks. If a chunk fails, loading
+        stops; chunks that were already sent stay in the store.
+        
+        Args:
+            graph: The RDFLib Graph to load
+            graph_uri: Optional URI of the named graph to load into; the
+                default graph is used if omitted
+            
+        Returns:
+            A dictionary with the load outcome and throughput:
+            success, triples, chunks, seconds and triples_per_second
+        """
+        params = {"graph": graph_uri} if graph_uri else {"default": ""}
+        return self._load(graph, N_TRIPLES_MEDIA_TYPE, params)
+    
+    def load_ntriples(self, ntriples: Union[str, Iterable[str]],
+                      graph_uri: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Load triples given as N-Triples text into the store.
+        
+        Args:
+            ntriples: The N-Triples text, or an iterable of N-Triples lines
+            graph_uri: Optional URI of the named graph to load into; the
+                default graph is used if omitted
+            
+        Returns:
+            A dictionary with the load outcome and throughput:
+            success, triples, chunks, seconds and triples_per_second
+        """
+        if isinstance(ntriples, str):
+            ntriples = ntriples.splitlines(keepends=True)
+        params = {"graph": graph_uri} if graph_uri else {"default": ""}
+        return self._load(ntriples, N_TRIPLES_MEDIA_TYPE, params, lines=True)
+    
+    def load_quads(self, quads: Iterable[tuple]) -> Dict[str, Any]:
+        """
+        Load quads into their named graphs in the store.
+        
+        Args:
+            quads: (subject, predicate, object, graph) tuples, for example
+                from Dataset.quads()
+            
+        Returns:
+            A dictionary with the load outcome and throughput:
+            success, triples, chunks, seconds and triples_per_second
+        """
+        return self._load(quads, N_QUADS_MEDIA_TYPE, None)
+    
+    def _load(self, triples: Iterable[Any], content_type: str,
+              params: Optional[Dict[str, str]], lines: bool = False) -> Dict[str, Any]:
+        """
+        Send triples or quads in chunks, one request per chunk.
+        
+        Chunks are serialized one at a time, so at most one chunk is held
+        in memory; only blank node triples are set aside until the end.
+        
+        Args:
+            triples: The triples or quads to send
+            content_type: The media type of the request bodies
+            params: The query string parameters for each request
+            lines: Whether triples are already serialized N-Triples lines
+            
+        Returns:
+            A dictionary with the load outcome and throughput
+        """
+        start = time.perf_counter()
+        with_bnodes = []
+        counter = [0]
+        # A line mentioning "_:" may only contain it inside a literal; setting
+        # such a line aside with the blank node triples is harmless
+        is_bnode = (lambda line: "_:" in line) if lines else has_bnode
+        
+        def without_bnodes():
+            for triple in triples:
+                if not triple:
+                    continue
+                if is_bnode(triple):
+                    with_bnodes.append(triple)
+                else:
+                    counter[0] += 1
+                    yield triple
+        
+        source = without_bnodes()
+        loaded = 0
+        sent = 0
+        success = True
+        
+        while success:
+            first = next(source, None)
+            if first is None:
+                break
+            chunk = chain((first,), islice(source, self.chunk_size - 1))
+            success = self._send_chunk(chunk, content_type, params, lines)
+            if success:
+                loaded = counter[0]
+                sent += 1
+        
+        if success and with_bnodes:
+            success = self._send_chunk(with_bnodes, content_type, params, lines)
+            if success:
+                loaded += len(with_bnodes)
+                sent += 1
+        
+        seconds = time.perf_counter() - start
+        if metrics.enabled:
+            metrics.count("store.triples_loaded", loaded)
+        return {
+            "success": success,
+            "triples": loaded,
+            "chunks": sent,
+            "seconds": seconds,
+            "triples_per_second": loaded / seconds if seconds > 0 else 0.0
+        }
+    
+    def _send_chunk(self, chunk: Iterable[Any], content_type: str,
+                    params: Optional[Dict[str, str]], lines: bool = False) -> bool:
+        """
+        Send one chunk of triples or quads as a request.
+        
+        Args:
+            chunk: The triples or quads in the chunk
+            content_type: The media type of the request body
+            params: The query string parameters for the request
+            lines: Whether the chunk holds already serialized lines
+            
+        Returns:
+            True if the chunk was stored, False otherwise
+        """
+        if not lines:
+            chunk = (nt_line(*triple) for triple in chunk)
+        body = iter_nt_blocks(chunk)
+        if isinstance(self.connection.transport, ResilientTransport):
+            # A buffered body, unlike a streamed one, can be retried
+            body = b"".join(body)
+        try:
+            self.connection.post_data(body, content_type, params)
+            return True
+        except Exception as e:
+            print(f"Bulk load failed: {e}")
+            return False
+
+
+class CachedShape:
+    """
+    A SHACL shape held in the client-side shape cache.
+    """
+    
+    def __init__(self, graph: Graph, fingerprint: Optional[str]):
+        """
+        Initialize the CachedShape.
+        
+        Args:
+            graph: The shape graph
+            fingerprint: The schema fingerprint stored with the shape, if any
+        """
+        self.graph = graph
+        self.fingerprint = fingerprint
+        self._validator = None
+    
+    @property
+    def validator(self) -> ShapeValidator:
+        """The compiled validator for the shape."""
+        if self._validator is None:
+            self._validator = ShapeValidator(self.graph)
+        return self._validator
 
 
 class FusekiStore:
@@ -230,38 +1178,103 @@ class FusekiStore:
     High-level interface for working with Apache Jena Fuseki.
     
     This class provides a simplified interface for common operations
-    with Fuseki, including storing and retrieving SHACL shapes.
+    with Fuseki, including storing and retrieving SHACL shapes. Retrieved
+    shapes are cached; once an entry's time to live has passed it is
+    revalidated by comparing the fingerprint stored with the shape, and
+    only fetched again if the fingerprint has changed.
     """
     
-    def __init__(self, base_url: str, dataset: str):
+    def __init__(self, base_url: str, dataset: str,
+                 transport: Optional[SPARQLTransport] = None,
+                 shape_cache_size: int = 128,
+                 shape_cache_ttl: Optional[float] = 30.0,
+                 query_cache_size: int = 0,
+                 query_cache_ttl: Optional[float] = 60.0,
+                 write_behind_size: int = 0,
+                 write_behind_delay: float = 0.5,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 read_urls: Optional[List[str]] = None,
+                 balancing: str = LEAST_OUTSTANDING,
+                 read_your_writes: float = 0.0):
         """
         Initialize the FusekiStore.
         
         Args:
             base_url: The base URL of the Fuseki server
             dataset: The name of the dataset to use
+            transport: The transport used to send requests (defaults to a
+                pooled SessionTransport)
+            shape_cache_size: The maximum number of shapes to cache
+            shape_cache_ttl: Seconds before a cached shape is revalidated,
+                or None to never revalidate
+            query_cache_size: The maximum number of cached SELECT and ASK
+                results; 0 (the default) disables the query result cache
+            query_cache_ttl: Seconds a cached query result stays valid
+            write_behind_size: The number of queued triples that triggers a
+                background write; 0 (the default) sends inserts at once
+            write_behind_delay: Seconds a queued insert waits at most
+            retry_policy: How to retry transient failures. Setting this or
+                circuit_breaker wraps the transport in a ResilientTransport,
+                with the default for whichever is not set.
+            circuit_breaker: The breaker failing requests fast while the
+                store is unhealthy
+            read_urls: The base URLs of Fuseki read replicas serving the same
+                dataset. Queries are spread over them; base_url is the
+                write primary, and also serves queries when no replica is
+                healthy.
+            balancing: How replicas are picked: "least_outstanding" or
+                "latency" (see ReplicaBalancer)
+            read_your_writes: Seconds after a write during which queries go
+                to the primary, so they see the write
         """
         self.base_url = base_url
         self.dataset = dataset
         
         query_endpoint = f"{base_url}/{dataset}/query"
         update_endpoint = f"{base_url}/{dataset}/update"
+        data_endpoint = f"{base_url}/{dataset}/data"
+        
+        if retry_policy is not None or circuit_breaker is not None:
+            transport = ResilientTransport(transport, retry_policy, circuit_breaker)
+        balancer = None
+        if read_urls:
+            balancer = ReplicaBalancer([f"{url}/{dataset}/query" for url in read_urls],
+                                       strategy=balancing)
         
-        self.connection = StoreConnection(query_endpoint, update_endpoint)
+        self.connection = StoreConnection(query_endpoint, update_endpoint, transport,
+                                          data_endpoint=data_endpoint, balancer=balancer,
+                                          read_your_writes=read_your_writes)
         self.query = QueryExecutor(self.connection)
         self.update = UpdateExecutor(self.connection)
+        self.loader = BulkLoader(self.connection)
+        
+        if query_cache_size:
+            self.query.enable_cache(query_cache_size, query_cache_ttl)
+        if write_behind_size:
+            self.update.enable_write_behind(write_behind_size, write_behind_delay,
+                                            max_pending=10 * write_behind_size)
+        
+        self.shape_cache = LRUCache(shape_cache_size, shape_cache_ttl, name="shape_cache")
+        self.shape_revalidations = 0
         
         # Define graph URIs for organizing data
         self.shapes_graph_uri = f"{base_url}/{dataset}/shapes"
         self.data_graph_uri = f"{base_url}/{dataset}/data"
         
-    def store_shape(self, shape_graph: Graph, shape_name: str) -> bool:
+    def store_shape(self, shape_graph: Graph, shape_name: str,
+                    fingerprint: Optional[str] = None) -> bool:
         """
         Store a SHACL shape in the shapes graph.
         
+        Any shape previously stored under the same name is replaced, in
+        the same update request.
+        
         Args:
             shape_graph: The RDFLib Graph containing the SHACL shape
             shape_name: A name for the shape
+            fingerprint: The schema fingerprint the shape was generated
+                from, stored alongside it for get_shape_fingerprint
             
         Returns:
             True if the shape was stored successfully, False otherwise
@@ -269,19 +1282,175 @@ class FusekiStore:
         # Create a named graph URI for this specific shape
         shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
         
-        # Store the shape in the named graph
-        return self.update.insert_graph(shape_graph, shape_uri)
+        ntriples = "".join(nt_line(s, p, o) for s, p, o in shape_graph)
+        if fingerprint:
+            ntriples += nt_line(URIRef(shape_uri), SCHEMA_FINGERPRINT, Literal(fingerprint))
+        
+        # Replace the shape in the named graph
+        update = (f"DROP SILENT GRAPH <{shape_uri}> ;\n"
+                  f"INSERT DATA {{ GRAPH <{shape_uri}> {{ {ntriples} }} }}")
+        if not self.update.execute_update(update, [shape_uri]):
+            self.shape_cache.pop(shape_name)
+            return False
+        
+        if fingerprint:
+            self.shape_cache.put(shape_name, CachedShape(shape_graph, fingerprint))
+        else:
+            self.shape_cache.pop(shape_name)
+        return True
+    
+    def get_shape_fingerprint(self, shape_name: str) -> Optional[str]:
+        """
+        Get the schema fingerprint of a stored SHACL shape.
+        
+        Args:
+            shape_name: The name of the shape
+            
+        Returns:
+            The fingerprint, or None if the shape is not stored or was
+            stored without one
+        """
+        shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
+        
+        query = f"""
+        SELECT ?fingerprint
+        WHERE {{
+            GRAPH <{shape_uri}> {{
+                <{shape_uri}> <{SCHEMA_FINGERPRINT}> ?fingerprint
+            }}
+        }}
+        LIMIT 1
+        """
+        
+        try:
+            # Bypass the result cache: this query is the freshness check
+            results = self.query.execute_select(query, use_cache=False)
+        except Exception as e:
+            print(f"Failed to retrieve shape fingerprint: {e}")
+            return None
+        
+        fingerprint = results[0].get("fingerprint") if results else None
+        return str(fingerprint) if fingerprint is not None else None
+    
+    def has_shape(self, shape_name: str) -> bool:
+        """
+        Check whether a SHACL shape's graph exists in the store.
+        
+        Args:
+            shape_name: The name of the shape
+            
+        Returns:
+            True if the shape's graph holds any triples, False if it does
+            not or the check failed
+        """
+        shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
+        try:
+            # Bypass the result cache: the graph may have been dropped by another client
+            return self.query.execute_ask(f"ASK {{ GRAPH <{shape_uri}> {{ ?s ?p ?o }} }}",
+                                          use_cache=False)
+        except Exception as e:
+            print(f"Failed to check for shape: {e}")
+            return False
     
     def get_shape(self, shape_name: str) -> Optional[Graph]:
         """
         Retrieve a SHACL shape from the shapes graph.
         
+        The shape is served from the shape cache when possible. Cached
+        graphs are shared, so callers must not modify the returned graph.
+        
         Args:
             shape_name: The name of the shape to retrieve
             
         Returns:
             An RDFLib Graph containing the shape, or None if not found
         """
+        cached = self.get_cached_shape(shape_name)
+        return cached.graph if cached is not None else None
+    
+    def get_cached_shape(self, shape_name: str) -> Optional[CachedShape]:
+        """
+        Get a shape through the shape cache.
+        
+        A fresh entry is returned without a request. An expired entry is
+        revalidated with a fingerprint query and refreshed if unchanged.
+        Otherwise the shape is fetched and cached.
+        
+        Args:
+            shape_name: The name of the shape to retrieve
+            
+        Returns:
+            The cached shape, or None if it could not be retrieved
+        """
+        entry = self.shape_cache.get_entry(shape_name)
+        if entry is not None:
+            cached, expired = entry
+            if not expired:
+                return cached
+            if (cached.fingerprint is not None
+                    and self.get_shape_fingerprint(shape_name) == cached.fingerprint):
+                self.shape_cache.touch(shape_name)
+                self.shape_revalidations += 1
+                return cached
+        
+        shape_graph = self._fetch_shape(shape_name)
+        if shape_graph is None:
+            return None
+        if not shape_graph:
+            # Not stored (yet); do not cache the absence
+            return CachedShape(shape_graph, None)
+        
+        shape_uri = URIRef(f"{self.shapes_graph_uri}/{shape_name}")
+        fingerprint = shape_graph.value(shape_uri, SCHEMA_FINGERPRINT)
+        cached = CachedShape(shape_graph, str(fingerprint) if fingerprint is not None else None)
+        self.shape_cache.put(shape_name, cached)
+        return cached
+    
+    def shape_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the shape cache counters.
+        
+        Returns:
+            The LRUCache counters, plus the number of expired entries that
+            were revalidated instead of fetched again
+        """
+        stats = self.shape_cache.stats()
+        stats["revalidations"] = self.shape_revalidations
+        return stats
+    
+    def resilience_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the retry counters and circuit breaker state.
+        
+        Returns:
+            The ResilientTransport counters, or None if requests are not
+            sent through one
+        """
+        transport = self.connection.transport
+        return transport.stats() if isinstance(transport, ResilientTransport) else None
+    
+    def replica_stats(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the counters of the read replicas.
+        
+        Returns:
+            The ReplicaBalancer counters of each replica, or None if there
+            are no replicas
+        """
+        balancer = self.connection.balancer
+        return balancer.stats() if balancer is not None else None
+    
+    def _fetch_shape(self, shape_name: str) -> Optional[Graph]:
+        """
+        Fetch a SHACL shape from the store.
+        
+        Args:
+            shape_name: The name of the shape to retrieve
+            
+        Returns:
+            An RDFLib Graph containing the shape (empty if it is not
+            stored), or None if the request failed
+        """
         shape_uri = f"{self.shapes_graph_uri}/{shape_name}"
         
         query = f"""
@@ -299,13 +1468,17 @@ class FusekiStore:
             print(f"Failed to retrieve shape: {e}")
             return None
     
-    def store_instance_data(self, data_graph: Graph, model_name: str) -> bool:
+    def store_instance_data(self, data_graph: Union[Graph, str], model_name: str,
+                            bulk: bool = False) -> bool:
         """
         Store instance data in the data graph.
         
         Args:
-            data_graph: The RDFLib Graph containing the instance data
+            data_graph: The RDFLib Graph containing the instance data, or
+                the data as N-Triples text
             model_name: The name of the model the data conforms to
+            bulk: If True, load the data through the Graph Store Protocol
+                endpoint with the BulkLoader instead of a SPARQL update
             
         Returns:
             True if the data was stored successfully, False otherwise
@@ -313,13 +1486,111 @@ class FusekiStore:
         # Create a named graph URI for this type of data
         data_uri = f"{self.data_graph_uri}/{model_name}"
         
+        if isinstance(data_graph, str):
+            if bulk:
+                return self.loader.load_ntriples(data_graph, data_uri)["success"]
+            return self.update.insert_ntriples(data_graph, data_uri)
+        
+        if bulk:
+            return self.loader.load(data_graph, data_uri)["success"]
+        
         # Store the data in the named graph
         return self.update.insert_graph(data_graph, data_uri)
     
+    def scan(self, graph_uri: str, page_size: int = 1000,
+             prefetch: bool = True) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Walk all triples of a named graph, one page of subjects at a time.
+        
+        Pages are selected by keyset pagination: each query asks for the
+        next page_size subject IRIs after the last one seen, in IRI order,
+        together with all their triples. Unlike OFFSET, the store never
+        has to skip over the pages already read. While the caller works
+        through one page, the next is fetched in the background.
+        
+        Triples whose subject is a blank node are not returned, since
+        blank node labels are not stable between queries.
+        
+        Args:
+            graph_uri: The URI of the named graph
+            page_size: The number of subjects per page
+            prefetch: Whether to fetch the next page in the background
+            
+        Yields:
+            (subject, predicate, object) tuples of RDFLib terms, grouped
+            by page; triples within a page come in no particular order
+        """
+        for page in self.scan_pages(graph_uri, page_size, prefetch=prefetch):
+            for row in page:
+                yield row["s"], row["p"], row["o"]
+    
+    def scan_pages(self, graph_uri: str, page_size: int = 1000, pattern: str = "",
+                   prefetch: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Walk the subjects of a named graph a page at a time, as scan does.
+        
+        Args:
+            graph_uri: The URI of the named graph
+            page_size: The number of subjects per page
+            pattern: A SPARQL group graph pattern, matched in the graph,
+                that binds ?s to the subjects to return; by default every
+                IRI subject in the graph
+            prefetch: Whether to fetch the next page in the background
+            
+        Yields:
+            Pages of result rows with an ?s, ?p and ?o binding for every
+            triple of page_size subjects, in ascending IRI order of subject
+        """
+        subjects_pattern = pattern or "?s ?anyPredicate ?anyObject"
+        
+        def fetch(after: Optional[str]) -> List[Dict[str, Any]]:
+            after_filter = f"&& STR(?s) > {Literal(after).n3()}" if after is not None else ""
+            query = f"""
+            SELECT ?s ?p ?o
+            WHERE {{
+                {{
+                    SELECT DISTINCT ?s
+                    WHERE {{
+                        GRAPH <{graph_uri}> {{ {subjects_pattern} }}
+                        FILTER(isIRI(?s) {after_filter})
+                    }}
+                    ORDER BY STR(?s)
+                    LIMIT {page_size}
+                }}
+                GRAPH <{graph_uri}> {{ ?s ?p ?o }}
+            }}
+            """
+            return list(self.query.iter_select(query))
+        
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        upcoming = None
+        try:
+            page = fetch(None)
+            while page:
+                subjects = {str(row["s"]) for row in page}
+                last = max(subjects)
+                # A short page is the last one, so there is nothing to prefetch
+                more = len(subjects) >= page_size
+                upcoming = pool.submit(fetch, last) if more and pool is not None else None
+                
+                yield page
+                
+                if not more:
+                    break
+                page = upcoming.result() if upcoming is not None else fetch(last)
+        finally:
+            if upcoming is not None:
+                upcoming.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    
     def validate_against_shape(self, data_graph: Graph, shape_name: str) -> Dict[str, Any]:
         """
         Validate data against a SHACL shape.
         
+        The shape is taken from the shape cache and validated locally with
+        a compiled ShapeValidator; the data does not need to be in the store.
+        
         Args:
             data_graph: The RDFLib Graph containing the data to validate
             shape_name: The name of the shape to validate against
@@ -327,17 +1598,8 @@ class FusekiStore:
         Returns:
             A dictionary containing the validation results
         """
-        # This is a simplified implementation that assumes Fuseki has SHACL validation
-        # In practice, you might need to use a separate SHACL validation library
-        
-        shape_graph = self.get_shape(shape_name)
-        if not shape_graph:
+        cached = self.get_cached_shape(shape_name)
+        if cached is None or not cached.graph:
             return {"valid": False, "error": "Shape not found"}
         
-        # In a real implementation, you would use a SHACL validation library here
-        # For now, we'll just return a placeholder result
-        return {
-            "valid": True,
-            "conforms": True,
-            "results": []
-        }
+        return cached.validator.validate(data_graph)
@@ -0,0 +1,516 @@
+"""
+HTTP transports for talking to SPARQL endpoints.
+
+This module provides the pluggable transport layer used by StoreConnection.
+A transport knows how to send a SPARQL query or update to an endpoint and
+hand back the raw response; parsing the response is left to the executors.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from SPARQLWrapper import SPARQLWrapper, JSON, TSV, CSV, TURTLE, XML, GET, POST
+
+
+# Media types used by the executors
+SPARQL_RESULTS_JSON = "application/sparql-results+json"
+SPARQL_RESULTS_TSV = "text/tab-separated-values"
+SPARQL_RESULTS_CSV = "text/csv"
+SPARQL_UPDATE = "application/sparql-update"
+TURTLE_MEDIA_TYPE = "text/turtle"
+N_TRIPLES_MEDIA_TYPE = "application/n-triples"
+N_QUADS_MEDIA_TYPE = "application/n-quads"
+
+# Queries longer than this (URL-encoded) are sent as a POST form instead of a GET
+MAX_GET_QUERY_LENGTH = 2048
+
+
+class TransportResponse:
+    """
+    A transport-neutral view of an HTTP response.
+
+    The body is either fully buffered or exposed as an iterator of byte
+    chunks, depending on whether the request was made in streaming mode.
+    """
+
+    def __init__(self,
+                 status_code: int,
+                 headers: Optional[Dict[str, str]] = None,
+                 body: Optional[bytes] = None,
+                 chunks: Optional[Iterator[bytes]] = None,
+                 closer: Optional[Callable[[], None]] = None):
+        """
+        Initialize the TransportResponse.
+
+        Args:
+            status_code: The HTTP status code
+            headers: The response headers
+            body: The buffered response body, if already read
+            chunks: An iterator over the response body, if streaming
+            closer: A callable that releases the underlying connection
+        """
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+        self._chunks = chunks
+        self._closer = closer
+
+    @property
+    def content(self) -> bytes:
+        """The full response body, reading any remaining chunks."""
+        if self._body is None:
+            self._body = b"".join(self._chunks or [])
+            self._chunks = None
+            self.close()
+        return self._body
+
+    def iter_content(self) -> Iterator[bytes]:
+        """
+        Iterate over the response body in chunks.
+
+        Returns:
+            An iterator of byte chunks
+        """
+        if self._body is not None:
+            yield self._body
+            return
+        try:
+            for chunk in self._chunks or []:
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def iter_lines(self) -> Iterator[bytes]:
+        """
+        Iterate over the response body line by line.
+
+        Returns:
+            An iterator of lines without their trailing newline
+        """
+        pending = b""
+        for chunk in self.iter_content():
+            pending += chunk
+            lines = pending.split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r")
+        if pending:
+            yield pending.rstrip(b"\r")
+
+    def json(self) -> Any:
+        """Decode the response body as JSON."""
+        return json.loads(self.content)
+
+    def close(self) -> None:
+        """Release the underlying connection."""
+        if self._closer is not None:
+            closer, self._closer = self._closer, None
+            closer()
+
+
+class SPARQLTransport:
+    """
+    Base class for transports used by StoreConnection.
+
+    Subclasses send SPARQL protocol requests over HTTP and return
+    TransportResponse objects. Implementations must be safe to call from
+    several threads at once, since one connection is shared by the query
+    and update executors and by every thread using the store.
+    """
+
+    def query(self, endpoint: str, query: str, accept: str,
+              stream: bool = False) -> TransportResponse:
+        """
+        Send a SPARQL query.
+
+        Args:
+            endpoint: The URL of the SPARQL query endpoint
+            query: The SPARQL query string
+            accept: The media type to request for the results
+            stream: Whether to stream the response body instead of buffering it
+
+        Returns:
+            The response from the endpoint
+        """
+        raise NotImplementedError
+
+    def update(self, endpoint: str, update: str) -> TransportResponse:
+        """
+        Send a SPARQL update.
+
+        Args:
+            endpoint: The URL of the SPARQL update endpoint
+            update: The SPARQL UPDATE string
+
+        Returns:
+            The response from the endpoint
+        """
+        raise NotImplementedError
+
+    def post_data(self, url: str, body: Union[bytes, Iterable[bytes]],
+                  content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        """
+        POST RDF data, for example to a Graph Store Protocol endpoint.
+
+        Args:
+            url: The URL to post to
+            body: The request body, or an iterable of byte blocks to stream
+            content_type: The media type of the body
+            params: Optional query string parameters
+
+        Returns:
+            The response from the endpoint
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the transport."""
+        pass
+
+
+class SessionTransport(SPARQLTransport):
+    """
+    Transport backed by a pooled, keep-alive requests.Session.
+
+    Connections to the endpoint are kept open and reused between requests,
+    so only the first request to a host pays for TCP and TLS setup. The
+    session can be shared between threads; each concurrent request checks
+    its own connection out of the pool.
+    """
+
+    def __init__(self,
+                 pool_connections: int = 4,
+                 pool_maxsize: int = 16,
+                 pool_block: bool = False,
+                 connect_timeout: Optional[float] = 5.0,
+                 read_timeout: Optional[float] = 60.0,
+                 auth: Optional[Tuple[str, str]] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 trust_env: bool = True,
+                 session: Optional[requests.Session] = None):
+        """
+        Initialize the SessionTransport.
+
+        Args:
+            pool_connections: The number of per-host connection pools to cache
+            pool_maxsize: The maximum number of connections kept open per host
+            pool_block: Whether to block when the pool is exhausted instead of
+                opening extra, non-pooled connections
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait between bytes of the response
+            auth: Optional (username, password) for HTTP basic authentication
+            headers: Optional headers to send with every request
+            trust_env: Whether to pick up proxy, CA bundle and netrc settings
+                from the environment
+            session: An existing session to use instead of creating one
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session or requests.Session()
+        self.trust_env = trust_env
+        self._settings: Dict[str, Dict[str, Any]] = {}
+        self._local = threading.local()
+
+        # requests re-reads the environment on every request; we resolve it
+        # once per endpoint in _request_settings instead
+        self.session.trust_env = False
+
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if auth:
+            self.session.auth = auth
+        if headers:
+            self.session.headers.update(headers)
+
+    def query(self, endpoint: str, query: str, accept: str,
+              stream: bool = False) -> TransportResponse:
+        """
+        Send a SPARQL query as a GET, or as a POST form for long queries.
+
+        Args:
+            endpoint: The URL of the SPARQL query endpoint
+            query: The SPARQL query string
+            accept: The media type to request for the results
+            stream: Whether to stream the response body instead of buffering it
+
+        Returns:
+            The response from the endpoint
+        """
+        headers = {"Accept": accept}
+        encoded = urlencode({"query": query})
+
+        if len(encoded) <= MAX_GET_QUERY_LENGTH:
+            response = self.session.get(f"{endpoint}?{encoded}", headers=headers,
+                                        timeout=self._timeout(), stream=stream,
+                                        **self._request_settings(endpoint))
+        else:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            response = self.session.post(endpoint, data=encoded, headers=headers,
+                                         timeout=self._timeout(), stream=stream,
+                                         **self._request_settings(endpoint))
+        return self._wrap(response, stream)
+
+    def update(self, endpoint: str, update: str) -> TransportResponse:
+        """
+        Send a SPARQL update as an application/sparql-update POST.
+
+        Args:
+            endpoint: The URL of the SPARQL update endpoint
+            update: The SPARQL UPDATE string
+
+        Returns:
+            The response from the endpoint
+        """
+        response = self.session.post(endpoint, data=update.encode("utf-8"),
+                                     headers={"Content-Type": f"{SPARQL_UPDATE}; charset=utf-8"},
+                                     timeout=self._timeout(),
+                                     **self._request_settings(endpoint))
+        return self._wrap(response, False)
+
+    def post_data(self, url: str, body: Union[bytes, Iterable[bytes]],
+                  content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        """
+        POST RDF data, streaming iterable bodies with chunked transfer encoding.
+
+        Args:
+            url: The URL to post to
+            body: The request body, or an iterable of byte blocks to stream
+            content_type: The media type of the body
+            params: Optional query string parameters
+
+        Returns:
+            The response from the endpoint
+        """
+        if not isinstance(body, bytes):
+            # requests would form-encode a list; a plain iterator is streamed
+            body = iter(body)
+        response = self.session.post(url, data=body, params=params,
+                                     headers={"Content-Type": content_type},
+                                     timeout=self._timeout(),
+                                     **self._request_settings(url))
+        return self._wrap(response, False)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    @contextmanager
+    def deadline(self, seconds: float):
+        """
+        Cap the timeouts of the requests this thread sends inside the block.
+
+        The read timeout bounds the wait between bytes of the response, not
+        the whole transfer, so a response that keeps trickling in can still
+        outlast the deadline.
+
+        Args:
+            seconds: Seconds from now until the deadline
+        """
+        previous = getattr(self._local, "deadline", None)
+        self._local.deadline = time.monotonic() + seconds
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def _timeout(self) -> Tuple[Optional[float], Optional[float]]:
+        """Get the (connect, read) timeouts for a request, capped by any deadline."""
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is None:
+            return self.timeout
+        remaining = max(deadline - time.monotonic(), 0.001)
+        return tuple(remaining if timeout is None else min(timeout, remaining)
+                     for timeout in self.timeout)
+
+    def _request_settings(self, endpoint: str) -> Dict[str, Any]:
+        """
+        Get the environment-derived request settings for an endpoint.
+
+        Args:
+            endpoint: The URL of the endpoint
+
+        Returns:
+            Keyword arguments for session requests to the endpoint
+        """
+        settings = self._settings.get(endpoint)
+        if settings is None:
+            settings = {}
+            if self.trust_env:
+                proxies = requests.utils.get_environ_proxies(endpoint)
+                if proxies:
+                    settings["proxies"] = proxies
+                ca_bundle = (os.environ.get("REQUESTS_CA_BUNDLE")
+                             or os.environ.get("CURL_CA_BUNDLE"))
+                if ca_bundle:
+                    settings["verify"] = ca_bundle
+                if self.session.auth is None:
+                    netrc_auth = requests.utils.get_netrc_auth(endpoint)
+                    if netrc_auth:
+                        settings["auth"] = netrc_auth
+            # Plain dict assignment is atomic, so concurrent first requests
+            # at worst resolve the same settings twice
+            self._settings[endpoint] = settings
+        return settings
+
+    def _wrap(self, response: requests.Response, stream: bool) -> TransportResponse:
+        """
+        Check the status of a response and wrap it.
+
+        Args:
+            response: The requests response
+            stream: Whether the body should be left unread
+
+        Returns:
+            The wrapped response
+        """
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+
+        if stream:
+            return TransportResponse(response.status_code, dict(response.headers),
+                                     chunks=response.iter_content(chunk_size=65536),
+                                     closer=response.close)
+        return TransportResponse(response.status_code, dict(response.headers),
+                                 body=response.content)
+
+
+class SPARQLWrapperTransport(SPARQLTransport):
+    """
+    Transport backed by SPARQLWrapper.
+
+    SPARQLWrapper opens a new urllib connection for every request. This
+    transport is kept for compatibility with endpoints and proxies that
+    only work with SPARQLWrapper's request style. SPARQLWrapper objects
+    hold the query being sent, so each thread gets its own wrappers.
+    """
+
+    # SPARQLWrapper return formats for the media types used by the executors
+    RETURN_FORMATS = {
+        SPARQL_RESULTS_JSON: JSON,
+        SPARQL_RESULTS_TSV: TSV,
+        SPARQL_RESULTS_CSV: CSV,
+        TURTLE_MEDIA_TYPE: TURTLE,
+        "application/sparql-results+xml": XML,
+    }
+
+    def __init__(self):
+        """Initialize the SPARQLWrapperTransport."""
+        self._local = threading.local()
+
+    def query(self, endpoint: str, query: str, accept: str,
+              stream: bool = False) -> TransportResponse:
+        """
+        Send a SPARQL query through SPARQLWrapper.
+
+        Args:
+            endpoint: The URL of the SPARQL query endpoint
+            query: The SPARQL query string
+            accept: The media type to request for the results
+            stream: Whether to stream the response body instead of buffering it
+
+        Returns:
+            The response from the endpoint
+        """
+        wrapper = self._get_wrapper(endpoint, GET)
+        wrapper.setQuery(query)
+        wrapper.setReturnFormat(self.RETURN_FORMATS.get(accept, JSON))
+        return self._wrap(wrapper.query().response, stream)
+
+    def update(self, endpoint: str, update: str) -> TransportResponse:
+        """
+        Send a SPARQL update through SPARQLWrapper.
+
+        Args:
+            endpoint: The URL of the SPARQL update endpoint
+            update: The SPARQL UPDATE string
+
+        Returns:
+            The response from the endpoint
+        """
+        wrapper = self._get_wrapper(endpoint, POST)
+        wrapper.setQuery(update)
+        return self._wrap(wrapper.query().response, False)
+
+    def post_data(self, url: str, body: Union[bytes, Iterable[bytes]],
+                  content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        """
+        POST RDF data with urllib, which SPARQLWrapper uses underneath.
+
+        Args:
+            url: The URL to post to
+            body: The request body, or an iterable of byte blocks to stream
+            content_type: The media type of the body
+            params: Optional query string parameters
+
+        Returns:
+            The response from the endpoint
+        """
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        request = urllib.request.Request(url, data=body, method="POST",
+                                         headers={"Content-Type": content_type})
+        return self._wrap(urllib.request.urlopen(request), False)
+
+    def _get_wrapper(self, endpoint: str, method: str) -> SPARQLWrapper:
+        """
+        Get the calling thread's SPARQLWrapper for an endpoint and method,
+        creating it if needed.
+
+        Args:
+            endpoint: The URL of the SPARQL endpoint
+            method: The HTTP method the wrapper uses (GET or POST)
+
+        Returns:
+            The SPARQLWrapper for the endpoint
+        """
+        wrappers = getattr(self._local, "wrappers", None)
+        if wrappers is None:
+            wrappers = self._local.wrappers = {}
+
+        key = (endpoint, method)
+        if key not in wrappers:
+            wrapper = SPARQLWrapper(endpoint)
+            wrapper.setMethod(method)
+            wrappers[key] = wrapper
+        return wrappers[key]
+
+    def _wrap(self, response: Any, stream: bool) -> TransportResponse:
+        """
+        Wrap a urllib response.
+
+        Args:
+            response: The urllib response returned by SPARQLWrapper
+            stream: Whether the body should be left unread
+
+        Returns:
+            The wrapped response
+        """
+        headers = dict(response.info().items())
+        status = getattr(response, "status", 200)
+
+        if stream:
+            chunks = iter(lambda: response.read(65536), b"")
+            return TransportResponse(status, headers, chunks=chunks, closer=response.close)
+
+        try:
+            return TransportResponse(status, headers, body=response.read())
+        finally:
+            response.close()
@@ -0,0 +1,695 @@
+"""
+In-process SHACL validation.
+
+This module validates data against the SHACL shapes produced by
+ShapeGenerator without a round trip to a SHACL engine. A shape graph is
+compiled once into checker objects, one per property shape, which are
+then applied to RDF graphs or directly to Pydantic model instances.
+
+Only the constraints ShapeGenerator emits are supported: sh:datatype,
+sh:minCount, sh:maxCount, sh:minLength, sh:maxLength, sh:pattern and
+sh:minInclusive/minExclusive/maxInclusive/maxExclusive. Other constraints
+in a shape graph are ignored.
+
+Batches of instances can be validated column by column with NumPy
+(pip install langgraphsemantic[numpy]).
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+from rdflib import Graph, URIRef, Literal, BNode
+from rdflib.namespace import RDF, XSD, SH
+from rdflib.term import Node
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from langgraphsemantic.serialization import EXTENDED_LITERAL_TYPES
+
+
+# A value node as seen by the checkers: (is_literal, native value, datatype, lexical form).
+# The lexical form of a blank node is None, as blank nodes have no string form in SHACL.
+ValueNode = Tuple[bool, Any, Optional[str], Optional[str]]
+
+# Datatypes of the literals InstanceSerializer writes for Python scalars
+_PYTHON_DATATYPES = {
+    str: str(XSD.string),
+    bool: str(XSD.boolean),
+    int: str(XSD.integer),
+    float: str(XSD.double),
+}
+
+_XSD_STRING = str(XSD.string)
+_XSD_BOOLEAN = str(XSD.boolean)
+_RDF_LANG_STRING = str(RDF.langString)
+
+# Range constraints: (SHACL parameter, constraint component, comparison, message)
+_RANGE_CONSTRAINTS = [
+    (SH.minInclusive, SH.MinInclusiveConstraintComponent,
+     lambda value, limit: value >= limit, "Value is less than {limit}"),
+    (SH.minExclusive, SH.MinExclusiveConstraintComponent,
+     lambda value, limit: value > limit, "Value is not greater than {limit}"),
+    (SH.maxInclusive, SH.MaxInclusiveConstraintComponent,
+     lambda value, limit: value <= limit, "Value is greater than {limit}"),
+    (SH.maxExclusive, SH.MaxExclusiveConstraintComponent,
+     lambda value, limit: value < limit, "Value is not less than {limit}"),
+]
+
+
+def term_value(term: Node) -> ValueNode:
+    """
+    Convert an RDF term to a value node.
+
+    Args:
+        term: A URIRef, Literal or BNode
+
+    Returns:
+        The value node
+    """
+    if isinstance(term, Literal):
+        if term.language:
+            datatype = _RDF_LANG_STRING
+        else:
+            datatype = str(term.datatype) if term.datatype else _XSD_STRING
+        # Ill-typed literals, such as "abc"^^xsd:integer, never match their datatype
+        native = None if getattr(term, "ill_typed", False) else term.toPython()
+        return True, native, datatype, str(term)
+    if isinstance(term, BNode):
+        return False, None, None, None
+    return False, None, None, str(term)
+
+
+def python_value(value: Any) -> Optional[ValueNode]:
+    """
+    Convert a Python field value to the value node it is stored as.
+
+    Args:
+        value: A scalar field value or a nested model instance
+
+    Returns:
+        The value node, or None for values InstanceSerializer does not write
+    """
+    value_type = type(value)
+    if value_type is str:
+        return True, value, _XSD_STRING, value
+    if value_type is bool:
+        return True, value, _XSD_BOOLEAN, "true" if value else "false"
+    datatype = _PYTHON_DATATYPES.get(value_type)
+    if datatype is not None:
+        return True, value, datatype, str(value)
+    if isinstance(value, BaseModel):
+        # Nested instances are stored as IRIs
+        return False, None, None, ""
+    # Subclasses such as str enums are stored as their base type; bool before int
+    for base in (bool, str, int, float):
+        if isinstance(value, base):
+            return python_value(str.__str__(value) if base is str else base(value))
+    if isinstance(value, EXTENDED_LITERAL_TYPES):
+        return term_value(Literal(value))
+    return None
+
+
+class PropertyChecker:
+    """
+    Checks the values of one property against a compiled property shape.
+    """
+
+    def __init__(self, path: URIRef, constraints: Dict[URIRef, Node]):
+        """
+        Initialize the PropertyChecker.
+
+        Args:
+            path: The property path (a predicate IRI)
+            constraints: The constraint parameters of the property shape,
+                keyed by SHACL parameter
+        """
+        self.path = path
+        self.min_count = _int_value(constraints.get(SH.minCount))
+        self.max_count = _int_value(constraints.get(SH.maxCount))
+        # (constraint component, check for one value node, check for a ValueColumn, message)
+        self.checks: List[Tuple[URIRef, Callable[[ValueNode], bool],
+                                Callable[["ValueColumn"], Any], str]] = []
+
+        datatype = constraints.get(SH.datatype)
+        if datatype is not None:
+            self.checks.append(self._datatype_check(str(datatype)))
+
+        min_length = _int_value(constraints.get(SH.minLength))
+        if min_length is not None:
+            self.checks.append((
+                SH.MinLengthConstraintComponent,
+                lambda node: node[3] is not None and len(node[3]) >= min_length,
+                lambda column: column.lengths >= min_length,
+                f"Value is shorter than {min_length} characters",
+            ))
+
+        max_length = _int_value(constraints.get(SH.maxLength))
+        if max_length is not None:
+            self.checks.append((
+                SH.MaxLengthConstraintComponent,
+                lambda node: node[3] is not None and len(node[3]) <= max_length,
+                lambda column: (column.lengths >= 0) & (column.lengths <= max_length),
+                f"Value is longer than {max_length} characters",
+            ))
+
+        pattern = constraints.get(SH.pattern)
+        if pattern is not None:
+            search = re.compile(str(pattern)).search
+            self.checks.append((
+                SH.PatternConstraintComponent,
+                lambda node: node[3] is not None and search(node[3]) is not None,
+                lambda column: column.matches(search),
+                f"Value does not match pattern {pattern}",
+            ))
+
+        for parameter, component, compare, message in _RANGE_CONSTRAINTS:
+            limit = constraints.get(parameter)
+            if limit is not None:
+                self.checks.append(self._range_check(component, compare, limit.toPython(),
+                                                     message.format(limit=limit)))
+
+    def validate(self, focus_node: str, values: List[ValueNode],
+                 results: List[Dict[str, Any]]) -> None:
+        """
+        Check the values of the property for one focus node.
+
+        Args:
+            focus_node: The focus node, as a string
+            values: The value nodes of the property
+            results: The list to append validation results to
+        """
+        if self.min_count is not None and len(values) < self.min_count:
+            results.append(self._result(focus_node, None, SH.MinCountConstraintComponent,
+                                        f"Less than {self.min_count} values"))
+        if self.max_count is not None and len(values) > self.max_count:
+            results.append(self._result(focus_node, None, SH.MaxCountConstraintComponent,
+                                        f"More than {self.max_count} values"))
+
+        for node in values:
+            for component, check, _, message in self.checks:
+                if not check(node):
+                    results.append(self._result(focus_node, node, component, message))
+
+    def validate_column(self, values: List[Any], focus_nodes: List[str],
+                        results: List[List[Dict[str, Any]]]) -> None:
+        """
+        Check one field of a batch of instances.
+
+        Each constraint is evaluated once for the whole column. Results
+        are added in the same order validate would add them.
+
+        Args:
+            values: The field value of each instance
+            focus_nodes: The focus node of each instance
+            results: The result list of each instance to append to
+        """
+        column = ValueColumn(values)
+
+        if self.min_count is not None:
+            for i in np.flatnonzero(column.counts < self.min_count):
+                results[i].append(self._result(focus_nodes[i], None,
+                                               SH.MinCountConstraintComponent,
+                                               f"Less than {self.min_count} values"))
+        if self.max_count is not None:
+            for i in np.flatnonzero(column.counts > self.max_count):
+                results[i].append(self._result(focus_nodes[i], None,
+                                               SH.MaxCountConstraintComponent,
+                                               f"More than {self.max_count} values"))
+
+        if not self.checks or not len(column):
+            return
+
+        # Violations as (value index, check index), ordered by value and then by check
+        failed = ~np.stack([column_check(column) for _, _, column_check, _ in self.checks])
+        check_indexes, value_indexes = np.nonzero(failed)
+        order = np.lexsort((check_indexes, value_indexes))
+
+        for k in order:
+            node_index = value_indexes[k]
+            component, _, _, message = self.checks[check_indexes[k]]
+            owner = column.owners[node_index]
+            results[owner].append(self._result(focus_nodes[owner], column.node(node_index),
+                                               component, message))
+
+    def _result(self, focus_node: str, node: Optional[ValueNode],
+                component: URIRef, message: str) -> Dict[str, Any]:
+        """Build a validation result."""
+        return {
+            "focus_node": focus_node,
+            "path": str(self.path),
+            "value": node[3] if node is not None else None,
+            "constraint": str(component),
+            "message": message,
+        }
+
+    @staticmethod
+    def _datatype_check(datatype: str) -> Tuple[URIRef, Callable, Callable, str]:
+        """Build the checks for sh:datatype."""
+        def check(node: ValueNode) -> bool:
+            if not node[0] or node[2] != datatype:
+                return False
+            # Ill-typed literals have no native value; strings are always well-formed
+            return node[1] is not None or datatype == _XSD_STRING
+
+        def column_check(column: "ValueColumn") -> Any:
+            return (column.datatypes == datatype) & (column.has_native | (datatype == _XSD_STRING))
+
+        return (SH.DatatypeConstraintComponent, check, column_check,
+                f"Value is not of datatype {datatype}")
+
+    @staticmethod
+    def _range_check(component: URIRef, compare: Callable[[Any, Any], bool], limit: Any,
+                     message: str) -> Tuple[URIRef, Callable, Callable, str]:
+        """Build the checks for a range constraint."""
+        def check(node: ValueNode) -> bool:
+            if not node[0] or node[1] is None or isinstance(node[1], str):
+                return False
+            try:
+                return compare(node[1], limit)
+            except TypeError:
+                # Incomparable values, e.g. a date against a number
+                return False
+
+        numeric_limit = type(limit) in (int, float)
+
+        def column_check(column: "ValueColumn") -> Any:
+            numbers = column.numbers if numeric_limit else None
+            if numbers is None:
+                return np.fromiter(map(check, column.nodes), dtype=bool, count=len(column))
+            return compare(numbers, limit)
+
+        return component, check, column_check, message
+
+
+class ValueColumn:
+    """
+    The values of one field across a batch of instances, as arrays.
+
+    List-valued fields contribute one entry per item; owners maps each
+    entry back to its instance. Columns of plain str, int, float or bool
+    values are checked straight from the Python values; other columns go
+    through value nodes. Derived arrays are built on first use, so a
+    column only pays for the constraints its shape has.
+    """
+
+    def __init__(self, values: List[Any]):
+        """
+        Initialize the ValueColumn.
+
+        Args:
+            values: The field value of each instance
+        """
+        value_types = set(map(type, values))
+        if len(value_types) == 1 and next(iter(value_types)) in _PYTHON_DATATYPES:
+            # One plain scalar per instance
+            items = values
+            self.owners = range(len(values))
+            self.counts = np.ones(len(values), dtype=np.int64)
+        else:
+            items, owners, counts = self._flatten(values)
+            self.owners = owners
+            self.counts = np.array(counts, dtype=np.int64)
+            value_types = set(map(type, items))
+
+        item_type = next(iter(value_types)) if len(value_types) == 1 else None
+        if item_type in _PYTHON_DATATYPES:
+            self.item_type = item_type
+            self.items = items
+            self._nodes = None
+        else:
+            self.item_type = None
+            self.items = None
+            self._nodes = items
+
+        self._lexicals = None
+        self._lengths = None
+        self._numbers = False
+
+    @staticmethod
+    def _flatten(values: List[Any]) -> Tuple[List[Any], List[int], List[int]]:
+        """
+        Flatten list values and drop values that are not written.
+
+        Args:
+            values: The field value of each instance
+
+        Returns:
+            A tuple of (items, owner of each item, item count of each
+            instance). Items are plain scalars if every value was one, and
+            value nodes otherwise.
+        """
+        items: List[Any] = []
+        owners: List[int] = []
+        counts: List[int] = []
+
+        for i, value in enumerate(values):
+            if value is None:
+                counts.append(0)
+                continue
+            members = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+            count = 0
+            for item in members:
+                if item is not None:
+                    items.append(item)
+                    owners.append(i)
+                    count += 1
+            counts.append(count)
+
+        value_types = set(map(type, items))
+        if len(value_types) == 1 and next(iter(value_types)) in _PYTHON_DATATYPES:
+            return items, owners, counts
+
+        # Mixed or other types: convert to value nodes, dropping values that are not written
+        nodes = list(map(python_value, items))
+        if None in nodes:
+            kept = [k for k, node in enumerate(nodes) if node is not None]
+            for k, node in enumerate(nodes):
+                if node is None:
+                    counts[owners[k]] -= 1
+            nodes = [nodes[k] for k in kept]
+            owners = [owners[k] for k in kept]
+        return nodes, owners, counts
+
+    def __len__(self) -> int:
+        """The number of value nodes."""
+        return len(self.items) if self.items is not None else len(self._nodes)
+
+    def node(self, index: int) -> ValueNode:
+        """The value node at an index."""
+        if self.items is not None:
+            return python_value(self.items[index])
+        return self._nodes[index]
+
+    @property
+    def nodes(self) -> List[ValueNode]:
+        """All value nodes."""
+        if self._nodes is None:
+            self._nodes = list(map(python_value, self.items))
+        return self._nodes
+
+    @property
+    def datatypes(self) -> Any:
+        """The datatype of each value node, None for IRIs and blank nodes."""
+        datatypes = np.empty(len(self), dtype=object)
+        if self.items is not None:
+            datatypes[:] = _PYTHON_DATATYPES[self.item_type]
+        else:
+            datatypes[:] = [node[2] for node in self._nodes]
+        return datatypes
+
+    @property
+    def has_native(self) -> Any:
+        """True for well-typed literals."""
+        if self.items is not None:
+            return np.ones(len(self), dtype=bool)
+        return np.fromiter((node[0] and node[1] is not None for node in self._nodes),
+                           dtype=bool, count=len(self))
+
+    @property
+    def lexicals(self) -> List[Optional[str]]:
+        """The lexical form of each value node, None for blank nodes."""
+        if self._lexicals is None:
+            if self.item_type is str:
+                self._lexicals = self.items
+            elif self.items is not None:
+                self._lexicals = [node[3] for node in self.nodes]
+            else:
+                self._lexicals = [node[3] for node in self._nodes]
+        return self._lexicals
+
+    @property
+    def lengths(self) -> Any:
+        """The length of each lexical form, -1 for blank nodes."""
+        if self._lengths is None:
+            if self.item_type is str:
+                self._lengths = np.fromiter(map(len, self.items), dtype=np.int64,
+                                            count=len(self))
+            else:
+                self._lengths = np.fromiter(
+                    (len(lexical) if lexical is not None else -1 for lexical in self.lexicals),
+                    dtype=np.int64, count=len(self))
+        return self._lengths
+
+    @property
+    def numbers(self) -> Any:
+        """
+        The values as an int64 or float64 array, or None unless every
+        value is a plain int or float.
+        """
+        if self._numbers is False:
+            if self.items is not None:
+                natives = self.items
+                types = {self.item_type}
+            else:
+                natives = [node[1] for node in self._nodes]
+                types = set(map(type, natives))
+            numbers = None
+            if types and types <= {int, float}:
+                try:
+                    numbers = np.array(natives, dtype=np.float64 if float in types else np.int64)
+                except OverflowError:
+                    numbers = None
+            self._numbers = numbers
+        return self._numbers
+
+    def matches(self, search: Callable[[str], Any]) -> Any:
+        """
+        Apply a compiled regular expression to every lexical form.
+
+        Args:
+            search: The search method of the compiled pattern
+
+        Returns:
+            True where the pattern matches
+        """
+        return np.fromiter(
+            (lexical is not None and search(lexical) is not None for lexical in self.lexicals),
+            dtype=bool, count=len(self))
+
+
+class CompiledShape:
+    """
+    A SHACL node shape compiled into property checkers.
+    """
+
+    def __init__(self, shape: Node, target_class: Optional[URIRef],
+                 properties: List[PropertyChecker]):
+        """
+        Initialize the CompiledShape.
+
+        Args:
+            shape: The node shape
+            target_class: The sh:targetClass of the shape, if any
+            properties: The checkers for the shape's property shapes
+        """
+        self.shape = shape
+        self.target_class = target_class
+        self.properties = properties
+
+    def validate_node(self, graph: Graph, focus_node: Node,
+                      results: List[Dict[str, Any]]) -> None:
+        """
+        Validate one focus node in a data graph.
+
+        Args:
+            graph: The data graph
+            focus_node: The node to validate
+            results: The list to append validation results to
+        """
+        # Read the node's values in one pass rather than one lookup per property
+        values: Dict[Node, List[ValueNode]] = {}
+        for predicate, obj in graph.predicate_objects(focus_node):
+            values.setdefault(predicate, []).append(term_value(obj))
+
+        focus = str(focus_node)
+        for checker in self.properties:
+            checker.validate(focus, values.get(checker.path, []), results)
+
+
+class ShapeValidator:
+    """
+    Validates data against a SHACL shape graph without a SHACL engine.
+
+    The shape graph is compiled once when the validator is created; a
+    validator can then be reused for any number of graphs or instances.
+    """
+
+    def __init__(self, shape_graph: Graph, base_namespace: str = "http://example.org/"):
+        """
+        Initialize the ShapeValidator.
+
+        Args:
+            shape_graph: The graph containing the SHACL shapes
+            base_namespace: The namespace of model classes and properties,
+                used to map model instances to shapes and fields to paths
+        """
+        self.base_namespace = base_namespace
+        self.shapes = self.compile(shape_graph)
+        self._by_target = {shape.target_class: shape for shape in self.shapes
+                           if shape.target_class is not None}
+        self._instance_fields: Dict[type, List[Tuple[str, PropertyChecker]]] = {}
+
+    @staticmethod
+    def compile(shape_graph: Graph) -> List[CompiledShape]:
+        """
+        Compile the node shapes in a shape graph.
+
+        Args:
+            shape_graph: The graph containing the SHACL shapes
+
+        Returns:
+            The compiled shapes
+        """
+        shapes = []
+        for shape in set(shape_graph.subjects(RDF.type, SH.NodeShape)):
+            properties = []
+            for property_shape in shape_graph.objects(shape, SH.property):
+                path = shape_graph.value(property_shape, SH.path)
+                if not isinstance(path, URIRef):
+                    # Only predicate paths are generated
+                    continue
+                constraints = dict(shape_graph.predicate_objects(property_shape))
+                properties.append(PropertyChecker(path, constraints))
+            shapes.append(CompiledShape(shape, shape_graph.value(shape, SH.targetClass),
+                                        properties))
+        return shapes
+
+    def validate(self, data_graph: Graph) -> Dict[str, Any]:
+        """
+        Validate the target nodes of every shape in a data graph.
+
+        Args:
+            data_graph: The graph containing the data to validate
+
+        Returns:
+            A validation report
+        """
+        results: List[Dict[str, Any]] = []
+        for shape in self.shapes:
+            if shape.target_class is None:
+                continue
+            for focus_node in data_graph.subjects(RDF.type, shape.target_class):
+                shape.validate_node(data_graph, focus_node, results)
+        return _report(results)
+
+    def validate_instance(self, instance: BaseModel,
+                          focus_node: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Validate a Pydantic model instance without converting it to RDF.
+
+        Field values are checked as the literals InstanceSerializer would
+        write for them, so the result is the same as validating the
+        serialized instance.
+
+        Args:
+            instance: The instance to validate
+            focus_node: The IRI to report violations against (defaults to
+                the model name)
+
+        Returns:
+            A validation report
+        """
+        fields = self._fields_for(instance.__class__)
+        focus = focus_node or f"{self.base_namespace}{instance.__class__.__name__}"
+        results: List[Dict[str, Any]] = []
+
+        for field_name, checker in fields:
+            value = getattr(instance, field_name, None)
+            if value is None:
+                values = []
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                values = [node for node in map(python_value, value) if node is not None]
+            else:
+                node = python_value(value)
+                values = [node] if node is not None else []
+            checker.validate(focus, values, results)
+
+        return _report(results)
+
+    def validate_batch(self, instances: Iterable[BaseModel],
+                       focus_nodes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Validate a batch of instances of one model class, field by field.
+
+        Each field is gathered into a column and each constraint is
+        checked for the whole column at once. The results for every
+        instance are the same as validate_instance gives.
+
+        Args:
+            instances: The instances to validate, all of the same class
+            focus_nodes: The IRI to report violations against for each
+                instance (defaults to the model name)
+
+        Returns:
+            A dictionary with "valid" (True if every instance conforms),
+            "conforms" (a boolean array with one entry per instance) and
+            "results" (the list of validation results of each instance)
+
+        Raises:
+            ValueError: If the instances are of more than one class
+        """
+        if np is None:
+            raise ImportError(
+                "Batch validation requires numpy; "
+                "install it with 'pip install langgraphsemantic[numpy]'"
+            )
+
+        instances = list(instances)
+        results: List[List[Dict[str, Any]]] = [[] for _ in instances]
+        if not instances:
+            return {"valid": True, "conforms": np.ones(0, dtype=bool), "results": results}
+
+        model_class = instances[0].__class__
+        if any(instance.__class__ is not model_class for instance in instances):
+            raise ValueError("validate_batch requires instances of a single model class")
+
+        if focus_nodes is None:
+            focus_nodes = [f"{self.base_namespace}{model_class.__name__}"] * len(instances)
+
+        for field_name, checker in self._fields_for(model_class):
+            values = [getattr(instance, field_name, None) for instance in instances]
+            checker.validate_column(values, focus_nodes, results)
+
+        conforms = np.fromiter((not instance_results for instance_results in results),
+                               dtype=bool, count=len(results))
+        return {"valid": bool(conforms.all()), "conforms": conforms, "results": results}
+
+    def _fields_for(self, model_class: type) -> List[Tuple[str, PropertyChecker]]:
+        """
+        Get the field name and checker pairs for a model class.
+
+        Args:
+            model_class: The Pydantic model class
+
+        Returns:
+            The pairs, in property shape order
+
+        Raises:
+            KeyError: If no shape targets the model class
+        """
+        fields = self._instance_fields.get(model_class)
+        if fields is None:
+            shape = self._by_target.get(URIRef(f"{self.base_namespace}{model_class.__name__}"))
+            if shape is None:
+                raise KeyError(f"No shape targets {model_class.__name__}")
+            prefix_length = len(self.base_namespace)
+            fields = self._instance_fields[model_class] = [
+                (str(checker.path)[prefix_length:], checker) for checker in shape.properties
+                if str(checker.path).startswith(self.base_namespace)
+            ]
+        return fields
+
+
+def _report(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build a validation report from a list of validation results."""
+    conforms = not results
+    return {"valid": conforms, "conforms": conforms, "results": results}
+
+
+def _int_value(term: Optional[Node]) -> Optional[int]:
+    """Get the integer value of a literal constraint parameter."""
+    return int(term.toPython()) if term is not None else None
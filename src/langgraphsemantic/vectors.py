@@ -0,0 +1,410 @@
+"""
+Vector search over documents.
+
+This module provides a deterministic hashing embedder, useful offline and
+in tests, and an approximate nearest-neighbour index over document
+embeddings. The index partitions vectors into inverted lists around
+k-means centroids (IVF) and can keep its vectors in a memory-mapped file.
+Both require NumPy (pip install langgraphsemantic[numpy]).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from langgraphsemantic.search import tokenize
+
+
+# An embedding function maps texts to one vector per text
+Embedder = Callable[[List[str]], Any]
+
+
+def _require_numpy(feature: str) -> None:
+    """Raise an ImportError naming the feature if NumPy is missing."""
+    if np is None:
+        raise ImportError(
+            f"{feature} requires numpy; "
+            "install it with 'pip install langgraphsemantic[numpy]'"
+        )
+
+
+def text_digest(text: str) -> str:
+    """
+    Fingerprint a document's text, to tell whether it needs embedding again.
+
+    Args:
+        text: The document text
+
+    Returns:
+        A short hex digest
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class HashingEmbedder:
+    """
+    A deterministic embedder hashing word tokens into a fixed number of buckets.
+
+    Texts sharing words get similar vectors, so it stands in for a real
+    embedding model offline and in tests. Any callable taking a list of
+    texts and returning one vector per text can be used instead, such as
+    the embed_documents method of a LangChain Embeddings object.
+    """
+
+    def __init__(self, dim: int = 256):
+        """
+        Initialize the HashingEmbedder.
+
+        Args:
+            dim: The number of dimensions
+        """
+        _require_numpy("HashingEmbedder")
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def __call__(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            A float32 array with one unit-length row per text
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                bucket = self._buckets.get(token)
+                if bucket is None:
+                    value = int.from_bytes(
+                        hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                    bucket = self._buckets[token] = (value % self.dim,
+                                                     1.0 if value >> 63 else -1.0)
+                vectors[row, bucket[0]] += bucket[1]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+class VectorIndex:
+    """
+    An approximate nearest-neighbour index ranking vectors by cosine similarity.
+
+    Small indexes are searched exhaustively. Once train_threshold vectors
+    have been added, the vectors are clustered with k-means and a search
+    only scores the vectors in the n_probe lists whose centroids are
+    closest to the query. The index is retrained when it has grown four
+    times past its last training.
+
+    Vectors are stored normalized, in a file memory-mapped from path if
+    one is given, so a large index does not have to fit in memory and is
+    reloaded without re-embedding. Each vector carries the digest of the
+    text it was computed from.
+
+    Removing or replacing a vector only marks its row dead. Once dead rows
+    outnumber live ones, the live rows are moved to the front and the dead
+    ones dropped, so an index whose documents keep changing does not grow
+    without bound.
+    """
+
+    def __init__(self, dim: int, path: Optional[str] = None, n_probe: int = 8,
+                 train_threshold: int = 4096):
+        """
+        Initialize the VectorIndex.
+
+        Args:
+            dim: The number of dimensions
+            path: A directory to keep the index in, or None to keep it in memory
+            n_probe: The number of inverted lists to search
+            train_threshold: The number of vectors at which to start
+                clustering them
+        """
+        _require_numpy("VectorIndex")
+        self.dim = dim
+        self.path = path
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold
+
+        self.ids: List[Optional[str]] = []
+        self.digests: List[Optional[str]] = []
+        self.positions: Dict[str, int] = {}
+        self.centroids: Optional["np.ndarray"] = None
+        self._trained_count = 0
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._live = np.zeros(0, dtype=bool)
+        self._lock = threading.RLock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._load()
+
+    def __len__(self) -> int:
+        """The number of live vectors."""
+        return len(self.positions)
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Whether a vector is stored for a document."""
+        return doc_id in self.positions
+
+    def digest(self, doc_id: str) -> Optional[str]:
+        """
+        Get the digest of the text a document's vector was computed from.
+
+        Args:
+            doc_id: The document ID
+
+        Returns:
+            The digest, or None if the document has no vector
+        """
+        position = self.positions.get(doc_id)
+        return self.digests[position] if position is not None else None
+
+    def add(self, ids: Sequence[str], vectors: Any,
+            digests: Optional[Sequence[Optional[str]]] = None) -> None:
+        """
+        Add vectors, replacing the vectors of documents already stored.
+
+        Args:
+            ids: The document IDs
+            vectors: One vector per ID
+            digests: The digest of each document's text
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+        digests = list(digests) if digests is not None else [None] * len(ids)
+
+        with self._lock:
+            self._remove(ids)
+            start = len(self.ids)
+            self._reserve(start + len(ids))
+            self._vectors[start:start + len(ids)] = vectors
+            self._live[start:start + len(ids)] = True
+            if self.centroids is not None:
+                self._lists[start:start + len(ids)] = self._assign(vectors)
+            for offset, (doc_id, digest) in enumerate(zip(ids, digests)):
+                self.ids.append(doc_id)
+                self.digests.append(digest)
+                self.positions[doc_id] = start + offset
+
+            if len(self.positions) >= self.train_threshold and \
+                    len(self.positions) >= 4 * self._trained_count:
+                self.train()
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """
+        Remove the vectors of documents.
+
+        Args:
+            ids: The document IDs
+
+        Returns:
+            The number of vectors removed
+        """
+        with self._lock:
+            return self._remove(ids)
+
+    def search(self, vector: Any, k: int = 5,
+               exclude: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Find the stored vectors most similar to a query vector.
+
+        Args:
+            vector: The query vector
+            k: The maximum number of results
+            exclude: Document IDs to leave out
+
+        Returns:
+            Pairs of (document ID, cosine similarity), best first
+        """
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        with self._lock:
+            count = len(self.ids)
+            live = self._live[:count].copy()
+            for doc_id in exclude or ():
+                position = self.positions.get(doc_id)
+                if position is not None:
+                    live[position] = False
+
+            if self.centroids is not None:
+                probe = min(self.n_probe, len(self.centroids))
+                closest = np.argpartition(-(self.centroids @ query), probe - 1)[:probe]
+                live &= np.isin(self._lists[:count], closest)
+
+            if self.centroids is None:
+                # Scoring every row and masking beats gathering the live rows
+                scores = self._vectors[:count] @ query
+                candidates = np.nonzero(live)[0]
+                scores = scores[candidates]
+            else:
+                candidates = np.nonzero(live)[0]
+                scores = self._vectors[candidates] @ query
+            if not len(candidates):
+                return []
+            if len(candidates) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self.ids[candidates[i]], float(scores[i])) for i in top]
+
+    def train(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Cluster the stored vectors into inverted lists with k-means.
+
+        Args:
+            n_lists: The number of lists; by default the square root of
+                the number of vectors
+            iterations: The number of k-means iterations
+            seed: The seed for choosing initial centroids and the sample
+        """
+        with self._lock:
+            live = np.nonzero(self._live[:len(self.ids)])[0]
+            if not len(live):
+                return
+            n_lists = min(n_lists or max(1, int(len(live) ** 0.5)), len(live))
+            rng = np.random.default_rng(seed)
+            sample = self._vectors[rng.choice(live, min(len(live), 256 * n_lists), replace=False)]
+
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for j in range(n_lists):
+                    members = sample[assignment == j]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        norm = np.linalg.norm(centroid)
+                        centroids[j] = centroid / norm if norm > 0 else centroids[j]
+
+            self.centroids = centroids
+            count = len(self.ids)
+            for start in range(0, count, 65536):
+                stop = min(count, start + 65536)
+                self._lists[start:stop] = self._assign(self._vectors[start:stop])
+            self._trained_count = len(live)
+
+    def compact(self) -> None:
+        """Drop the rows of removed vectors, moving the live rows to the front."""
+        with self._lock:
+            count = len(self.ids)
+            keep = np.nonzero(self._live[:count])[0]
+            size = len(keep)
+            if size == count:
+                return
+            self._vectors[:size] = self._vectors[keep]
+            self._lists[:size] = self._lists[keep]
+            self._live[:size] = True
+            self._live[size:count] = False
+            self.ids = [self.ids[i] for i in keep]
+            self.digests = [self.digests[i] for i in keep]
+            self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+    def save(self) -> None:
+        """Write the index to its directory, if it has one."""
+        if not self.path:
+            return
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            count = len(self.ids)
+            np.save(os.path.join(self.path, "lists.npy"), self._lists[:count])
+            if self.centroids is not None:
+                np.save(os.path.join(self.path, "centroids.npy"), self.centroids)
+            meta = {"dim": self.dim, "ids": self.ids, "digests": self.digests,
+                    "trained_count": self._trained_count}
+            meta_path = os.path.join(self.path, "index.json")
+            tmp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+
+    def _assign(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Find the closest centroid of each vector."""
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _remove(self, ids: Iterable[str]) -> int:
+        """Mark vectors as removed, compacting once most rows are dead; the lock must be held."""
+        removed = 0
+        for doc_id in ids:
+            position = self.positions.pop(doc_id, None)
+            if position is not None:
+                self._live[position] = False
+                self.ids[position] = None
+                self.digests[position] = None
+                removed += 1
+        if removed and len(self.ids) - len(self.positions) > len(self.positions):
+            self.compact()
+        return removed
+
+    def _reserve(self, size: int) -> None:
+        """Grow the arrays to hold at least size vectors."""
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        count = len(self.ids)
+
+        if self.path:
+            path = os.path.join(self.path, "vectors.npy")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                                shape=(capacity, self.dim))
+            vectors[:count] = self._vectors[:count]
+            vectors.flush()
+            del vectors
+            self._vectors = None
+            os.replace(tmp_path, path)
+            self._vectors = np.load(path, mmap_mode="r+")
+        else:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            vectors[:count] = self._vectors[:count]
+            self._vectors = vectors
+
+        lists = np.zeros(capacity, dtype=np.int32)
+        lists[:count] = self._lists[:count]
+        self._lists = lists
+        live = np.zeros(capacity, dtype=bool)
+        live[:count] = self._live[:count]
+        self._live = live
+
+    def _load(self) -> None:
+        """Load a saved index from the directory, unless it does not match."""
+        meta_path = os.path.join(self.path, "index.json")
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        if not os.path.exists(meta_path) or not os.path.exists(vectors_path):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        vectors = np.load(vectors_path, mmap_mode="r+")
+        count = len(meta["ids"])
+        if meta["dim"] != self.dim or vectors.shape[1] != self.dim or len(vectors) < count:
+            return
+
+        self._vectors = vectors
+        self.ids = meta["ids"]
+        self.digests = meta["digests"]
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids) if doc_id is not None}
+        self._live = np.zeros(len(vectors), dtype=bool)
+        self._live[[self.positions[doc_id] for doc_id in self.positions]] = True
+        self._lists = np.zeros(len(vectors), dtype=np.int32)
+
+        centroids_path = os.path.join(self.path, "centroids.npy")
+        lists_path = os.path.join(self.path, "lists.npy")
+        if os.path.exists(centroids_path) and os.path.exists(lists_path):
+            lists = np.load(lists_path)
+            if len(lists) == count:
+                self.centroids = np.load(centroids_path)
+                self._lists[:count] = lists
+                self._trained_count = meta.get("trained_count", 0)
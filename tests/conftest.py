@@ -0,0 +1,81 @@
+"""
+Shared fixtures for the test suite.
+
+Most tests run the store layer against RDFLibTransport, a transport that
+answers SPARQL queries and updates from an in-memory RDFLib dataset, so
+real SPARQL is executed without a Fuseki server. Tests that need HTTP
+faults use the stub server from the benchmarks directory.
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, Optional, Union
+
+import pytest
+from rdflib import Dataset, Graph, URIRef
+
+from langgraphsemantic.store import FusekiStore
+from langgraphsemantic.transport import SPARQLTransport, TransportResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+
+class RDFLibTransport(SPARQLTransport):
+    """A transport answering requests from an in-memory RDFLib dataset."""
+
+    def __init__(self):
+        self.dataset = Dataset(default_union=False)
+        self.queries = 0
+        self.updates = 0
+
+    def query(self, endpoint: str, query: str, accept: str,
+              stream: bool = False) -> TransportResponse:
+        self.queries += 1
+        result = self.dataset.query(query)
+        if result.type == "CONSTRUCT":
+            body = result.serialize(format="nt")
+        elif "tab-separated-values" in accept and result.type == "SELECT":
+            body = self._tsv(result)
+        else:
+            body = result.serialize(format="json")
+        if stream:
+            return TransportResponse(200, chunks=iter([body]))
+        return TransportResponse(200, body=body)
+
+    def update(self, endpoint: str, update: str) -> TransportResponse:
+        self.updates += 1
+        self.dataset.update(update)
+        return TransportResponse(204, body=b"")
+
+    def post_data(self, url: str, body: Union[bytes, Iterable[bytes]], content_type: str,
+                  params: Optional[Dict[str, str]] = None) -> TransportResponse:
+        data = body if isinstance(body, bytes) else b"".join(body)
+        graph_uri = (params or {}).get("graph")
+        target = (self.dataset.graph(URIRef(graph_uri)) if graph_uri
+                  else self.dataset.default_context)
+        parsed = Graph()
+        parsed.parse(data=data.decode("utf-8"), format="nt")
+        for triple in parsed:
+            target.add(triple)
+        return TransportResponse(200, body=b"{}")
+
+    @staticmethod
+    def _tsv(result) -> bytes:
+        variables = [str(var) for var in result.vars]
+        lines = ["\t".join(f"?{var}" for var in variables)]
+        for row in result:
+            lines.append("\t".join(row[var].n3() if row[var] is not None else ""
+                                   for var in variables))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def transport() -> RDFLibTransport:
+    return RDFLibTransport()
+
+
+@pytest.fixture
+def store(transport) -> FusekiStore:
+    store = FusekiStore("http://fuseki.test", "ds", transport=transport)
+    yield store
+    store.connection.close()
@@ -0,0 +1,122 @@
+"""Tests for the asyncio store interface, against an aiohttp stub server."""
+
+import asyncio
+
+import pytest
+from rdflib import Dataset, Graph, Literal, URIRef
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from langgraphsemantic.async_store import AsyncFusekiStore  # noqa: E402
+
+SHAPE = URIRef("http://example.org/PersonShape")
+
+
+class StubFuseki:
+    """An aiohttp server answering SPARQL requests from an RDFLib dataset."""
+
+    def __init__(self, latency=0.0):
+        self.dataset = Dataset(default_union=False)
+        self.latency = latency
+        self.fail_updates = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = None
+        self.base_url = None
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/ds/query", self.query)
+        app.router.add_post("/ds/query", self.query)
+        app.router.add_post("/ds/update", self.update)
+        self.server = TestServer(app, host="127.0.0.1")
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.server.close()
+
+    async def query(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            query = request.query.get("query") or (await request.post())["query"]
+            result = self.dataset.query(query)
+            if result.type == "CONSTRUCT":
+                return web.Response(body=result.serialize(format="turtle"),
+                                    content_type="text/turtle")
+            return web.Response(body=result.serialize(format="json"),
+                                content_type="application/sparql-results+json")
+        finally:
+            self.in_flight -= 1
+
+    async def update(self, request):
+        if self.fail_updates:
+            return web.Response(status=400, text="bad update")
+        self.dataset.update(await request.text())
+        return web.Response(status=204)
+
+
+def run(test):
+    """Run a test coroutine with a fresh stub server and store."""
+    async def main():
+        async with StubFuseki(latency=0.02) as server:
+            store = AsyncFusekiStore(server.base_url, "ds", max_concurrency=3)
+            try:
+                await test(server, store)
+            finally:
+                await store.close()
+    asyncio.run(main())
+
+
+def test_concurrent_queries_are_bounded_by_max_concurrency():
+    async def test(server, store):
+        queries = [f"SELECT ?s WHERE {{ ?s ?p {i} }}" for i in range(12)]
+        results = await store.query.execute_many(queries)
+        assert results == [[]] * 12
+        assert server.max_in_flight == 3
+    run(test)
+
+
+def test_failed_updates_return_false():
+    async def test(server, store):
+        people = Graph()
+        people.add((URIRef("http://example.org/a"), URIRef("http://example.org/p"), Literal("x")))
+        assert await store.store_instance_data(people, "Person")
+        server.fail_updates = True
+        assert not await store.store_instance_data(people, "Person")
+        assert not await store.update.delete_graph(f"{store.data_graph_uri}/Person")
+        assert len(server.dataset.graph(URIRef(f"{store.data_graph_uri}/Person"))) == 1
+    run(test)
+
+
+def test_shape_fingerprint_round_trips():
+    async def test(server, store):
+        shape = Graph()
+        shape.add((SHAPE, URIRef("http://www.w3.org/ns/shacl#name"), Literal("Person")))
+        assert await store.get_shape_fingerprint("Person") is None
+
+        assert await store.store_shape(shape, "Person", fingerprint="abc123")
+        assert await store.get_shape_fingerprint("Person") == "abc123"
+        stored = await store.get_shape("Person")
+        assert (SHAPE, None, None) in stored
+
+        assert await store.store_shape(shape, "Person")
+        assert await store.get_shape_fingerprint("Person") is None
+    run(test)
+
+
+def test_close_closes_the_session_and_a_new_one_is_opened_on_use():
+    async def test(server, store):
+        assert await store.connection.test_connection() is False
+        session = store.connection._session
+        await store.close()
+        assert session.closed and store.connection._session is None
+
+        assert await store.query.execute_ask("ASK { }")
+        assert store.connection._session is not session
+    run(test)
@@ -0,0 +1,169 @@
+"""Tests for loading data through the Graph Store Protocol with the BulkLoader."""
+
+import requests
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from conftest import RDFLibTransport
+from langgraphsemantic.resilience import RetryPolicy
+from langgraphsemantic.store import BulkLoader, FusekiStore
+from langgraphsemantic.transport import N_QUADS_MEDIA_TYPE, TransportResponse
+
+GRAPH = "http://example.org/graphs/people"
+NAME = URIRef("http://example.org/name")
+KNOWS = URIRef("http://example.org/knows")
+
+
+class RecordingTransport(RDFLibTransport):
+    """Records the bodies posted to the data endpoint and also accepts N-Quads."""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.posted = []
+        self.streamed = []
+        self.failures = failures
+
+    def post_data(self, url, body, content_type, params=None):
+        self.streamed.append(not isinstance(body, bytes))
+        data = body if isinstance(body, bytes) else b"".join(body)
+        if self.failures:
+            self.failures -= 1
+            raise http_error(503)
+        self.posted.append((data, content_type, params))
+        if content_type == N_QUADS_MEDIA_TYPE:
+            self.dataset.parse(data=data.decode("utf-8"), format="nquads")
+            return TransportResponse(200, body=b"{}")
+        return super().post_data(url, data, content_type, params)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def bulk_store(failures=0, **options):
+    transport = RecordingTransport(failures)
+    return FusekiStore("http://fuseki.test", "ds", transport=transport, **options), transport
+
+
+def people(count):
+    graph = Graph()
+    for i in range(count):
+        graph.add((URIRef(f"http://example.org/person/{i}"), NAME, Literal(f"Person {i}")))
+    return graph
+
+
+def stored(transport, graph_uri=GRAPH):
+    graph = Graph()
+    for triple in transport.dataset.graph(URIRef(graph_uri)):
+        graph.add(triple)
+    return graph
+
+
+def test_triples_are_sent_in_chunks_of_chunk_size():
+    store, transport = bulk_store()
+    loader = BulkLoader(store.connection, chunk_size=4)
+    result = loader.load(people(10), GRAPH)
+
+    assert result["success"] and result["triples"] == 10 and result["chunks"] == 3
+    assert [data.count(b"\n") for data, _, _ in transport.posted] == [4, 4, 2]
+    assert all(params == {"graph": GRAPH} for _, _, params in transport.posted)
+    assert isomorphic(stored(transport), people(10))
+
+
+def test_chunks_are_streamed_when_requests_are_not_retried():
+    store, transport = bulk_store(failures=1)
+    result = BulkLoader(store.connection, chunk_size=4).load(people(10), GRAPH)
+    assert not result["success"] and result["chunks"] == 0
+    assert transport.streamed == [True]
+
+
+def test_chunks_are_buffered_and_retried_with_a_retry_policy():
+    store, transport = bulk_store(failures=1, retry_policy=RetryPolicy(max_attempts=2,
+                                                                       base_delay=0.001))
+    result = BulkLoader(store.connection, chunk_size=4).load(people(10), GRAPH)
+    assert result["success"] and result["triples"] == 10 and result["chunks"] == 3
+    assert transport.streamed == [False] * 4
+    assert isomorphic(stored(transport), people(10))
+
+
+def test_blank_node_triples_are_sent_together_in_the_last_chunk():
+    graph = people(5)
+    address = BNode()
+    graph.add((URIRef("http://example.org/person/0"), URIRef("http://example.org/address"), address))
+    graph.add((address, URIRef("http://example.org/city"), Literal("Leeds")))
+    graph.add((address, URIRef("http://example.org/street"), Literal("High Street")))
+
+    store, transport = bulk_store()
+    result = BulkLoader(store.connection, chunk_size=2).load(graph, GRAPH)
+
+    assert result["success"] and result["triples"] == 8 and result["chunks"] == 4
+    assert [b"_:" in data for data, _, _ in transport.posted] == [False, False, False, True]
+    assert transport.posted[-1][0].count(b"\n") == 3
+    assert isomorphic(stored(transport), graph)
+    assert len(set(stored(transport).subjects(URIRef("http://example.org/city")))) == 1
+
+
+def test_ntriples_text_is_chunked_by_line():
+    store, transport = bulk_store()
+    text = people(5).serialize(format="nt")
+    result = BulkLoader(store.connection, chunk_size=2).load_ntriples(text, GRAPH)
+
+    assert result["success"] and result["triples"] == 5 and result["chunks"] == 3
+    assert isomorphic(stored(transport), people(5))
+
+
+def test_quads_are_loaded_into_their_named_graphs():
+    dataset = Dataset()
+    for name, graph_uri in [("Ann", "http://example.org/g1"), ("Bob", "http://example.org/g2")]:
+        dataset.graph(URIRef(graph_uri)).add(
+            (URIRef(f"http://example.org/{name}"), NAME, Literal(name)))
+    knows = BNode()
+    dataset.graph(URIRef("http://example.org/g1")).add(
+        (URIRef("http://example.org/Ann"), KNOWS, knows))
+    dataset.graph(URIRef("http://example.org/g1")).add((knows, NAME, Literal("Cy")))
+
+    store, transport = bulk_store()
+    quads = [(s, p, o, g) for s, p, o, g in dataset.quads((None, None, None, None))]
+    result = BulkLoader(store.connection, chunk_size=1).load_quads(quads)
+
+    assert result["success"] and result["triples"] == 4 and result["chunks"] == 3
+    assert all(content_type == N_QUADS_MEDIA_TYPE and params is None
+               for _, content_type, params in transport.posted)
+    for graph_uri in ["http://example.org/g1", "http://example.org/g2"]:
+        assert isomorphic(stored(transport, graph_uri), dataset.graph(URIRef(graph_uri)))
+
+
+def test_a_failed_chunk_stops_the_load():
+    store, transport = bulk_store()
+    calls = []
+
+    def fail_second(url, body, content_type, params=None):
+        calls.append(body)
+        if len(calls) == 2:
+            raise ConnectionError("refused")
+        return RecordingTransport.post_data(transport, url, body, content_type, params)
+
+    transport.post_data = fail_second
+    result = BulkLoader(store.connection, chunk_size=2).load(people(6), GRAPH)
+
+    assert not result["success"] and result["triples"] == 2 and result["chunks"] == 1
+    assert len(calls) == 2 and len(stored(transport)) == 2
+
+
+def test_bulk_store_instance_data_matches_the_sparql_path():
+    graph = people(20)
+    member = BNode()
+    graph.add((URIRef("http://example.org/person/1"), KNOWS, member))
+    graph.add((member, NAME, Literal('Dana "D" O\'Neil', lang="en")))
+
+    results = []
+    for bulk in (False, True):
+        store, transport = bulk_store()
+        assert store.store_instance_data(graph, "Person", bulk=bulk)
+        assert bool(transport.posted) == bulk
+        results.append(stored(transport, f"{store.data_graph_uri}/Person"))
+
+    assert len(results[0]) == len(results[1]) == 22
+    assert isomorphic(results[0], results[1])
@@ -0,0 +1,87 @@
+"""Tests for the LRU cache and the graph-scoped query result cache."""
+
+from langgraphsemantic.cache import LRUCache, QueryCache, normalize_query, referenced_graphs
+from langgraphsemantic.store import FusekiStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_reports_expired_entries():
+    clock = Clock()
+    cache = LRUCache(ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.get_entry("a") == (1, True)
+    cache.touch("a")
+    assert cache.get("a") == 1
+
+
+def test_normalize_query_keeps_strings():
+    assert normalize_query("SELECT  *\n# comment\nWHERE { ?s ?p 'a  b' }") == \
+        "SELECT * WHERE { ?s ?p 'a  b' }"
+
+
+def test_referenced_graphs():
+    assert referenced_graphs("SELECT * { GRAPH <http://g1> { ?s ?p ?o } }") == \
+        frozenset({"http://g1"})
+    assert referenced_graphs("SELECT * { ?s ?p '<http://not-a-graph>' }") == frozenset()
+    assert referenced_graphs("SELECT * { GRAPH ?g { ?s ?p ?o } }") is None
+    assert referenced_graphs("DROP ALL") is None
+
+
+def test_write_invalidates_only_queries_on_that_graph():
+    cache = QueryCache()
+    on_g1 = cache.key("select", "SELECT * { GRAPH <http://g1> { ?s ?p ?o } }")
+    on_g2 = cache.key("select", "SELECT * { GRAPH <http://g2> { ?s ?p ?o } }")
+    unknown = cache.key("select", "SELECT * { ?s ?p ?o }")
+    for key in (on_g1, on_g2, unknown):
+        cache.put(key, ["rows"], cache.generation)
+
+    assert cache.invalidate(["http://g1"]) == 2
+    assert cache.get(on_g1) is None and cache.get(unknown) is None
+    assert cache.get(on_g2) == ["rows"]
+
+    cache.invalidate([])
+    assert cache.get(on_g2) is None
+
+
+def test_result_from_before_a_write_is_not_cached():
+    cache = QueryCache()
+    key = cache.key("select", "SELECT * { GRAPH <http://g1> { ?s ?p ?o } }")
+    generation = cache.generation
+    cache.invalidate(["http://g1"])
+    cache.put(key, ["stale"], generation)
+    assert cache.get(key) is None
+
+
+def test_store_writes_invalidate_cached_selects(transport):
+    store = FusekiStore("http://fuseki.test", "ds", transport=transport, query_cache_size=16)
+    query = "SELECT ?o WHERE { GRAPH <http://g1> { <http://a> <http://b> ?o } }"
+    assert store.query.execute_select(query) == []
+    assert store.query.execute_select(query) == []
+    assert transport.queries == 1
+
+    store.update.insert_ntriples('<http://a> <http://b> "x" .\n', "http://g1")
+    assert [str(row["o"]) for row in store.query.execute_select(query)] == ["x"]
+    assert transport.queries == 2
+
+    store.update.insert_ntriples('<http://a> <http://b> "y" .\n', "http://g2")
+    store.query.execute_select(query)
+    assert transport.queries == 2
@@ -0,0 +1,74 @@
+"""Tests for the modification poller and the index updater."""
+
+import pytest
+
+from langgraphsemantic.changes import Change, IndexUpdater, ModificationPoller
+
+GRAPH = "http://example.org/graphs/docs"
+MODIFIED = "http://purl.org/dc/terms/modified"
+
+
+def stamp(store, names, when):
+    lines = "".join(f'<http://example.org/doc/{name}> <{MODIFIED}> '
+                    f'"{when}"^^<http://www.w3.org/2001/XMLSchema#dateTime> .\n'
+                    for name in names)
+    assert store.update.execute_update(f"INSERT DATA {{ GRAPH <{GRAPH}> {{ {lines} }} }}")
+
+
+def make_poller(store, page_size):
+    changes = []
+    return ModificationPoller(store, GRAPH, changes.append, MODIFIED,
+                              page_size=page_size), changes
+
+
+def test_pages_through_subjects_sharing_a_timestamp(store):
+    poller, changes = make_poller(store, page_size=100)
+    stamp(store, range(250), "2024-01-01T00:00:00Z")
+
+    change = poller.poll()
+    assert len(change.subjects) == 250
+    assert changes == [change]
+    assert poller.poll() is None
+
+
+def test_reports_subjects_stamped_later_at_the_watermark_once(store):
+    poller, _ = make_poller(store, page_size=100)
+    stamp(store, range(150), "2024-01-01T00:00:00Z")
+    poller.poll()
+
+    stamp(store, ["000", "zzz"], "2024-01-01T00:00:00Z")
+    stamp(store, ["later"], "2024-01-02T00:00:00Z")
+    assert poller.poll().subjects == {"http://example.org/doc/000",
+                                      "http://example.org/doc/zzz",
+                                      "http://example.org/doc/later"}
+    assert poller.poll() is None
+
+
+
+def test_vector_index_stays_bounded_while_the_updater_follows_changes(tmp_path):
+    pytest.importorskip("numpy")
+    from langgraphsemantic.vectors import HashingEmbedder, VectorIndex, text_digest
+
+    embed = HashingEmbedder(dim=64)
+    index = VectorIndex(64, path=str(tmp_path))
+    texts = {f"http://example.org/doc/{i}": f"document number {i}" for i in range(10)}
+    index.add(list(texts), embed(list(texts.values())))
+
+    def apply(changes):
+        # Re-embed each changed document, as the retriever does
+        subjects = sorted(set().union(*(change.subjects for change in changes)))
+        index.add(subjects, embed([texts[s] for s in subjects]),
+                  [text_digest(texts[s]) for s in subjects])
+        index.save()
+
+    updater = IndexUpdater(apply)
+    for i in range(300):
+        texts["http://example.org/doc/3"] = f"revision {i} of the text"
+        updater.submit(Change(GRAPH, ["http://example.org/doc/3"]))
+        updater.flush()
+        assert len(index.ids) <= 2 * len(index)
+    updater.close()
+
+    reloaded = VectorIndex(64, path=str(tmp_path))
+    assert len(reloaded) == 10 and len(reloaded.ids) <= 20
+    assert reloaded.search(embed(["revision 299"])[0], 1)[0][0] == "http://example.org/doc/3"
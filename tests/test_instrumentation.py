@@ -0,0 +1,66 @@
+"""Tests for the instrumentation of store requests."""
+
+import pytest
+
+from langgraphsemantic.instrumentation import SpanRecorder, metrics
+
+GRAPH = "http://example.org/graphs/people"
+
+
+@pytest.fixture
+def recorder():
+    recorder = SpanRecorder()
+    metrics.reset()
+    metrics.enable([recorder])
+    yield recorder
+    metrics.disable()
+    metrics.exporters.clear()
+    metrics.reset()
+
+
+def add_people(store, count):
+    lines = "".join(f'<http://example.org/person/{i}> <http://example.org/name> "Person {i}" .\n'
+                    for i in range(count))
+    assert store.update.execute_update(f"INSERT DATA {{ GRAPH <{GRAPH}> {{ {lines} }} }}")
+
+
+def query_spans(recorder):
+    return [span for span in recorder.clear() if span["name"] == "http.query"]
+
+
+def test_streamed_queries_count_bytes_and_end_when_read(store, recorder):
+    add_people(store, 50)
+    recorder.clear()
+    received = metrics.snapshot()["counters"].get("http.bytes_received", 0)
+    rows = store.query.iter_select(f"SELECT ?s ?name WHERE {{ GRAPH <{GRAPH}> {{ ?s ?p ?name }} }}")
+    first = next(rows)
+    assert first["name"]
+    assert query_spans(recorder) == []
+    assert metrics.snapshot()["counters"]["http.bytes_received"] == received
+
+    assert len(list(rows)) == 49
+    spans = query_spans(recorder)
+    assert len(spans) == 1 and spans[0]["status"] == "OK"
+    assert metrics.snapshot()["counters"]["http.bytes_received"] - received > 50 * len("Person 0")
+    assert metrics.snapshot()["histograms"]["http.query"].count == 1
+
+
+def test_closing_a_stream_early_ends_its_span(store, recorder):
+    add_people(store, 10)
+    recorder.clear()
+    rows = store.query.iter_select(f"SELECT ?s WHERE {{ GRAPH <{GRAPH}> {{ ?s ?p ?o }} }}")
+    next(rows)
+    rows.close()
+    assert len(query_spans(recorder)) == 1
+
+
+def test_spans_after_a_deferred_span_are_not_its_children(recorder):
+    with metrics.span("outer"):
+        with metrics.span("streamed") as streamed:
+            streamed.defer()
+        with metrics.span("sibling"):
+            pass
+        streamed.end()
+    spans = {span["name"]: span for span in recorder.clear()}
+    assert spans["sibling"]["parent_span_id"] == spans["outer"]["span_id"]
+    assert spans["streamed"]["end_time_ns"] >= spans["sibling"]["end_time_ns"]
@@ -0,0 +1,63 @@
+"""Tests for loading stored instances back as Pydantic models."""
+
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from langgraphsemantic.loading import InstanceLoader
+from langgraphsemantic.serialization import InstanceSerializer
+
+
+class Address(BaseModel):
+    city: str
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+    addresses: List[Address] = []
+
+
+@pytest.fixture
+def people(store):
+    serializer = InstanceSerializer()
+    people = [Person(name=f"Person {i:02d}", age=20 + i % 3,
+                     addresses=[Address(city=f"City {i % 4}")])
+              for i in range(23)]
+    assert store.store_instance_data("".join(serializer.serialize(person) for person in people),
+                                     "Person")
+    return people
+
+
+def names(instances):
+    return sorted(person.name for person in instances)
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 23, 100])
+def test_loads_every_instance_with_nested_models(store, people, page_size):
+    loaded = list(InstanceLoader(store, page_size=page_size).load(Person))
+    assert names(loaded) == names(people)
+    assert {(person.name, person.addresses[0].city) for person in loaded} == \
+        {(person.name, person.addresses[0].city) for person in people}
+
+
+def test_filters_and_limits(store, people):
+    loader = InstanceLoader(store, page_size=4)
+    assert names(loader.load(Person, filter={"age": 21})) == \
+        names(person for person in people if person.age == 21)
+    assert len(list(loader.load(Person, limit=9))) == 9
+    assert list(loader.load(Person, limit=0)) == []
+
+
+def test_pages_through_the_store_scan(store, people, monkeypatch):
+    calls = []
+    scan_pages = store.scan_pages
+
+    def recording_scan_pages(*args, **kwargs):
+        calls.append(args)
+        return scan_pages(*args, **kwargs)
+
+    monkeypatch.setattr(store, "scan_pages", recording_scan_pages)
+    list(InstanceLoader(store, page_size=10).load(Person))
+    assert len(calls) == 1
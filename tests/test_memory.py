@@ -0,0 +1,76 @@
+"""Tests for conversation memory stored in the data graph."""
+
+import pytest
+
+integration = pytest.importorskip("langgraphsemantic.integration", exc_type=ImportError)
+SemanticMemory = integration.SemanticMemory
+
+
+def make_memory(store, **options):
+    options.setdefault("flush_interval", None)
+    return SemanticMemory(store, session_id="s1", k=3, **options)
+
+
+def inputs_of(memory):
+    data = memory.load_memory_variables({})[memory.memory_key]
+    return [row["object"] for row in data if row["predicate"].endswith("/input/input")]
+
+
+def test_turns_are_loaded_in_order_by_a_new_process(store):
+    memory = make_memory(store)
+    for i in range(5):
+        memory.save_context({"input": f"q{i}"}, {"output": f"a{i}"})
+    assert memory.flush()
+
+    assert inputs_of(make_memory(store)) == ["q2", "q3", "q4"]
+
+
+def test_two_writers_on_one_session_do_not_collide(store):
+    first, second = make_memory(store), make_memory(store)
+    first.save_context({"input": "from first"}, {})
+    second.save_context({"input": "from second"}, {})
+    assert first.flush() and second.flush()
+
+    assert inputs_of(make_memory(store)) == ["from first", "from second"]
+
+
+def test_failed_flush_keeps_turns_pending(store, monkeypatch):
+    memory = make_memory(store, flush_size=100)
+    memory.save_context({"input": "q0"}, {})
+    memory.save_context({"input": "q1"}, {})
+    monkeypatch.setattr(store.update, "insert_ntriples", lambda *args: False)
+    assert not memory.flush()
+    assert len(memory._pending) == 2
+
+    monkeypatch.undo()
+    assert memory.flush()
+    assert memory._pending == []
+    assert inputs_of(make_memory(store)) == ["q0", "q1"]
+
+
+def test_pending_turns_are_bounded(store, monkeypatch):
+    monkeypatch.setattr(store.update, "insert_ntriples", lambda *args: False)
+    memory = make_memory(store, flush_size=2, max_pending=4)
+    for i in range(10):
+        memory.save_context({"input": f"q{i}"}, {})
+    assert len(memory._pending) == 4
+    assert "q9" in memory._pending[-1]
+
+
+def test_turn_is_kept_when_the_first_load_fails(store, monkeypatch):
+    memory = make_memory(store)
+    memory.save_context({"input": "earlier"}, {})
+    memory.flush()
+
+    memory = make_memory(store)
+    real_select = store.query.execute_select
+
+    def failing_select(*args, **kwargs):
+        raise ConnectionError("store down")
+
+    monkeypatch.setattr(store.query, "execute_select", failing_select)
+    memory.save_context({"input": "later"}, {})
+    assert len(memory._pending) == 1
+
+    monkeypatch.setattr(store.query, "execute_select", real_select)
+    assert inputs_of(memory) == ["earlier", "later"]
@@ -0,0 +1,86 @@
+"""Tests for running SELECT queries concurrently with execute_many."""
+
+import threading
+import time
+
+import pytest
+import requests
+from rdflib import Literal
+
+from conftest import RDFLibTransport
+from langgraphsemantic.store import FusekiStore
+
+
+class SlowTransport(RDFLibTransport):
+    """Answers the query binding ?n to i after (count - i) ticks, failing those in fail."""
+
+    def __init__(self, count, fail=()):
+        super().__init__()
+        self.count = count
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.finished = []
+
+    def query(self, endpoint, query, accept, stream=False):
+        n = int(query.split("BIND(")[1].split()[0])
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01 * (self.count - n))
+            if n in self.fail:
+                raise requests.HTTPError(f"query {n} failed")
+            with self.lock:
+                return super().query(endpoint, query, accept, stream=stream)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.finished.append(n)
+
+
+def numbered(count):
+    return [f"SELECT ?n WHERE {{ BIND({i} AS ?n) }}" for i in range(count)]
+
+
+def slow_store(count, fail=()):
+    transport = SlowTransport(count, fail)
+    return FusekiStore("http://fuseki.test", "ds", transport=transport), transport
+
+
+def test_results_come_back_in_query_order():
+    store, transport = slow_store(8)
+    results = store.query.execute_many(numbered(8), max_workers=4)
+
+    assert [rows[0]["n"] for rows in results] == [Literal(i) for i in range(8)]
+    assert transport.finished != sorted(transport.finished)
+    assert transport.max_in_flight == 4
+
+
+def test_no_queries_give_no_results():
+    store, transport = slow_store(0)
+    assert store.query.execute_many([]) == []
+    assert transport.queries == 0
+
+
+def test_a_failed_query_raises_from_execute_many():
+    store, transport = slow_store(6, fail={3})
+    with pytest.raises(requests.HTTPError, match="query 3 failed"):
+        store.query.execute_many(numbered(6), max_workers=3)
+    assert sorted(transport.finished) == list(range(6))
+
+
+def test_the_store_is_usable_from_many_threads_at_once():
+    store, transport = slow_store(4)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        store.query.execute_many(numbered(4), max_workers=2))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 3
+    for result in results:
+        assert [rows[0]["n"] for rows in result] == [Literal(i) for i in range(4)]
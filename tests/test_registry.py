@@ -0,0 +1,37 @@
+"""Tests for model registration and shape uploads."""
+
+import pytest
+from pydantic import BaseModel
+
+from langgraphsemantic.core import ShapeCache
+
+# The integration module needs a LangChain release with langchain.memory.BaseMemory
+integration = pytest.importorskip("langgraphsemantic.integration", exc_type=ImportError)
+SemanticModelRegistry = integration.SemanticModelRegistry
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+
+
+def test_unchanged_model_is_not_uploaded_again(store, transport):
+    registry = SemanticModelRegistry(store, shape_cache=ShapeCache())
+    assert registry.register_model(Person)
+    updates = transport.updates
+
+    assert registry.register_model(Person)
+    assert transport.updates == updates
+
+
+def test_dropped_shape_graph_is_uploaded_again(store, transport):
+    registry = SemanticModelRegistry(store, shape_cache=ShapeCache())
+    assert registry.register_model(Person)
+    assert store.has_shape("Person")
+
+    store.update.delete_graph(f"{store.shapes_graph_uri}/Person")
+    assert not store.has_shape("Person")
+
+    assert registry.register_model(Person)
+    assert store.has_shape("Person")
+    assert store.get_shape_fingerprint("Person") is not None
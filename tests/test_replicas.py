@@ -0,0 +1,142 @@
+"""Tests for load balancing queries over read replicas."""
+
+import time
+
+import pytest
+import requests
+
+from conftest import RDFLibTransport
+from langgraphsemantic.replicas import LATENCY, LEAST_OUTSTANDING, ReplicaBalancer
+from langgraphsemantic.resilience import CircuitOpenError
+from langgraphsemantic.store import FusekiStore
+
+PRIMARY = "http://primary.test/ds/query"
+REPLICAS = ["http://replica1.test", "http://replica2.test"]
+GRAPH = "http://example.org/graphs/people"
+
+
+class RoutingTransport(RDFLibTransport):
+    """Records where queries are sent and fails those to an endpoint with its queued errors."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
+        self.sent = []
+
+    def query(self, endpoint, query, accept, stream=False):
+        self.sent.append(endpoint)
+        queued = self.errors.get(endpoint)
+        if queued:
+            raise queued.pop(0)
+        return super().query(endpoint, query, accept, stream=stream)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def replica(n):
+    return f"{REPLICAS[n]}/ds/query"
+
+
+def replicated_store(**options):
+    transport = RoutingTransport()
+    store = FusekiStore("http://primary.test", "ds", transport=transport,
+                        read_urls=REPLICAS, **options)
+    return store, transport
+
+
+def ask(store):
+    return store.connection.query("ASK { ?s ?p ?o }").json()["boolean"]
+
+
+def test_least_outstanding_picks_the_idlest_endpoint():
+    balancer = ReplicaBalancer(["a", "b", "c"], LEAST_OUTSTANDING)
+    busy = [balancer.acquire(), balancer.acquire()]
+    assert {endpoint.url for endpoint in busy} | {balancer.acquire().url} == {"a", "b", "c"}
+
+    balancer.release(busy[0], 0.01)
+    assert balancer.acquire().url == busy[0].url
+
+
+def test_latency_weighs_requests_in_flight_by_latency():
+    balancer = ReplicaBalancer(["fast", "slow"], LATENCY)
+    fast, slow = balancer.endpoints
+    balancer.release(balancer.acquire(["slow"]), 0.01)
+    balancer.release(balancer.acquire(["fast"]), 0.1)
+    assert fast.latency == 0.01 and slow.latency == 0.1
+    assert balancer.acquire().url == "fast"
+
+    fast.outstanding = 10
+    assert balancer.acquire().url == "slow"
+
+
+def test_a_failing_endpoint_is_left_out_until_its_cooldown_ends():
+    balancer = ReplicaBalancer(["a", "b"], failure_threshold=2, cooldown=0.05)
+    a = balancer.endpoints[0]
+    for _ in range(2):
+        balancer.release(balancer.acquire(["b"]), 0.01, failed=True)
+    assert [balancer.acquire().url for _ in range(3)] == ["b", "b", "b"]
+    assert not balancer.stats()[0]["healthy"]
+
+    time.sleep(0.06)
+    assert balancer.acquire().url == "a"
+    balancer.release(a, 0.01)
+    assert balancer.stats()[0]["healthy"] and a.failures == 0
+
+
+@pytest.mark.parametrize("error", [http_error(503), CircuitOpenError("open")])
+def test_queries_fail_over_when_a_replica_is_unavailable(error):
+    store, transport = replicated_store()
+    transport.errors[replica(0)] = [error]
+    transport.errors[replica(1)] = [error]
+    store.connection.balancer.endpoints[1].outstanding = 1
+
+    assert ask(store) is False
+    assert transport.sent == [replica(0), replica(1), PRIMARY]
+    assert [endpoint["errors"] for endpoint in store.replica_stats()] == [1, 1]
+
+
+def test_queries_do_not_fail_over_on_a_bad_request():
+    store, transport = replicated_store()
+    transport.errors[replica(0)] = [http_error(400)]
+    store.connection.balancer.endpoints[1].outstanding = 1
+
+    with pytest.raises(requests.HTTPError):
+        ask(store)
+    assert transport.sent == [replica(0)]
+    assert store.replica_stats()[0]["errors"] == 0
+
+
+def test_reads_go_to_the_primary_after_a_write():
+    store, transport = replicated_store(read_your_writes=0.05)
+    ask(store)
+    assert transport.sent[-1] != PRIMARY
+
+    assert store.update.execute_update(
+        f'INSERT DATA {{ GRAPH <{GRAPH}> {{ <http://example.org/a> <http://example.org/p> "x" }} }}')
+    ask(store)
+    assert transport.sent[-1] == PRIMARY
+    time.sleep(0.06)
+    ask(store)
+    assert transport.sent[-1] != PRIMARY
+
+    store.connection.post_data(b'<http://example.org/b> <http://example.org/p> "y" .\n',
+                               "application/n-triples", {"graph": GRAPH})
+    ask(store)
+    assert transport.sent[-1] == PRIMARY
+
+
+def test_a_streamed_query_is_in_flight_until_it_is_read():
+    store, transport = replicated_store()
+    rows = store.query.iter_select("SELECT ?s WHERE { ?s ?p ?o }")
+    assert list(rows) == []
+    assert [endpoint["outstanding"] for endpoint in store.replica_stats()] == [0, 0]
+
+    response = store.connection.query("SELECT ?s WHERE { ?s ?p ?o }",
+                                      "text/tab-separated-values", stream=True)
+    assert sum(endpoint["outstanding"] for endpoint in store.replica_stats()) == 1
+    response.close()
+    assert sum(endpoint["outstanding"] for endpoint in store.replica_stats()) == 0
@@ -0,0 +1,234 @@
+"""Tests for retries, deadlines and circuit breaking."""
+
+import pytest
+import requests
+from stub_server import StubSPARQLServer
+
+from langgraphsemantic.instrumentation import metrics
+from langgraphsemantic.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientTransport,
+    RetryPolicy,
+)
+from langgraphsemantic.transport import SessionTransport, SPARQLTransport, TransportResponse
+
+PRIMARY = "http://primary.test/ds/query"
+REPLICA = "http://replica.test/ds/query"
+
+
+class ScriptedTransport(SPARQLTransport):
+    """Fails requests to each URL with the queued errors, then answers them."""
+
+    def __init__(self, errors=None):
+        self.errors = {url: list(queued) for url, queued in (errors or {}).items()}
+        self.sent = []
+
+    def query(self, endpoint, query, accept, stream=False):
+        return self._answer(endpoint)
+
+    def update(self, endpoint, update):
+        return self._answer(endpoint)
+
+    def post_data(self, url, body, content_type, params=None):
+        return self._answer(url)
+
+    def _answer(self, url):
+        self.sent.append(url)
+        queued = self.errors.get(url)
+        if queued:
+            raise queued.pop(0)
+        return TransportResponse(200, body=b"{}")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def resilient(errors=None, max_attempts=4, deadline=None, failure_threshold=5,
+              reset_timeout=5.0, clock=None):
+    delays = []
+    transport = ResilientTransport(
+        ScriptedTransport(errors),
+        RetryPolicy(max_attempts=max_attempts, base_delay=0.1, max_delay=1.0,
+                    deadline=deadline, seed=0),
+        CircuitBreaker(failure_threshold, reset_timeout, clock or Clock()),
+        sleep=delays.append)
+    return transport, delays
+
+
+def test_overload_statuses_are_retried_with_backoff():
+    transport, delays = resilient({PRIMARY: [http_error(503), http_error(429), http_error(503)]})
+    assert transport.query(PRIMARY, "ASK {}", "application/json").status_code == 200
+    assert len(transport.transport.sent) == 4
+    assert len(delays) == 3
+    assert all(0 <= delay <= 0.1 * 2 ** n for n, delay in enumerate(delays))
+    assert transport.stats()["retries"] == 3
+
+
+def test_retry_after_is_honoured():
+    transport, delays = resilient({PRIMARY: [http_error(503, retry_after=3)]})
+    transport.query(PRIMARY, "ASK {}", "application/json")
+    assert delays == [3.0]
+
+
+def test_a_retry_that_would_miss_the_deadline_is_not_started():
+    transport, delays = resilient({PRIMARY: [http_error(503, retry_after=5)]}, deadline=1.0)
+    with pytest.raises(requests.HTTPError):
+        transport.query(PRIMARY, "ASK {}", "application/json")
+    assert delays == [] and len(transport.transport.sent) == 1
+    assert transport.stats()["deadlines_exceeded"] == 1
+
+
+def test_only_idempotent_updates_are_retried_after_a_timeout():
+    update_url = "http://primary.test/ds/update"
+    transport, _ = resilient({update_url: [requests.ReadTimeout("slow")] * 2})
+    with pytest.raises(requests.ReadTimeout):
+        transport.update(update_url, "INSERT { ?s a <http://example.org/T> } WHERE { ?s ?p ?o }")
+    assert len(transport.transport.sent) == 1
+
+    transport.update(update_url, 'INSERT DATA { <http://example.org/s> <http://example.org/p> "o" }')
+    assert len(transport.transport.sent) == 3
+
+    blank = 'INSERT DATA { _:b <http://example.org/p> "o" }'
+    transport.transport.errors[update_url] = [requests.ReadTimeout("slow")]
+    with pytest.raises(requests.ReadTimeout):
+        transport.update(update_url, blank)
+
+
+def test_refused_updates_are_retried_even_if_not_idempotent():
+    update_url = "http://primary.test/ds/update"
+    transport, _ = resilient({update_url: [http_error(503)]})
+    transport.update(update_url, "DELETE WHERE { ?s ?p ?o }")
+    assert len(transport.transport.sent) == 2
+
+
+def test_streamed_uploads_are_never_retried():
+    data_url = "http://primary.test/ds/data"
+    transport, _ = resilient({data_url: [http_error(503)] * 2})
+    with pytest.raises(requests.HTTPError):
+        transport.post_data(data_url, iter([b"<http://a> <http://b> <http://c> .\n"]),
+                            "application/n-triples")
+    assert len(transport.transport.sent) == 1
+
+    transport.post_data(data_url, b"<http://a> <http://b> <http://c> .\n",
+                        "application/n-triples")
+    assert len(transport.transport.sent) == 3
+
+
+def test_breaker_opens_lets_one_probe_through_and_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.allow()
+
+
+def test_a_failed_probe_reopens_the_breaker():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    assert breaker.stats()["opens"] == 2
+
+
+def test_open_breaker_refuses_requests_without_sending_them():
+    transport, _ = resilient({PRIMARY: [requests.ConnectionError("down")] * 2},
+                             max_attempts=1, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            transport.query(PRIMARY, "ASK {}", "application/json")
+    with pytest.raises(CircuitOpenError):
+        transport.query(PRIMARY, "ASK {}", "application/json")
+    assert len(transport.transport.sent) == 2
+
+
+def test_a_failing_replica_does_not_open_the_primary_breaker():
+    transport, _ = resilient({REPLICA: [requests.ConnectionError("down")] * 4},
+                             max_attempts=1, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            transport.query(REPLICA, "ASK {}", "application/json")
+    with pytest.raises(CircuitOpenError):
+        transport.query(REPLICA, "ASK {}", "application/json")
+
+    assert transport.query(PRIMARY, "ASK {}", "application/json").status_code == 200
+    breakers = transport.stats()["breakers"]
+    assert breakers["http://replica.test"]["state"] == CircuitBreaker.OPEN
+    assert breakers["http://primary.test"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_single_attempt_suppresses_retries():
+    transport, delays = resilient({PRIMARY: [http_error(503)] * 2})
+    with transport.single_attempt():
+        with pytest.raises(requests.HTTPError):
+            transport.query(PRIMARY, "ASK {}", "application/json")
+    assert len(transport.transport.sent) == 1 and delays == []
+
+    transport.query(PRIMARY, "ASK {}", "application/json")
+    assert len(transport.transport.sent) == 3
+
+
+def test_retries_and_breaker_states_are_reported_as_metrics():
+    transport, _ = resilient({REPLICA: [http_error(503)] * 3}, max_attempts=2,
+                             failure_threshold=2)
+    metrics.reset()
+    metrics.enable()
+    try:
+        with pytest.raises(requests.HTTPError):
+            transport.query(REPLICA, "ASK {}", "application/json")
+        with pytest.raises(CircuitOpenError):
+            transport.query(REPLICA, "ASK {}", "application/json")
+        transport.query(PRIMARY, "ASK {}", "application/json")
+        snapshot = metrics.snapshot()
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+    counters = snapshot["counters"]
+    assert counters["resilience.retries"] == 1
+    assert counters["resilience.failures"] == 2
+    assert counters["resilience.rejections"] == 1
+    assert snapshot["gauges"]["resilience.breaker_state"] == {
+        (("origin", "http://replica.test"),): 2, (("origin", "http://primary.test"),): 0}
+
+
+def test_faults_from_a_stub_server_are_retried():
+    with StubSPARQLServer(fail_rate=1.0) as server:
+        transport = ResilientTransport(SessionTransport(),
+                                       RetryPolicy(max_attempts=3, base_delay=0.001),
+                                       CircuitBreaker(failure_threshold=10))
+        endpoint = f"{server.base_url}/ds/query"
+        with pytest.raises(requests.HTTPError):
+            transport.query(endpoint, "ASK {}", "application/json")
+        assert server.httpd.faults == 3
+
+        server.httpd.fail_rate = 0.0
+        assert transport.query(endpoint, "ASK {}", "application/json").status_code == 200
+        transport.close()
@@ -0,0 +1,152 @@
+"""Tests for decoding SPARQL TSV results."""
+
+import pytest
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import XSD
+
+from langgraphsemantic.results import (
+    convert_tsv_term,
+    decode_tsv_columns,
+    iter_tsv_rows,
+    split_tsv_term,
+)
+
+GRAPH = "http://example.org/graphs/people"
+
+
+def tsv(*lines):
+    return [line.encode("utf-8") for line in lines]
+
+
+@pytest.mark.parametrize("cell, term", [
+    ("<http://example.org/a>", URIRef("http://example.org/a")),
+    ('"plain"', Literal("plain")),
+    ('"say \\"hi\\"\\tnow\\n"', Literal('say "hi"\tnow\n')),
+    ('"back\\\\slash"', Literal("back\\slash")),
+    ('"caf\\u00E9 \\U0001F600"', Literal("café \U0001F600")),
+    ("'single'", Literal("single")),
+    ('"chat"@fr', Literal("chat", lang="fr")),
+    ('"colour"@en-GB', Literal("colour", lang="en-GB")),
+    ('"5"^^<http://www.w3.org/2001/XMLSchema#int>', Literal("5", datatype=XSD.int)),
+    ('"2024-01-02"^^<http://www.w3.org/2001/XMLSchema#date>',
+     Literal("2024-01-02", datatype=XSD.date)),
+    ('"@not a tag"', Literal("@not a tag")),
+    ("_:b0", BNode("b0")),
+    ("42", Literal("42", datatype=XSD.integer)),
+    ("-7", Literal("-7", datatype=XSD.integer)),
+    ("1.5", Literal("1.5", datatype=XSD.decimal)),
+    ("1.0e3", Literal("1.0e3", datatype=XSD.double)),
+    ("true", Literal("true", datatype=XSD.boolean)),
+])
+def test_tsv_terms_convert_like_json_bindings(cell, term):
+    converted = convert_tsv_term(cell)
+    assert converted == term and type(converted) is type(term)
+
+
+def test_split_gives_the_parts_of_a_term():
+    assert split_tsv_term('"x\\"y"@en') == ("literal", 'x"y', None, "en")
+    assert split_tsv_term('"1"^^<http://www.w3.org/2001/XMLSchema#byte>') == (
+        "literal", "1", str(XSD.byte), None)
+    assert split_tsv_term("_:node1") == ("bnode", "node1", None, None)
+
+
+def test_unbound_cells_are_left_out_of_rows():
+    rows = list(iter_tsv_rows(tsv("?s\t?name\t?age",
+                                  '<http://example.org/a>\t"Ann"\t30',
+                                  '<http://example.org/b>\t\t',
+                                  '\t"Cy"@en\t',
+                                  "")))
+    assert rows == [
+        {"s": URIRef("http://example.org/a"), "name": Literal("Ann"),
+         "age": Literal("30", datatype=XSD.integer)},
+        {"s": URIRef("http://example.org/b")},
+        {"name": Literal("Cy", lang="en")},
+    ]
+
+
+def test_raw_rows_hold_lexical_forms():
+    rows = list(iter_tsv_rows(tsv("?s\t?name\t?b",
+                                  '<http://example.org/a>\t"tab\\there"@en\t_:x'), raw=True))
+    assert rows == [{"s": "http://example.org/a", "name": "tab\there", "b": "x"}]
+
+
+def test_an_empty_response_has_no_rows():
+    assert list(iter_tsv_rows([])) == []
+    assert list(iter_tsv_rows(tsv("?s"))) == []
+
+
+def test_iter_select_matches_execute_select(store):
+    store.update.execute_update(f"""
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        INSERT DATA {{ GRAPH <{GRAPH}> {{
+            <http://example.org/a> <http://example.org/name> "Ann \\"A\\" Lee"@en ;
+                                   <http://example.org/age> "30"^^xsd:int ;
+                                   <http://example.org/knows> _:friend .
+            <http://example.org/b> <http://example.org/name> "Bob\\\\" .
+        }} }}""")
+    query = (f"SELECT ?s ?p ?o ?missing WHERE {{ GRAPH <{GRAPH}> {{ ?s ?p ?o }} "
+             f"OPTIONAL {{ ?s <http://example.org/none> ?missing }} }} ORDER BY ?s ?p")
+
+    expected = store.query.execute_select(query, use_cache=False)
+    streamed = list(store.query.iter_select(query))
+    assert len(streamed) == 4
+    assert streamed == expected
+
+
+def test_columns_get_typed_arrays_and_unbound_masks():
+    np = pytest.importorskip("numpy")
+
+    result = decode_tsv_columns(tsv(
+        "?s\t?age\t?score\t?active\t?name\t?mixed",
+        '<http://example.org/a>\t30\t1.5\t"true"^^<http://www.w3.org/2001/XMLSchema#boolean>'
+        '\t"Ann"@en\t1',
+        '<http://example.org/b>\t\t"2"^^<http://www.w3.org/2001/XMLSchema#int>\tfalse\t\t"x"',
+        "_:c\t-4\t\ttrue\t\"Cy\"\t2.5",
+        "<http://example.org/d>\t7",
+    ))
+
+    assert result.variables == ["s", "age", "score", "active", "name", "mixed"]
+    assert len(result) == 4
+    assert result["s"].dtype == object and list(result["s"]) == [
+        "http://example.org/a", "http://example.org/b", "c", "http://example.org/d"]
+    assert result["age"].dtype == np.int64 and list(result["age"]) == [30, 0, -4, 7]
+    assert list(result.masks["age"]) == [False, True, False, False]
+    assert result["score"].dtype == np.float64
+    assert list(result["score"][:2]) == [1.5, 2.0] and np.isnan(result["score"][2:]).all()
+    assert list(result.masks["score"]) == [False, False, True, True]
+    assert result["active"].dtype == bool and list(result["active"]) == [True, False, True, False]
+    assert list(result.masks["active"]) == [False, False, False, True]
+    assert list(result["name"]) == ["Ann", None, "Cy", None]
+    assert result["mixed"].dtype == object and list(result["mixed"]) == ["1", "x", "2.5", None]
+
+
+def test_integers_too_large_for_int64_become_floats():
+    np = pytest.importorskip("numpy")
+
+    result = decode_tsv_columns(tsv("?n", "1", "123456789012345678901234567890"))
+    assert result["n"].dtype == np.float64 and result["n"][1] == pytest.approx(1.2345678901e29)
+
+
+def test_an_empty_result_has_empty_columns():
+    pytest.importorskip("numpy")
+
+    result = decode_tsv_columns(tsv("?s\t?n"))
+    assert len(result) == 0 and len(result["n"]) == 0 and len(result.masks["s"]) == 0
+    assert len(decode_tsv_columns([])) == 0
+
+
+def test_select_columns_matches_execute_select(store):
+    pytest.importorskip("numpy")
+    store.update.execute_update(f"""
+        INSERT DATA {{ GRAPH <{GRAPH}> {{
+            <http://example.org/a> <http://example.org/age> 30 ; <http://example.org/name> "Ann" .
+            <http://example.org/b> <http://example.org/age> 41 .
+        }} }}""")
+    query = (f"SELECT ?s ?age ?name WHERE {{ GRAPH <{GRAPH}> {{ ?s <http://example.org/age> ?age "
+             f"OPTIONAL {{ ?s <http://example.org/name> ?name }} }} }} ORDER BY ?s")
+
+    result = store.query.select_columns(query)
+    rows = store.query.execute_select(query, use_cache=False)
+    assert list(result["age"]) == [row["age"].toPython() for row in rows]
+    assert list(result["name"]) == [str(row["name"]) if "name" in row else None for row in rows]
+    assert list(result.masks["name"]) == [False, True]
@@ -0,0 +1,72 @@
+"""Tests for the document retriever and its local indexes."""
+
+import threading
+
+import pytest
+
+integration = pytest.importorskip("langgraphsemantic.integration", exc_type=ImportError)
+SemanticRetriever = integration.SemanticRetriever
+
+
+def document(number, text):
+    return {"id": f"http://example.org/doc/{number}", "text": text,
+            "metadata": {"title": f"Doc {number}"}}
+
+
+def test_added_and_removed_documents_update_the_index_in_place(store, transport):
+    retriever = SemanticRetriever(store, k=2)
+    assert retriever.add_documents([document(1, "fuseki serves sparql"),
+                                    document(2, "pydantic validates models")])
+    assert [doc["id"] for doc in retriever._get_relevant_documents("sparql")] == [
+        "http://example.org/doc/1"]
+
+    queries = transport.queries
+    assert retriever.add_documents([document(3, "sparql over http")])
+    assert retriever.remove_documents(["http://example.org/doc/1"])
+    ids = [doc["id"] for doc in retriever._get_relevant_documents("sparql")]
+    assert ids == ["http://example.org/doc/3"]
+    assert transport.queries == queries
+
+
+def test_index_changes_wait_for_the_index_lock(store):
+    retriever = SemanticRetriever(store, k=2)
+    retriever._get_relevant_documents("anything")
+
+    with retriever._index_lock:
+        adding = threading.Thread(
+            target=retriever.add_documents, args=([document(1, "fuseki serves sparql")],))
+        adding.start()
+        adding.join(0.2)
+        assert adding.is_alive()
+        assert "http://example.org/doc/1" not in retriever.index.documents
+    adding.join()
+    assert "http://example.org/doc/1" in retriever.index.documents
+
+
+def test_only_new_or_changed_documents_are_embedded_after_a_restart(store, tmp_path):
+    pytest.importorskip("numpy")
+    from langgraphsemantic.vectors import HashingEmbedder
+
+    embedded = []
+    hashing = HashingEmbedder(dim=64)
+
+    def embedder(texts):
+        embedded.extend(texts)
+        return hashing(texts)
+    embedder.dim = 64
+
+    retriever = SemanticRetriever(store, k=1, embedder=embedder,
+                                  vector_index_path=str(tmp_path), expand=False)
+    retriever.add_documents([document(1, "fuseki serves sparql"),
+                             document(2, "pydantic validates models")])
+    assert retriever._get_relevant_documents("sparql")[0]["id"] == "http://example.org/doc/1"
+
+    embedded.clear()
+    restarted = SemanticRetriever(store, k=1, embedder=embedder,
+                                  vector_index_path=str(tmp_path), expand=False)
+    restarted._get_relevant_documents("models")
+    assert embedded == ["models"]
+
+    restarted.add_documents([document(2, "pydantic validates sparql models"),
+                             document(1, "fuseki serves sparql")])
+    assert embedded == ["models", "pydantic validates sparql models"]
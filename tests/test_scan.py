@@ -0,0 +1,41 @@
+"""Tests for keyset scans of named graphs."""
+
+import pytest
+from rdflib import Literal, URIRef
+
+GRAPH = "http://example.org/graphs/people"
+NAME = URIRef("http://example.org/name")
+KNOWS = URIRef("http://example.org/knows")
+
+
+@pytest.fixture
+def people(store):
+    lines = []
+    for i in range(25):
+        person = f"<http://example.org/person/{i:03d}>"
+        lines.append(f'{person} <{NAME}> "Person {i}" .')
+        lines.append(f"{person} <{KNOWS}> <http://example.org/person/{(i + 1) % 25:03d}> .")
+    lines.append(f'_:anonymous <{NAME}> "Nobody" .')
+    assert store.update.execute_update(
+        f"INSERT DATA {{ GRAPH <{GRAPH}> {{ {' '.join(lines)} }} }}")
+    return store
+
+
+@pytest.mark.parametrize("page_size", [1, 7, 25, 100])
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_scan_returns_every_iri_subject_triple_once(people, page_size, prefetch):
+    triples = list(people.scan(GRAPH, page_size=page_size, prefetch=prefetch))
+    assert len(triples) == len(set(triples)) == 50
+    assert (URIRef("http://example.org/person/007"), NAME, Literal("Person 7")) in triples
+    assert all(isinstance(s, URIRef) for s, _, _ in triples)
+
+
+def test_scan_stops_after_a_short_page(people, transport):
+    queries = transport.queries
+    assert len(list(people.scan(GRAPH, page_size=10, prefetch=False))) == 50
+    # Pages of 10, 10 and 5 subjects; the short page ends the scan
+    assert transport.queries - queries == 3
+
+
+def test_scan_of_an_empty_graph_yields_nothing(store):
+    assert list(store.scan("http://example.org/graphs/empty")) == []
@@ -0,0 +1,146 @@
+"""Tests for writing model instances as N-Triples with InstanceSerializer."""
+
+import math
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+from rdflib import Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+
+from langgraphsemantic.serialization import InstanceSerializer
+
+NAMESPACE = "http://example.org/"
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+    score: float
+    active: bool
+    email: Optional[str] = None
+    tags: List[str] = []
+    ratings: List[float] = []
+    address: Optional[Address] = None
+    previous: List[Address] = []
+
+
+def instance_to_rdf(instance, subject, graph=None):
+    """
+    Build a Graph the way LangGraphSemantic._instance_to_rdf used to.
+
+    Subjects are named by subject() instead of id(instance). The old code
+    read fields from instance.dict(), which turned nested models into
+    dicts that were dropped; they are read as attributes here, so its
+    nested model branches are exercised.
+    """
+    model_name = instance.__class__.__name__
+    if graph is None:
+        graph = Graph()
+    instance_uri = URIRef(subject(instance))
+    graph.add((instance_uri, RDF.type, URIRef(f"{NAMESPACE}{model_name}")))
+
+    for field_name in instance.__fields__:
+        field_value = getattr(instance, field_name)
+        predicate = URIRef(f"{NAMESPACE}{field_name}")
+        if field_value is None:
+            continue
+        if isinstance(field_value, (str, int, float, bool)):
+            graph.add((instance_uri, predicate, Literal(field_value)))
+        elif isinstance(field_value, list):
+            for item in field_value:
+                if isinstance(item, (str, int, float, bool)):
+                    graph.add((instance_uri, predicate, Literal(item)))
+                elif isinstance(item, BaseModel):
+                    instance_to_rdf(item, subject, graph)
+                    graph.add((instance_uri, predicate, URIRef(subject(item))))
+        elif isinstance(field_value, BaseModel):
+            instance_to_rdf(field_value, subject, graph)
+            graph.add((instance_uri, predicate, URIRef(subject(field_value))))
+    return graph
+
+
+def parsed(ntriples):
+    graph = Graph()
+    graph.parse(data=ntriples, format="nt")
+    return graph
+
+
+PEOPLE = [
+    Person(name="Ann", age=30, score=0.1, active=True),
+    Person(name='Bob "the builder"\nO\'Neil \\ café \U0001F600\ttab', age=-7, score=1e20,
+           active=False, email="bob@example.org", tags=["a", "b", ""], ratings=[2.5, -0.0]),
+    Person(name="Cy", age=10 ** 20, score=float("inf"), active=True,
+           address=Address(street="1 Main St", city="Springfield"),
+           previous=[Address(street="2 Side St", city="Shelbyville"),
+                     Address(street="3 Back Ln", city="Ogdenville")]),
+]
+
+
+def test_serializer_writes_the_same_graph_as_instance_to_rdf():
+    serializer = InstanceSerializer(NAMESPACE)
+    for person in PEOPLE:
+        expected = instance_to_rdf(person, serializer.subject)
+        written = parsed(serializer.serialize(person))
+        assert set(written) == set(expected), person.name
+        assert isomorphic(serializer.to_graph(person), expected)
+
+
+def test_literals_keep_their_datatypes_and_lexical_forms():
+    serializer = InstanceSerializer(NAMESPACE)
+    graph = parsed(serializer.serialize(PEOPLE[1]))
+    subject = URIRef(serializer.subject(PEOPLE[1]))
+    for field_name in ("name", "age", "score", "active"):
+        value = graph.value(subject, URIRef(f"{NAMESPACE}{field_name}"))
+        literal = Literal(getattr(PEOPLE[1], field_name))
+        assert (str(value), value.datatype, value.language) == (
+            str(literal), literal.datatype, literal.language)
+        assert value.toPython() == getattr(PEOPLE[1], field_name)
+
+
+@pytest.mark.parametrize("score, lexical", [
+    (0.1, "0.1"),
+    (1e20, "1e+20"),
+    (-0.0, "-0.0"),
+    (float("inf"), "INF"),
+    (float("-inf"), "-INF"),
+    (float("nan"), "NaN"),
+])
+def test_doubles_are_written_in_xsd_lexical_forms(score, lexical):
+    serializer = InstanceSerializer(NAMESPACE)
+    person = Person(name="Ann", age=30, score=score, active=True, ratings=[score])
+    text = serializer.serialize(person)
+    # Checked in the text, as rdflib normalizes lexical forms when parsing
+    for field_name in ("score", "ratings"):
+        assert f'<{NAMESPACE}{field_name}> "{lexical}"^^<{XSD.double}> .' in text
+    graph = parsed(text)
+    subject = URIRef(serializer.subject(person))
+    for field_name in ("score", "ratings"):
+        value = graph.value(subject, URIRef(f"{NAMESPACE}{field_name}"))
+        assert value.datatype == XSD.double and not value.ill_typed
+        if math.isnan(score):
+            assert math.isnan(value.toPython())
+        else:
+            assert value.toPython() == score
+
+
+def test_equal_instances_get_the_same_subject():
+    serializer = InstanceSerializer(NAMESPACE)
+    copy = Person(**PEOPLE[0].dict())
+    assert serializer.subject(copy) == serializer.subject(PEOPLE[0])
+    assert serializer.subject(PEOPLE[0]) != serializer.subject(PEOPLE[1])
+
+
+def test_quads_are_written_in_the_named_graph():
+    serializer = InstanceSerializer(NAMESPACE)
+    graph_uri = "http://example.org/graphs/people"
+    dataset = Dataset()
+    dataset.parse(data=serializer.serialize(PEOPLE[2], graph_uri), format="nquads")
+    assert isomorphic(dataset.graph(URIRef(graph_uri)),
+                      instance_to_rdf(PEOPLE[2], serializer.subject))
@@ -0,0 +1,175 @@
+"""Tests for type mapping, schema fingerprints, shape generation and the shape cache."""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+from rdflib import BNode, Graph, URIRef
+from rdflib.namespace import SH, XSD
+
+from conftest import RDFLibTransport
+from langgraphsemantic.cache import LRUCache
+from langgraphsemantic.core import ShapeGenerator, TypeMapper
+from langgraphsemantic.store import FusekiStore
+
+SHAPE = URIRef("http://example.org/PersonShape")
+
+
+class Temperature(float):
+    pass
+
+
+class Reading(BaseModel):
+    sensor: str
+    value: Temperature
+    history: Optional[List[Temperature]] = None
+
+
+def datatypes(shape):
+    return {str(shape.value(prop, SH.path)).rsplit("/", 1)[-1]: shape.value(prop, SH.datatype)
+            for prop in shape.objects(None, SH.property)}
+
+
+def test_register_replaces_cached_mappings():
+    mapper = TypeMapper()
+    assert mapper.map_type(Temperature) == XSD.double
+    assert mapper.map_type(Optional[List[Temperature]]) == XSD.double
+    assert Optional[List[Temperature]] in mapper._cache
+
+    mapper.register(Temperature, XSD.decimal)
+    assert not mapper._cache
+    assert mapper.map_type(Temperature) == XSD.decimal
+    assert mapper.map_type(Optional[List[Temperature]]) == XSD.decimal
+    assert mapper.map_type(float) == XSD.double
+
+
+def test_the_cache_is_bounded():
+    mapper = TypeMapper(max_cache_size=2)
+    for python_type in (int, str, Optional[int], List[str]):
+        mapper.map_type(python_type)
+    assert len(mapper._cache) == 2
+    assert mapper.map_type(int) == XSD.integer
+
+
+def test_registering_a_used_type_changes_the_fingerprint_and_shape():
+    generator = ShapeGenerator()
+    before = generator.schema_fingerprint(Reading)
+    shape = generator.generate_shape(Reading)
+    assert datatypes(shape)["value"] == XSD.double
+    assert generator.generate_shape(Reading) is shape
+
+    generator.type_mapper.register(Temperature, URIRef("http://example.org/celsius"))
+    after = generator.schema_fingerprint(Reading)
+    assert after != before
+    regenerated = generator.generate_shape(Reading)
+    assert regenerated is not shape
+    assert datatypes(regenerated)["value"] == URIRef("http://example.org/celsius")
+    assert datatypes(regenerated)["history"] == URIRef("http://example.org/celsius")
+
+
+def test_registering_an_unused_type_keeps_the_fingerprint():
+    generator = ShapeGenerator()
+    before = generator.schema_fingerprint(Reading)
+    shape = generator.generate_shape(Reading)
+
+    generator.type_mapper.register(bytes, XSD.base64Binary)
+    assert generator.schema_fingerprint(Reading) == before
+    assert generator.generate_shape(Reading) is shape
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingTransport(RDFLibTransport):
+    """Records the kind of each query sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.kinds = []
+
+    def query(self, endpoint, query, accept, stream=False):
+        self.kinds.append(query.split()[0])
+        return super().query(endpoint, query, accept, stream=stream)
+
+
+def person_shape(datatype):
+    shape = Graph()
+    prop = BNode()
+    shape.add((SHAPE, SH.property, prop))
+    shape.add((prop, SH.path, URIRef("http://example.org/age")))
+    shape.add((prop, SH.datatype, datatype))
+    return shape
+
+
+def shape_stores(ttl=30.0):
+    transport = RecordingTransport()
+    writer = FusekiStore("http://fuseki.test", "ds", transport=transport)
+    reader = FusekiStore("http://fuseki.test", "ds", transport=transport)
+    clock = Clock()
+    reader.shape_cache = LRUCache(ttl=ttl, clock=clock)
+    return writer, reader, transport, clock
+
+
+def shape_datatype(shape):
+    return next(shape.objects(None, SH.datatype))
+
+
+def test_cached_shapes_are_served_without_a_request_until_the_ttl():
+    writer, reader, transport, clock = shape_stores()
+    assert writer.store_shape(person_shape(XSD.integer), "Person", fingerprint="v1")
+    assert shape_datatype(reader.get_shape("Person")) == XSD.integer
+    assert transport.kinds == ["CONSTRUCT"]
+
+    clock.now = 29
+    assert writer.store_shape(person_shape(XSD.decimal), "Person", fingerprint="v2")
+    assert shape_datatype(reader.get_shape("Person")) == XSD.integer
+    assert transport.kinds == ["CONSTRUCT"]
+
+
+def test_an_expired_shape_is_revalidated_by_its_fingerprint():
+    writer, reader, transport, clock = shape_stores()
+    writer.store_shape(person_shape(XSD.integer), "Person", fingerprint="v1")
+    shape = reader.get_shape("Person")
+
+    clock.now = 31
+    assert reader.get_shape("Person") is shape
+    assert transport.kinds == ["CONSTRUCT", "SELECT"]
+    assert reader.shape_cache_stats()["revalidations"] == 1
+
+    clock.now = 60
+    assert reader.get_shape("Person") is shape
+    assert transport.kinds == ["CONSTRUCT", "SELECT"]
+
+
+def test_a_changed_fingerprint_refetches_the_shape():
+    writer, reader, transport, clock = shape_stores()
+    writer.store_shape(person_shape(XSD.integer), "Person", fingerprint="v1")
+    reader.get_shape("Person")
+
+    writer.store_shape(person_shape(XSD.decimal), "Person", fingerprint="v2")
+    clock.now = 31
+    assert shape_datatype(reader.get_shape("Person")) == XSD.decimal
+    assert transport.kinds == ["CONSTRUCT", "SELECT", "CONSTRUCT"]
+    assert reader.get_cached_shape("Person").fingerprint == "v2"
+    assert reader.shape_cache_stats()["revalidations"] == 0
+
+
+def test_shapes_without_a_fingerprint_are_refetched_once_expired():
+    writer, reader, transport, clock = shape_stores()
+    writer.store_shape(person_shape(XSD.integer), "Person")
+    reader.get_shape("Person")
+    clock.now = 31
+    reader.get_shape("Person")
+    assert transport.kinds == ["CONSTRUCT", "CONSTRUCT"]
+
+
+def test_missing_shapes_are_not_cached():
+    writer, reader, transport, clock = shape_stores()
+    assert not reader.get_shape("Person")
+    writer.store_shape(person_shape(XSD.integer), "Person", fingerprint="v1")
+    assert shape_datatype(reader.get_shape("Person")) == XSD.integer
+    assert transport.kinds == ["CONSTRUCT", "CONSTRUCT"]
@@ -0,0 +1,126 @@
+"""Tests for the HTTP transports, against the stub SPARQL server."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from stub_server import StubSPARQLServer
+
+from langgraphsemantic.transport import (
+    N_TRIPLES_MEDIA_TYPE,
+    SPARQL_RESULTS_JSON,
+    SPARQL_RESULTS_TSV,
+    SessionTransport,
+    SPARQLWrapperTransport,
+)
+
+QUERY = "SELECT ?s ?name ?value WHERE { ?s ?p ?o }"
+
+
+def test_session_transport_reuses_one_connection():
+    with StubSPARQLServer(rows=3) as server:
+        transport = SessionTransport()
+        endpoint = f"{server.base_url}/ds/query"
+        for _ in range(20):
+            response = transport.query(endpoint, QUERY, SPARQL_RESULTS_JSON)
+            assert len(response.json()["results"]["bindings"]) == 3
+        transport.update(f"{server.base_url}/ds/update", "CLEAR DEFAULT")
+        transport.close()
+        assert server.httpd.queries == 20 and server.httpd.connections == 1
+
+
+def test_streamed_responses_return_their_connection_once_read():
+    with StubSPARQLServer(rows=100) as server:
+        transport = SessionTransport()
+        endpoint = f"{server.base_url}/ds/query"
+        for _ in range(5):
+            lines = list(transport.query(endpoint, QUERY, SPARQL_RESULTS_TSV,
+                                         stream=True).iter_lines())
+            assert len(lines) == 101
+        transport.close()
+        assert server.httpd.connections == 1
+
+
+def run_concurrently(transport, server, queries=16, threads=8):
+    endpoint = f"{server.base_url}/ds/query"
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda _: transport.query(endpoint, QUERY, SPARQL_RESULTS_JSON),
+                      range(queries)))
+    transport.close()
+
+
+def test_a_blocking_pool_never_opens_more_than_pool_maxsize_connections():
+    with StubSPARQLServer(latency=0.05) as server:
+        run_concurrently(SessionTransport(pool_maxsize=2, pool_block=True), server)
+        assert server.httpd.connections == 2
+
+
+def test_a_non_blocking_pool_opens_extra_connections_under_load():
+    with StubSPARQLServer(latency=0.05) as server:
+        run_concurrently(SessionTransport(pool_maxsize=2, pool_block=False), server)
+        assert server.httpd.connections > 2
+
+
+def test_slow_responses_raise_a_timeout():
+    with StubSPARQLServer(latency=0.5) as server:
+        transport = SessionTransport(read_timeout=0.05)
+        with pytest.raises(requests.Timeout):
+            transport.query(f"{server.base_url}/ds/query", QUERY, SPARQL_RESULTS_JSON)
+        transport.close()
+
+
+def test_a_deadline_caps_the_timeouts():
+    with StubSPARQLServer(latency=0.5) as server:
+        transport = SessionTransport(read_timeout=10)
+        with transport.deadline(0.05):
+            with pytest.raises(requests.Timeout):
+                transport.query(f"{server.base_url}/ds/query", QUERY, SPARQL_RESULTS_JSON)
+        transport.close()
+
+
+def test_close_drops_the_pooled_connections():
+    with StubSPARQLServer() as server:
+        transport = SessionTransport()
+        endpoint = f"{server.base_url}/ds/query"
+        transport.query(endpoint, QUERY, SPARQL_RESULTS_JSON)
+        adapter = transport.session.get_adapter(endpoint)
+        assert adapter.poolmanager.pools
+
+        transport.close()
+        assert not adapter.poolmanager.pools
+        transport.query(endpoint, QUERY, SPARQL_RESULTS_JSON)
+        assert server.httpd.connections == 2
+
+
+def test_session_transport_streams_uploads():
+    with StubSPARQLServer() as server:
+        transport = SessionTransport()
+        body = (b"<http://example.org/s> <http://example.org/p> <http://example.org/o> .\n"
+                for _ in range(10))
+        transport.post_data(f"{server.base_url}/ds/data", body, N_TRIPLES_MEDIA_TYPE,
+                            {"graph": "http://example.org/g"})
+        transport.close()
+        assert server.httpd.triples_loaded == 10
+
+
+def test_sparqlwrapper_transport_keeps_wrappers_per_thread():
+    with StubSPARQLServer(rows=3) as server:
+        transport = SPARQLWrapperTransport()
+        endpoint = f"{server.base_url}/ds/query"
+        response = transport.query(endpoint, QUERY, SPARQL_RESULTS_JSON)
+        assert len(response.json()["results"]["bindings"]) == 3
+        wrapper = transport._get_wrapper(endpoint, "GET")
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(
+            transport._get_wrapper(endpoint, "GET")))
+        thread.start()
+        thread.join()
+        assert other[0] is not wrapper
+        assert transport._get_wrapper(endpoint, "GET") is wrapper
+
+        transport.post_data(f"{server.base_url}/ds/data",
+                            b"<http://example.org/s> <http://example.org/p> \"o\" .\n",
+                            N_TRIPLES_MEDIA_TYPE)
+        assert server.httpd.triples_loaded == 1
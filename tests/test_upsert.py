@@ -0,0 +1,170 @@
+"""Tests for storing and upserting batches of instances."""
+
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel
+from rdflib import Literal
+from rdflib.namespace import XSD
+
+from conftest import RDFLibTransport
+from langgraphsemantic.store import FusekiStore
+
+main = pytest.importorskip("langgraphsemantic.main", exc_type=ImportError)
+
+
+class Person(BaseModel):
+    id: int
+    name: str
+    age: int
+
+    class Config:
+        iri_key = "id"
+
+
+class Note(BaseModel):
+    text: str
+
+
+class Product(BaseModel):
+    sku: str
+    price: Decimal
+    weight: float
+
+    class Config:
+        iri_key = "sku"
+
+
+class CanonicalTransport(RDFLibTransport):
+    """Returns decimals in their canonical form, as Fuseki's TDB2 does."""
+
+    @staticmethod
+    def _tsv(result):
+        variables = [str(var) for var in result.vars]
+        lines = ["\t".join(f"?{var}" for var in variables)]
+        for row in result:
+            lines.append("\t".join(CanonicalTransport._canonical(row[var]).n3()
+                                   if row[var] is not None else "" for var in variables))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _canonical(term):
+        if isinstance(term, Literal) and term.datatype == XSD.decimal:
+            text = format(term.toPython().normalize(), "f")
+            return Literal(text if "." in text else f"{text}.0", datatype=XSD.decimal)
+        return term
+
+
+@pytest.fixture
+def lgs(store, monkeypatch):
+    monkeypatch.setattr(main, "FusekiStore", lambda *args, **kwargs: store)
+    return main.LangGraphSemantic("http://fuseki.test", "ds")
+
+
+def people(count, age=30):
+    return [Person(id=i, name=f"Person {i}", age=age) for i in range(count)]
+
+
+def test_store_instances_batches_by_model(lgs):
+    report = lgs.store_instances(people(5) + [Note(text="hi")], batch_size=2)
+    assert report["succeeded"] == 6 and report["failed"] == 0
+    assert [(batch["model"], batch["succeeded"]) for batch in report["batches"]] == [
+        ("Person", 2), ("Person", 2), ("Person", 1), ("Note", 1)]
+    assert len(list(lgs.load_instances(Person))) == 5
+
+
+class SlowStore:
+    """Wraps store_instance_data to take a while and to fail batches of one model."""
+
+    def __init__(self, store, fail_model=None):
+        self.store_instance_data = store.store_instance_data
+        self.fail_model = fail_model
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.done = 0
+        store.store_instance_data = self
+
+    def __call__(self, data, model_name, bulk=False):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.02)
+            if model_name == self.fail_model:
+                return False
+            with self.lock:
+                return self.store_instance_data(data, model_name, bulk=bulk)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.done += 1
+
+
+def test_store_instances_keeps_max_in_flight_batches_in_flight(lgs, store):
+    slow = SlowStore(store)
+    report = lgs.store_instances(people(20), batch_size=2, max_in_flight=3)
+    assert report["succeeded"] == 20 and len(report["batches"]) == 10
+    assert slow.max_in_flight == 3
+    assert len(list(lgs.load_instances(Person))) == 20
+
+
+def test_store_instances_reads_no_further_ahead_than_max_in_flight(lgs, store):
+    slow = SlowStore(store)
+    unfinished = []
+
+    def instances():
+        for i, person in enumerate(people(20)):
+            # Batches of two; those before instance i have all been submitted
+            unfinished.append(i // 2 - slow.done)
+            yield person
+
+    lgs.store_instances(instances(), batch_size=2, max_in_flight=2)
+    assert max(unfinished) == 2
+
+
+def test_failed_batches_are_reported_in_flush_order(lgs, store):
+    SlowStore(store, fail_model="Note")
+    instances = people(3) + [Note(text=f"note {i}") for i in range(3)]
+    report = lgs.store_instances(instances, batch_size=2, max_in_flight=4)
+    assert [(batch["model"], batch["succeeded"], batch["failed"])
+            for batch in report["batches"]] == [
+        ("Person", 2, 0), ("Note", 0, 2), ("Person", 1, 0), ("Note", 0, 1)]
+    assert report["succeeded"] == 3 and report["failed"] == 3
+
+
+def test_upsert_sends_only_the_difference(lgs):
+    first = lgs.upsert_instances(people(4))
+    assert first["succeeded"] == 4 and first["inserted"] > 0 and first["deleted"] == 0
+
+    again = lgs.upsert_instances(people(4))
+    assert again["inserted"] == again["deleted"] == 0
+
+    changed = people(4)
+    changed[1].age = 31
+    report = lgs.upsert_instances(changed)
+    assert report["inserted"] == report["deleted"] == 1
+    assert sorted(person.age for person in lgs.load_instances(Person)) == [30, 30, 30, 31]
+
+
+def test_upsert_compares_literals_by_value(monkeypatch):
+    store = FusekiStore("http://fuseki.test", "ds", transport=CanonicalTransport())
+    monkeypatch.setattr(main, "FusekiStore", lambda *args, **kwargs: store)
+    lgs = main.LangGraphSemantic("http://fuseki.test", "ds")
+    products = [Product(sku="a", price=Decimal("1.50"), weight=2.0),
+                Product(sku="b", price=Decimal("2"), weight=0.25)]
+    assert lgs.upsert_instances(products)["inserted"] == 8
+
+    again = lgs.upsert_instances(products)
+    assert again["inserted"] == again["deleted"] == 0
+
+    products[0].price = Decimal("1.75")
+    report = lgs.upsert_instances(products)
+    assert report["inserted"] == report["deleted"] == 1
+
+
+def test_upsert_refuses_models_without_a_key(lgs):
+    with pytest.raises(ValueError, match="no key field"):
+        lgs.upsert_instances([Note(text="hi")])
@@ -0,0 +1,69 @@
+"""Tests for in-process SHACL validation."""
+
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, Field
+
+from langgraphsemantic.core import ShapeGenerator
+from langgraphsemantic.serialization import InstanceSerializer
+from langgraphsemantic.validation import ShapeValidator
+
+
+class Person(BaseModel):
+    name: str = Field(..., min_length=2, max_length=10, regex=r"^[A-Z]")
+    age: int = Field(..., ge=0, lt=150)
+    tags: List[str] = []
+    email: Optional[str] = None
+
+
+# Built with construct() so invalid values get past Pydantic
+INSTANCES = [
+    Person(name="Ada", age=36, tags=["math"]),
+    Person.construct(name="x", age=36, tags=[], email=None),
+    Person.construct(name="Alexander The Great", age=200, tags=[], email=None),
+    Person.construct(name="Bob", age=-1, tags=[], email=None),
+]
+
+
+def violations(report):
+    return sorted((str(result["focus_node"]), str(result["path"]))
+                  for result in report["results"])
+
+
+@pytest.fixture
+def shape():
+    return ShapeGenerator().generate_shape(Person)
+
+
+@pytest.fixture
+def validator(shape):
+    return ShapeValidator(shape)
+
+
+def test_instance_and_graph_validation_agree(validator):
+    serializer = InstanceSerializer()
+    for instance in INSTANCES:
+        focus = serializer.subject(instance)
+        from_instance = validator.validate_instance(instance, focus)
+        from_graph = validator.validate(serializer.to_graph(instance))
+        assert from_instance["valid"] == from_graph["valid"]
+        assert violations(from_instance) == violations(from_graph)
+
+
+def test_batch_validation_agrees_with_single(validator):
+    focus_nodes = [f"http://example.org/person/{i}" for i in range(len(INSTANCES))]
+    batch = validator.validate_batch(INSTANCES, focus_nodes)
+    assert list(batch["conforms"]) == [True, False, False, False]
+    for instance, focus, results in zip(INSTANCES, focus_nodes, batch["results"]):
+        single = validator.validate_instance(instance, focus)
+        assert violations(single) == violations({"results": results})
+
+
+def test_agrees_with_pyshacl(shape, validator):
+    pyshacl = pytest.importorskip("pyshacl")
+    serializer = InstanceSerializer()
+    for instance in INSTANCES:
+        data = serializer.to_graph(instance)
+        conforms, _, _ = pyshacl.validate(data, shacl_graph=shape)
+        assert validator.validate(data)["valid"] == conforms
@@ -0,0 +1,94 @@
+"""Tests for the hashing embedder and the IVF vector index."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from langgraphsemantic.vectors import HashingEmbedder, VectorIndex  # noqa: E402
+
+
+def test_hashing_embedder_is_deterministic():
+    texts = ["Fuseki serves SPARQL", "pydantic models"]
+    first, second = HashingEmbedder(dim=64)(texts), HashingEmbedder(dim=64)(texts)
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+
+def test_hashing_embedder_ranks_shared_words_higher():
+    embed = HashingEmbedder(dim=256)
+    query, related, unrelated = embed(["sparql endpoint",
+                                       "a sparql endpoint over http",
+                                       "pydantic validates models"])
+    assert query @ related > query @ unrelated
+
+
+def clustered(rng, count, dim, clusters=64):
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dim))
+
+
+def test_ivf_search_recalls_exact_neighbours():
+    rng = np.random.default_rng(1)
+    data = clustered(rng, 8000, 32)
+    index = VectorIndex(32, train_threshold=4096, n_probe=8)
+    index.add([str(i) for i in range(len(data))], data)
+    assert index.centroids is not None
+
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    queries = data[rng.choice(len(data), 100)] + 0.1 * rng.normal(size=(100, 32))
+    found = 0
+    for query in queries:
+        exact = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:10]
+        found += len({str(i) for i in exact} & {doc_id for doc_id, _ in index.search(query, 10)})
+    assert found / (10 * len(queries)) >= 0.95
+
+
+def test_removed_and_excluded_vectors_are_not_returned():
+    embed = HashingEmbedder(dim=64)
+    index = VectorIndex(64)
+    index.add(["a", "b", "c"], embed(["red apple", "red car", "blue sky"]))
+    index.remove(["a"])
+    assert [doc_id for doc_id, _ in index.search(embed(["red"])[0], 3)][:1] == ["b"]
+    assert "b" not in {doc_id for doc_id, _ in index.search(embed(["red"])[0], 3, exclude=["b"])}
+    assert len(index) == 2 and "a" not in index
+
+
+def test_saved_index_reloads_vectors_and_digests(tmp_path):
+    embed = HashingEmbedder(dim=64)
+    index = VectorIndex(64, path=str(tmp_path), train_threshold=2)
+    index.add(["a", "b", "c"], embed(["red apple", "red car", "blue sky"]), ["d1", "d2", "d3"])
+    index.save()
+
+    reloaded = VectorIndex(64, path=str(tmp_path), train_threshold=2)
+    assert reloaded.digest("b") == "d2"
+    assert reloaded.centroids is not None
+    assert reloaded.search(embed(["blue sky"])[0], 1)[0][0] == "c"
+
+
+def test_replacing_vectors_keeps_the_stored_rows_bounded(tmp_path):
+    embed = HashingEmbedder(dim=64)
+    index = VectorIndex(64, path=str(tmp_path))
+    index.add(["a", "b"], embed(["red apple", "red car"]))
+    for i in range(500):
+        index.add(["a"], embed([f"apple {i}"]), [f"d{i}"])
+        assert len(index.ids) <= 2 * len(index)
+    index.save()
+
+    reloaded = VectorIndex(64, path=str(tmp_path))
+    assert len(reloaded.ids) <= 4 and len(reloaded) == 2
+    assert reloaded.digest("a") == "d499"
+    assert reloaded.search(embed(["apple 499"])[0], 1)[0][0] == "a"
+    assert reloaded.search(embed(["red car"])[0], 1)[0][0] == "b"
+
+
+def test_compaction_keeps_inverted_lists_in_step():
+    rng = np.random.default_rng(2)
+    data = clustered(rng, 600, 16, clusters=8)
+    index = VectorIndex(16, train_threshold=500, n_probe=2)
+    index.add([str(i) for i in range(len(data))], data)
+    index.remove([str(i) for i in range(0, 600, 2)])
+    index.remove([str(i) for i in range(1, 200, 2)])
+    assert len(index.ids) == len(index) == 200
+
+    for i in range(201, 600, 50):
+        assert index.search(data[i], 1)[0][0] == str(i)
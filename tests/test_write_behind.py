@@ -0,0 +1,108 @@
+"""Tests for the write-behind insert queue."""
+
+import time
+
+import pytest
+import requests
+
+from conftest import RDFLibTransport
+from langgraphsemantic.store import FusekiStore
+
+GRAPH = "http://example.org/graphs/people"
+
+
+class FlakyTransport(RDFLibTransport):
+    """Fails updates with the queued errors, then with fail_with if set."""
+
+    def __init__(self, errors=(), fail_with=None):
+        super().__init__()
+        self.errors = list(errors)
+        self.fail_with = fail_with
+        self.attempts = 0
+
+    def update(self, endpoint, update):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        if self.fail_with is not None:
+            raise self.fail_with
+        return super().update(endpoint, update)
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+def queue_for(transport, **options):
+    store = FusekiStore("http://fuseki.test", "ds", transport=transport)
+    options.setdefault("max_delay", 60)
+    queue = store.update.enable_write_behind(retry_delay=0.01, **options)
+    return store, queue
+
+
+def triple(i):
+    return f'<http://example.org/person/{i}> <http://example.org/name> "Person {i}" .\n'
+
+
+def stored(transport):
+    return len(transport.dataset.graph(GRAPH))
+
+
+def test_inserts_to_one_graph_are_written_as_one_request():
+    transport = FlakyTransport()
+    store, queue = queue_for(transport)
+    for i in range(3):
+        assert store.update.insert_ntriples(triple(i), GRAPH)
+    assert stored(transport) == 0
+    assert store.update.flush()
+    assert transport.updates == 1 and stored(transport) == 3
+    assert queue.close() == 0
+
+
+def test_transient_failures_are_retried_with_backoff():
+    transport = FlakyTransport([requests.ConnectionError("down"), http_error(503)])
+    store, queue = queue_for(transport)
+    store.update.insert_ntriples(triple(0), GRAPH)
+    assert not store.update.flush()
+    assert queue.close() == 0
+    assert transport.attempts == 3 and stored(transport) == 1
+    assert queue.stats()["dropped"] == 0
+
+
+def test_permanent_failures_are_dropped_at_once():
+    transport = FlakyTransport([http_error(400)])
+    store, queue = queue_for(transport)
+    store.update.insert_ntriples(triple(0), GRAPH)
+    assert not store.update.flush()
+    store.update.insert_ntriples(triple(1), GRAPH)
+    assert store.update.flush()
+    assert transport.attempts == 2 and stored(transport) == 1
+    assert queue.stats()["dropped"] == 1 and queue.stats()["dropped_triples"] == 1
+
+
+def test_close_gives_up_when_the_store_stays_down():
+    transport = FlakyTransport(fail_with=requests.ConnectionError("down"))
+    store, queue = queue_for(transport, max_retries=3)
+    store.update.insert_ntriples(triple(0), GRAPH)
+    store.update.insert_ntriples(triple(1), "http://example.org/graphs/other")
+
+    start = time.monotonic()
+    assert queue.close() == 2
+    assert time.monotonic() - start < 5
+    # One first attempt and three retries for each graph
+    assert transport.attempts == 8
+    with pytest.raises(RuntimeError):
+        queue.put(triple(2), GRAPH)
+
+
+def test_callbacks_run_once_the_graph_is_written():
+    transport = FlakyTransport([requests.ConnectionError("down")])
+    store, queue = queue_for(transport)
+    written = []
+    queue.put(triple(0), GRAPH, lambda: written.append(GRAPH))
+    store.update.flush()
+    assert written == []
+    queue.close()
+    assert written == [GRAPH]